@@ -4,6 +4,8 @@ from .formatting import (
     process_str_list,
     sci_notation,
     str_px_width,
+    str_px_widths,
+    text_px_width,
     to_sup,
 )
 from .rounders import (
@@ -21,3 +21,117 @@ def y_in_x_range(x, y, min_x, max_x):
     x array values"""
     y_trunc = y[(x >= min_x) & (x <= max_x)]
     return y_trunc
+
+
+def y_at_x_values(x, y, x_values):
+    """Linearly interpolated y values at each of x_values.
+
+    Only the requested points are computed, using a binary search
+    (searchsorted) into x rather than a scan of the whole array.
+    x may be ascending, descending or unsorted. y may be 1-D, or 2-D
+    with one trace per column, in which case all traces are looked up
+    at once. Values outside the x range are clamped to the end points,
+    as with np.interp.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    x_values = np.asarray(x_values, dtype=float)
+
+    if x[0] > x[-1]:
+        x = x[::-1]
+        y = y[::-1]
+    if np.any(x[1:] < x[:-1]):
+        order = np.argsort(x, kind="stable")
+        x = x[order]
+        y = y[order]
+
+    idx = np.clip(np.searchsorted(x, x_values), 1, x.size - 1)
+    x_lo = x[idx - 1]
+    dx = x[idx] - x_lo
+    frac = np.divide(x_values - x_lo, dx, out=np.zeros_like(x_values), where=dx != 0)
+    frac = np.clip(frac, 0.0, 1.0)
+    if y.ndim == 2:
+        frac = frac[:, None]
+    return y[idx - 1] + frac * (y[idx] - y[idx - 1])
+
+
+class XAxis:
+    """
+    x-axis helper that checks once whether x is monotonic and then answers
+    nearest-index and range queries with a binary search (searchsorted,
+    O(log n)) instead of scanning the whole array. Ranges come back as
+    slices, so indexing an array with them returns a view rather than a
+    copy. Unsorted x (or x with NaN padding) falls back to full scans that
+    skip the NaNs.
+
+    Example:
+        xa = XAxis(df.iloc[:, 0])
+        i = xa.nearest_idx(1650)
+        y = df[sel_trace].to_numpy()[xa.range_slice(1600, 1700)]
+    """
+
+    def __init__(self, x):
+        self.x = np.asarray(x, dtype=float)
+        diffs = np.diff(self.x)
+        if np.all(diffs >= 0):
+            self.order = "ascending"
+        elif np.all(diffs <= 0):
+            self.order = "descending"
+        else:
+            self.order = None
+
+    @property
+    def monotonic(self):
+        return self.order is not None
+
+    def nearest_idx(self, x_value):
+        """Position of the x value closest to x_value (the first one on ties,
+        like idx_fm_value)"""
+        if not self.monotonic:
+            # NaN padding (e.g. ragged many-x-y columns) is skipped, as
+            # Series.idxmin does
+            return int(np.nanargmin(np.abs(self.x - x_value)))
+
+        n = self.x.size
+        if self.order == "ascending":
+            pos = np.searchsorted(self.x, x_value)
+            if pos == 0:
+                nearest = 0
+            elif pos == n or x_value - self.x[pos - 1] <= self.x[pos] - x_value:
+                nearest = pos - 1  # prefer the lower position on a tie
+            else:
+                nearest = pos
+            # First occurrence if the x value is repeated
+            return int(np.searchsorted(self.x, self.x[nearest], side="left"))
+
+        # Descending, search the reversed view
+        x_rev = self.x[::-1]
+        pos = np.searchsorted(x_rev, x_value)
+        if pos == n:
+            nearest = 0
+        elif pos == 0:
+            nearest = n - 1
+        else:
+            # Positions of the neighbouring larger and smaller x values
+            larger, smaller = n - 1 - pos, n - pos
+            if self.x[larger] - x_value <= x_value - self.x[smaller]:
+                nearest = larger
+            else:
+                nearest = smaller
+        # First occurrence if the x value is repeated
+        return int(n - np.searchsorted(x_rev, self.x[nearest], side="right"))
+
+    def range_slice(self, min_x, max_x):
+        """Slice of the positions with min_x <= x <= max_x, or a boolean mask
+        if x is not monotonic"""
+        if self.order == "ascending":
+            start = np.searchsorted(self.x, min_x, side="left")
+            stop = np.searchsorted(self.x, max_x, side="right")
+            return slice(int(start), int(max(stop, start)))
+        if self.order == "descending":
+            n = self.x.size
+            x_rev = self.x[::-1]
+            start = n - np.searchsorted(x_rev, max_x, side="right")
+            stop = n - np.searchsorted(x_rev, min_x, side="left")
+            return slice(int(start), int(max(stop, start)))
+        return (self.x >= min_x) & (self.x <= max_x)
@@ -8,6 +8,8 @@ import pickle
 import time  # Needed for retry delays
 from io import BytesIO
 
+from .fig_serialize import fig_from_json, fig_to_json_bytes
+
 
 class DataCache:
     """
@@ -360,6 +362,33 @@ class DataCache:
 
         return value
 
+    def figure_save(self, value, key="specify_key", single_precision=False):
+        """
+        Save a plotly figure (go.Figure or figure dict) with its arrays as
+        base64 typed arrays (see fig_serialize) instead of JSON number lists.
+        Several times smaller and faster than the PlotlyJSONEncoder path.
+        """
+        serialized_value = fig_to_json_bytes(value, single_precision=single_precision)
+        self.cache.set(f"_value_{key}", serialized_value)
+        self.cache.set(f"_type_{key}", "figure-json")
+
+    def figure_load(self, key):
+        """
+        Load a figure saved with figure_save. Returns a figure dict that can be
+        passed to dcc.Graph as is.
+        """
+        value_type = self.cache.get(f"_type_{key}")
+        serialized_value = self.cache.get(f"_value_{key}")
+
+        if not value_type or not serialized_value:
+            raise ValueError(f"Key {key} not found in Redis or DiskCache.")
+
+        if isinstance(value_type, bytes):
+            value_type = value_type.decode("utf-8")
+        if value_type != "figure-json":
+            raise ValueError(f"Unknown type for key {key}: {value_type}")
+        return fig_from_json(serialized_value)
+
     def safe_pickle_save(self, value, key="specify_key", max_attempts=100, sleep_interval=0.1):
         """
         Save a value using pickle (or JSON serialization) and verify the save by reloading until
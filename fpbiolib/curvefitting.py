@@ -1,7 +1,12 @@
+import inspect
+
 import numpy as np
 import pandas as pd
 from lmfit import Parameters
 
+from .lineshapes import jacobians
+from .reduction import reduce_chisquare
+
 
 def component_pks(x, params, num_params, line_function):
     """function to create list of all fitted component peak y-values,
@@ -67,6 +72,111 @@ def component_pks_sum(x_with_params: list, *flat_variable_params: list):
     )
 
 
+class ComponentModel:
+    """Compiled sum-of-components model for curve fitting.
+
+    The static configuration (which lineshape each component uses and where
+    its parameters sit in the flat parameter array) is worked out once and
+    kept as attributes, so nothing has to be smuggled through the x argument
+    as with component_pks_sum. Components sharing a lineshape are evaluated
+    together in one broadcast, and analytic Jacobians come from
+    lineshapes.jacobians.
+
+    The flat parameter array has the same layout as for component_pks: the
+    parameters of each component in signature order, one component after
+    the other.
+
+    Example:
+        model = ComponentModel([gaussian] * 12 + [rayleigh_mie])
+        res = least_squares(
+            model.residuals, p0, jac=model.residuals_jac, args=(x, y)
+        )
+        popt, _ = curve_fit(model, x, y, p0=p0, jac=model.jac)
+        result = lmfit.minimize(model.residuals, lmfit_params, args=(x, y))
+    """
+
+    def __init__(self, line_functions):
+        """
+        Parameters:
+            line_functions (list): One lineshape function (from lineshapes)
+                per component, e.g. [gaussian] * 12 + [rayleigh_mie].
+        """
+        self.line_functions = list(line_functions)
+        self.num_params = [
+            len(inspect.signature(f).parameters) - 1 for f in self.line_functions
+        ]
+        self.n_params = sum(self.num_params)
+
+        starts = np.cumsum([0] + self.num_params[:-1])
+        # One group per lineshape: (function, jacobian, component rows,
+        # (n_group, num_params) indexes into the flat parameter array)
+        self.groups = []
+        for func in dict.fromkeys(self.line_functions):
+            rows = [i for i, f in enumerate(self.line_functions) if f is func]
+            idx = starts[rows, None] + np.arange(self.num_params[rows[0]])
+            self.groups.append((func, jacobians.get(func), np.array(rows), idx))
+
+    def _values(self, params):
+        """Convert numpy arrays, lists or lmfit Parameters to a float array"""
+        if isinstance(params, Parameters):
+            return np.fromiter(
+                (p.value for p in params.values()), float, len(params)
+            )
+        return np.asarray(params, dtype=float)
+
+    def components(self, x, params):
+        """Array of shape (n_components, n_points) of each fitted component.
+        Insanely small values (e.g. < 1e-30) are converted to zero, as with
+        component_pks."""
+        params = self._values(params)
+        x = np.asarray(x, dtype=float)
+        y_model_pks = np.empty((len(self.line_functions), x.size))
+        for func, _, rows, idx in self.groups:
+            y_model_pks[rows] = func(x, *params[idx].T[:, :, None])
+        y_model_pks[y_model_pks < 1.0e-30] = 0.0
+        return y_model_pks
+
+    def evaluate(self, x, params):
+        """Sum of all components"""
+        params = self._values(params)
+        x = np.asarray(x, dtype=float)
+        y_model = np.zeros(x.size)
+        for func, _, _, idx in self.groups:
+            y_model += func(x, *params[idx].T[:, :, None]).sum(axis=0)
+        return y_model
+
+    def jacobian(self, x, params):
+        """Analytic Jacobian of evaluate, shape (n_points, n_params)"""
+        params = self._values(params)
+        x = np.asarray(x, dtype=float)
+        jac = np.empty((x.size, self.n_params))
+        for func, func_jac, _, idx in self.groups:
+            if func_jac is None:
+                raise ValueError(f"No analytic Jacobian for {func.__name__}")
+            partials = func_jac(x, *params[idx].T[:, :, None])
+            for k, partial in enumerate(partials):
+                jac[:, idx[:, k]] = np.broadcast_to(
+                    partial, (idx.shape[0], x.size)
+                ).T
+        return jac
+
+    def __call__(self, x, *params):
+        """curve_fit style model function, f(x, *params)"""
+        return self.evaluate(x, params)
+
+    def jac(self, x, *params):
+        """curve_fit style Jacobian, jac(x, *params)"""
+        return self.jacobian(x, params)
+
+    def residuals(self, params, x, y):
+        """least_squares / lmfit style residuals, y - model"""
+        return y - self.evaluate(x, params)
+
+    def residuals_jac(self, params, x, y):
+        """Jacobian of residuals, for least_squares(jac=...)"""
+        return -self.jacobian(x, params)
+
+
 def peak_area_pct(x, peaklist):
     pk_area = []
     for i in range(int(len(peaklist))):
@@ -115,7 +225,7 @@ def residuals(parameters, x, y, model):
     return y - model(x, *parameters)
 
 
-def loss_function(params, data_x, data_y, model, verbose, reducer):
+def loss_function(params, data_x, data_y, model, verbose=False, reducer=None):
     """
     This is a really generic loss function.
     It can take in any number of params, any generic model.
@@ -125,12 +235,33 @@ def loss_function(params, data_x, data_y, model, verbose, reducer):
     ion to be formatted.
     """
     # loss = pow(residuals(params, data_x, data_y, model, verbose), 2.).sum()
-    loss = reducer(residuals(params, data_x, data_y, model, verbose))
+    if reducer is None:
+        reducer = reduce_chisquare
+    loss = reducer(residuals(params, data_x, data_y, model))
     if verbose:
         print(loss)
     return loss
 
 
+def loss_and_grad(params, data_x, data_y, model, model_jac, reducer=None):
+    """
+    Loss and its gradient with respect to params, for gradient-based
+    minimizers, e.g.
+    minimize(loss_and_grad, p0, args=(x, y, model, model_jac, reducer), jac=True)
+
+    model_jac is a curve_fit style Jacobian of the model, model_jac(x, *params),
+    such as ComponentModel.jac, and reducer must accept grad=True (see the
+    reducers in reduction.py). Since the residuals are y - model, the
+    gradient is -J.T @ dloss/dr.
+    """
+    if reducer is None:
+        reducer = reduce_chisquare
+    if isinstance(params, Parameters):
+        params = list(params.valuesdict().values())
+    loss, grad_r = reducer(residuals(params, data_x, data_y, model), grad=True)
+    return loss, -model_jac(data_x, *params).T @ grad_r
+
+
 def fitted_lines_to_df(df, fitted_lines: list, sel_trace: str):
     tmp_col_names = [f"Fitted line {i+1}" for i, _ in enumerate(fitted_lines)]
     fit_df = pd.DataFrame(fitted_lines).transpose()
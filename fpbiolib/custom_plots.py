@@ -1,4 +1,5 @@
 import math
+import re
 
 import numpy as np
 import pandas as pd
@@ -7,6 +8,8 @@ import plotly.io as pio
 from plotly.graph_objs import Layout
 from plotly.subplots import make_subplots
 
+from .ticks import axis_ticks_many
+
 # import symbol
 
 MINOR_TICKS = {
@@ -464,6 +467,27 @@ def tick_label_formatter(
         return ".6"
 
 
+def trace_styles(n_traces, trace_colors=[], trace_dash=[], trace_width=[]):
+    """Per-trace colors, dashes and widths for primary_graph, falling back to
+    the defaults where none (or the wrong number) are given. Colors are only
+    overridden where trace_colors has a non-None value, and not at all when
+    it contains "Custom".
+    """
+    if trace_dash is None or len(trace_dash) != n_traces:
+        trace_dash = ["solid"] * n_traces
+
+    if trace_width is None or len(trace_width) != n_traces:
+        trace_width = [1.25] * n_traces
+
+    trace_colors_default = pltcolors.copy()
+    if trace_colors is not None and "Custom" not in trace_colors:
+        for i, val in enumerate(trace_colors):
+            if val is not None:
+                trace_colors_default[i] = trace_colors[i]
+
+    return trace_colors_default, list(trace_dash), list(trace_width)
+
+
 def primary_graph(
     df,
     reference_trace,
@@ -488,22 +512,18 @@ def primary_graph(
     pk_label_arrow=True,
     pk_label_angle=0,
     pk_label_line_length=35,
+    fast=False,
+    webgl_threshold=100000,
 ):
-    if trace_dash is None or len(trace_dash) != len(df.columns[1:]):
-        trace_dash = []
-        for i, _ in enumerate(df.columns[1:]):
-            trace_dash.append("solid")
+    """Stacked line plot of every y column in an x, many-y DataFrame.
 
-    if trace_width is None or len(trace_width) != len(df.columns[1:]):
-        trace_width = []
-        for i, _ in enumerate(df.columns[1:]):
-            trace_width.append(1.25)
-
-    trace_colors_default = pltcolors.copy()
-    if trace_colors is not None and "Custom" not in trace_colors:
-        for i, val in enumerate(trace_colors):
-            if val is not None:
-                trace_colors_default[i] = trace_colors[i]
+    fast=True is meant for large datasets (e.g. hundreds of chromatograms):
+    traces are drawn without spline smoothing, and as WebGL (Scattergl) once
+    the total number of plotted points exceeds webgl_threshold.
+    """
+    trace_colors_default, trace_dash, trace_width = trace_styles(
+        len(df.columns) - 1, trace_colors, trace_dash, trace_width
+    )
 
     # print("\n\n INSIDE CUSTOM PLOT")
     # print("\n\n trace_colors:", trace_colors)
@@ -542,51 +562,44 @@ def primary_graph(
     # Option to hide a reference trace (e.g. TIC trace for combined TIC/UV plots)
     trace_idx = [(i + 1) for i in range(len(df.columns) - 1)]
 
+    # Stack offsets for every plotted trace, applied with one broadcast
+    offsets = stack_value * (len(trace_idx) - 1 - np.arange(len(trace_idx)))
     if hide_reference_trace:
-        offset = stack_value * (len(trace_idx) - 1)
         ref_idx = df.columns.get_loc(reference_trace)
         del trace_idx[ref_idx - 1]
-        for col_idx in trace_idx:
-            fig.add_trace(
-                go.Scatter(
-                    x=df.iloc[:, 0],
-                    y=df.iloc[:, col_idx] + offset,
-                    mode="lines",
-                    line_shape="spline",
-                    name=df.columns[(col_idx)],
-                    line=dict(
-                        color=trace_colors_default[col_idx - 1],
-                        width=trace_width[col_idx - 1],
-                        dash=trace_dash[col_idx - 1],
-                    ),
-                    # uid="testTrace",
-                )
-            )
-            offset -= stack_value
+        offsets = offsets[: len(trace_idx)]
+    y_stacked = df.iloc[:, trace_idx].to_numpy() + offsets
 
+    if fast:
+        # Skip the spline smoothing, and switch to WebGL for large datasets
+        scatter = go.Scattergl if y_stacked.size > webgl_threshold else go.Scatter
+        line_shape = "linear"
     else:
-        offset = stack_value * (len(trace_idx) - 1)
-        for i in range(len(df.columns) - 1):
-            fig.add_trace(
-                go.Scatter(
-                    x=df.iloc[:, 0],
-                    y=df.iloc[:, (i + 1)] + offset,
-                    mode="lines",
-                    line_shape="spline",
-                    name=df.columns[(i + 1)],
-                    line=dict(
-                        color=trace_colors_default[i],
-                        width=trace_width[i],
-                        dash=trace_dash[i],
-                    ),
-                )
+        scatter = go.Scatter
+        line_shape = "spline"
+
+    x_val = df.iloc[:, 0].to_numpy()
+    fig.add_traces(
+        [
+            scatter(
+                x=x_val,
+                y=y_stacked[:, k],
+                mode="lines",
+                line_shape=line_shape,
+                name=df.columns[col_idx],
+                line=dict(
+                    color=trace_colors_default[col_idx - 1],
+                    width=trace_width[col_idx - 1],
+                    dash=trace_dash[col_idx - 1],
+                ),
             )
-
-            offset -= stack_value
+            for k, col_idx in enumerate(trace_idx)
+        ]
+    )
 
     layout_data = {}
     if pk_labeling:
-        all_annotations = create_annotations(
+        annotations = PeakAnnotations.from_df(
             df,
             pk_labels,
             pk_label_sel_trace,
@@ -596,31 +609,9 @@ def primary_graph(
             pk_label_angle=pk_label_angle,
             pk_label_line_length=pk_label_line_length,
         )
-
-        for anno in all_annotations:
-            fig.add_annotation(anno)
-
-        # print("figure layout annotations: \n: ", fig["layout"]["annotations"])
         if current_anno:
-            # print("\ncurrent_anno: ", current_anno)
-            for index, annotations in enumerate(fig["layout"]["annotations"]):
-                update_annos = [
-                    "ax",
-                    "ay",
-                    "x",
-                    "y",
-                    "text",
-                    "arrowhead",
-                    "textangle",
-                ]
-                for anno in update_annos:
-                    if current_anno.get(f"annotations[{index}].{anno}"):
-                        fig["layout"]["annotations"][index][anno] = (
-                            current_anno.get(f"annotations[{index}].{anno}")
-                        )
-                    layout_data[f"annotations[{index}].{anno}"] = annotations[
-                        anno
-                    ]
+            layout_data = annotations.merge(current_anno).layout_data()
+        fig.update_layout(annotations=annotations.to_plotly())
 
     fig.update_xaxes(
         showline=True,
@@ -678,6 +669,127 @@ def primary_graph(
     return fig, layout_data
 
 
+class PeakAnnotations:
+    """
+    Peak labels for primary_graph stored column-wise, one array per
+    annotation attribute, rather than as one dict per label.
+
+    User edits (relayoutData style keys such as "annotations[3].ay") are
+    merged in with one indexed assignment per attribute, and the plotly
+    annotation list is only built once, by to_plotly().
+    """
+
+    # Annotation attributes that can be edited in the graph
+    attrs = ("ax", "ay", "x", "y", "text", "arrowhead", "textangle")
+    key_pattern = re.compile(r"annotations\[(\d+)\]\.(\w+)$")
+
+    def __init__(self, x, y, text, ax=0, ay=-35, arrowhead=2, textangle=0):
+        n = len(x)
+        self.columns = dict(x=np.asarray(x), y=np.asarray(y))
+        self.columns["text"] = np.empty(n, dtype=object)
+        self.columns["text"][:] = list(text)[:n]
+        for attr, value in dict(
+            ax=ax, ay=ay, arrowhead=arrowhead, textangle=textangle
+        ).items():
+            self.columns[attr] = np.full(n, value, dtype=object)
+
+    def __len__(self):
+        return len(self.columns["x"])
+
+    @classmethod
+    def from_df(
+        cls,
+        df,
+        pk_labels,
+        pk_label_sel_trace,
+        pk_label_indexes,
+        stack_value,
+        pk_label_arrow=True,
+        pk_label_angle=0,
+        pk_label_line_length=35,
+    ):
+        """Labels at the pk_label_indexes rows of the selected trace,
+        offset by the Stack Traces slider value"""
+        # For peak labeling find top y value
+        if pk_label_sel_trace == "default":
+            top_y_val = np.asarray(df.iloc[:, -1])
+        else:
+            top_y_val = np.asarray(df[pk_label_sel_trace])
+
+        x_val = np.asarray(df.iloc[:, 0])
+        sel_trace_col_idx = df.columns.get_loc(pk_label_sel_trace)
+        offset = stack_value * (len(df.columns) - 1 - sel_trace_col_idx)
+
+        pk_idx = np.asarray(pk_label_indexes, dtype=int)
+        return cls(
+            x_val[pk_idx],
+            top_y_val[pk_idx] + offset,
+            pk_labels,
+            ax=0,
+            ay=-pk_label_line_length,
+            arrowhead=2 if pk_label_arrow == True else 0,
+            textangle=pk_label_angle,
+        )
+
+    def merge(self, current_anno):
+        """Apply user edits, e.g. {"annotations[3].ay": -50}. As before, only
+        truthy values are applied and indexes past the end are ignored."""
+        edits = {}
+        for key, value in current_anno.items():
+            match = self.key_pattern.match(key)
+            if match and value and match[2] in self.columns:
+                edits.setdefault(match[2], {})[int(match[1])] = value
+
+        n = len(self)
+        for attr, values in edits.items():
+            idx = np.fromiter(values, dtype=int, count=len(values))
+            keep = idx < n
+            new_values = np.empty(len(values), dtype=object)
+            new_values[:] = list(values.values())
+            column = self.columns[attr]
+            if column.dtype != object:
+                column = self.columns[attr] = column.astype(object)
+            column[idx[keep]] = new_values[keep]
+        return self
+
+    def layout_data(self):
+        """The edited attributes of every annotation, keyed as in
+        relayoutData"""
+        columns = [self.columns[attr].tolist() for attr in self.attrs]
+        return {
+            f"annotations[{i}].{attr}": column[i]
+            for i in range(len(self))
+            for attr, column in zip(self.attrs, columns)
+        }
+
+    def to_plotly(self):
+        """List of annotation dicts for the figure layout"""
+        return [
+            dict(
+                x=x,
+                y=y,
+                text=text,
+                xref="x",
+                yref="y",
+                showarrow=True,
+                arrowhead=arrowhead,
+                ax=ax,
+                ay=ay,
+                clicktoshow="onoff",
+                standoff=2,
+                font=dict(color="black", size=14),
+                textangle=textangle,
+                xanchor="center",
+            )
+            for x, y, text, arrowhead, ax, ay, textangle in zip(
+                *(
+                    self.columns[attr].tolist()
+                    for attr in ("x", "y", "text", "arrowhead", "ax", "ay", "textangle")
+                )
+            )
+        ]
+
+
 def create_annotations(
     df,
     pk_labels,
@@ -694,46 +806,16 @@ def create_annotations(
     values.  The stack value allows a vertical offset based on
     the Stack Traces slider input.
     """
-    if pk_label_arrow == True:
-        pk_label_arrow = 2
-
-    else:
-        pk_label_arrow = 0
-
-    # For peak labeling find top y value
-    if pk_label_sel_trace == "default":
-        top_y_val = np.asarray(df.iloc[:, -1])
-    else:
-        top_y_val = np.asarray(df[pk_label_sel_trace])
-
-    x_val = np.asarray(df.iloc[:, 0])
-    trace_idx = [(i + 1) for i in range(len(df.columns) - 1)]
-    sel_trace_col_idx = df.columns.get_loc(pk_label_sel_trace)
-    offset = stack_value * (len(trace_idx) - (sel_trace_col_idx))
-
-    all_annotations = []
-    for i, pk_idx in enumerate(pk_label_indexes):
-        anno = dict(
-            x=x_val[pk_idx],
-            y=top_y_val[pk_idx] + offset,
-            text=pk_labels[i],
-            xref="x",
-            yref="y",
-            showarrow=True,
-            # arrowhead=2,
-            arrowhead=pk_label_arrow,
-            ax=0,
-            ay=-pk_label_line_length,
-            clicktoshow="onoff",
-            standoff=2,
-            font=dict(color="black", size=14),
-            # textangle=0,
-            textangle=pk_label_angle,
-            xanchor="center",
-        )
-        all_annotations.append(anno)
-
-    return all_annotations
+    return PeakAnnotations.from_df(
+        df,
+        pk_labels,
+        pk_label_sel_trace,
+        pk_label_indexes,
+        stack_value,
+        pk_label_arrow=pk_label_arrow,
+        pk_label_angle=pk_label_angle,
+        pk_label_line_length=pk_label_line_length,
+    ).to_plotly()
 
 
 def baseline_check_graph(x_val, y_val, base, zoom_level=1):
@@ -823,82 +905,12 @@ def create_cow_pk_align_fig(df):
 
 
 def axis_ticks(a, zoom, dfmax, y_ax):
-    #     if zoom <= 1:
-    #         zoom = 1
-    #     elif zoom <= 3:
-    #         zoom = 2
-    #     else:
-    #         zoom =5
-
-    if not y_ax:
-        zoom = 1
-    a_min = a.min() / zoom
-    a_max = dfmax / zoom
-    delta = abs(a_max - a_min)
-    delta_mag = magnitude(delta)
-
+    """Tick values and labels for an axis running from the minimum of a to
+    dfmax. If a_min is 0 and a_max is 50 - 100, major ticks are every 10 and
+    minor every 2; if a_max is 10 - 50, major ticks are every 5 and minor
+    every 1. See ticks.axis_ticks_many to do many axes at once.
     """
-    create tick value rounded down to appropriate place value, i.e.
-    if a_min is 0, and a_max is 50 - 100, we want major ticks every 10 and minor every 2.
-    if a_min is 0, and a_max is 10 - 50, we want major ticks every 5 and minor every 1
-
-    if a_max - a_min is between 10 - 99, deltamag is 1
-    we want low end of ticks to start at nearest 10 place on the low side (i.e. if a_min is 11, we want tick_low at 10)
-    """
-    tick_low = rounddown(
-        a_min, 10 ** (int(delta_mag))
-    )  # rounds to nearest place value on low end
-    tick_hi = roundup(a_max, 10 ** (int(delta_mag)))
-
-    dif_norm = (
-        a_max / 10**delta_mag - a_min / 10**delta_mag
-    )  # create normalized difference parameter, i.e. if a_max is 600, and delta_mag is 2 it gets normalized to 6
-
-    if dif_norm >= 5:
-        tick_spc_maj = 10 ** (int(delta_mag))
-        tick_spc = tick_spc_maj / 5
-        #         tick_vals_major = list(np.around((np.arange(tick_low, tick_hi+tick_spc*1, tick_spc_maj)), decimals = magnitude(a_max)-4))
-        tick_vals_major = list(
-            np.arange(tick_low, tick_hi * zoom, tick_spc_maj)
-        )
-        tick_vals = list(np.arange(tick_low, tick_hi * zoom, tick_spc))
-    else:
-        tick_spc_maj = (10 ** (int(delta_mag))) / 2
-        tick_spc = tick_spc_maj / 5
-        #         tick_vals_major = list(np.around((np.arange(tick_low, tick_hi+tick_spc*1, tick_spc_maj)), decimals = magnitude(a_max)-4))
-        tick_vals_major = list(
-            np.arange(tick_low, tick_hi * zoom, tick_spc_maj)
-        )
-        tick_vals = list(np.arange(tick_low, tick_hi * zoom, tick_spc * zoom))
-
-    #     if y_ax:
-
-    #         tick_spc_maj = (10**(int(delta_mag)))/2
-    #         tick_spc = tick_spc_maj/5
-    #         tick_vals_major = list(np.arange(tick_low, tick_hi+tick_spc*1, tick_spc_maj))
-    #         tick_vals = list(np.arange(tick_low, tick_hi+tick_spc, tick_spc*zoom))
-
-    #'''Create function to format tick_txt decimal places based on a_max value '''
-
-    mag_a_max = magnitude(a_max)
-    if (
-        mag_a_max <= 1
-    ):  # formatting only works for decimal places, and only want 1 decimal for power of 10
-        s = (
-            -mag_a_max + 2
-        )  #  magnitudes will be negative for values < 0, need to reverse sign
-    else:
-        s = 0  # zero places for magnitudes >1
-
-    tick_txt = ["" for x in tick_vals]
-    if (
-        abs(tick_vals[0]) >= 10000 or abs(tick_vals[-1]) >= 10000
-    ):  # use sci not if above 10000
-        tick_txt_major = ["{:.2e}".format(x) for x in tick_vals_major]
-    else:
-        tick_txt_major = ["{:.{}f}".format(x, s) for x in tick_vals_major]
-
-    return a_min, a_max, tick_vals, tick_txt, tick_vals_major, tick_txt_major
+    return axis_ticks_many([a.min()], [dfmax], [zoom], [y_ax])[0]
 
 
 def roundup(
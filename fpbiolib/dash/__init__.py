@@ -1,8 +1,22 @@
+from importlib.metadata import PackageNotFoundError, version
+
+try:
+    # Used by Dash to fingerprint the assets served from this package
+    __version__ = version("fpbiolib")
+except PackageNotFoundError:
+    __version__ = "0.0.0"
+
 from .aio_sliders import (
     FloatLogRangeSliderAIO,  # noqa
     FloatLogSliderAIO,  # noqa
     FloatRangeSliderAIO,  # noqa
     FloatSliderAIO,  # noqa
 )
-from .generate_html_table import generate_table  # noqa
+from .generate_html_table import (
+    format_columns,  # noqa
+    generate_table,  # noqa
+    paged_table,  # noqa
+    table_page,  # noqa
+)
+from .figure_patch import PrimaryGraphCache  # noqa
 from .switches import switch_label_controller  # noqa
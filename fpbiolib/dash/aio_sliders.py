@@ -4,16 +4,34 @@ import uuid
 
 import dash_bootstrap_components as dbc
 import numpy as np
-from dash import MATCH, Dash, Input, Output, State, callback, ctx, dcc, html
-from dash.exceptions import PreventUpdate
+from dash import (
+    MATCH,
+    ClientsideFunction,
+    Input,
+    Output,
+    clientside_callback,
+    dcc,
+    hooks,
+    html,
+)
 from fpbiolib import (
-    dec_notation,
-    interval_range,
     process_str_list,
-    sci_notation,
     str_px_width,
 )
 
+from .slider_marks import linear_slider_marks, log_slider_marks, sci_num_format
+
+# The slider callbacks run in the browser (assets/aio_sliders.js), served
+# with every Dash app once this module has been imported
+hooks.script(
+    [
+        {
+            "relative_package_path": "assets/aio_sliders.js",
+            "namespace": "fpbiolib.dash",
+        }
+    ]
+)
+
 
 def dfc_dbc_label(label: str):
     """Takes in an optional label string and
@@ -33,64 +51,6 @@ def dfc_dbc_label(label: str):
     return label_div
 
 
-def sci_num_format(
-    num: float,
-    sci_sig_figs: int = 3,
-    sci_note_upper: float = 10000,
-    sci_note_lower: float = 0.01,
-    e_notation: bool = True,
-    cap_e: bool = False,
-) -> str:
-    """Formats numbers above and below a specified
-    limit to a string in scientific or decimal notation.
-    """
-    if num == 0:
-        return "0"
-    elif abs(num) >= sci_note_upper or abs(num) < sci_note_lower:
-        return sci_notation(
-            num, sci_sig_figs, e_notation=e_notation, cap_e=cap_e
-        )
-    else:
-        return dec_notation(num, sci_note_upper).rstrip("0").rstrip(".")
-
-
-def linear_slider_marks(x_min, x_max, e_notation=True, cap_e=False) -> dict:
-    """Generate linearly spaced slider value
-    dictionary for generating slider marks.
-    """
-    intervals = interval_range(x_min, x_max)
-    marks = {
-        i: sci_num_format(
-            i, sci_note_lower=0.001, e_notation=e_notation, cap_e=cap_e
-        )
-        for i in intervals
-    }
-    return {int(k) if k.is_integer() else k: v for k, v in marks.items()}
-
-
-def log_slider_marks(
-    log_intervals, base=10, round_to_ord_mag=True, e_notation=True, cap_e=False
-) -> dict:
-    """Generate log spaced slider value
-    dictionary for generating slider marks.
-    """
-    if round_to_ord_mag:
-        # Convert the intervals to sorted, unique list of integers
-        log_intervals = np.unique(np.rint(log_intervals))
-        # for some reason, mark values that are -2, -1, 1, 2, etc must be explicitely converted to integers to display in the slider
-        marks = {
-            int(
-                k
-            ): f"{sci_num_format(base**k, sci_sig_figs=0, sci_note_upper=10000, sci_note_lower=0.001, e_notation=e_notation, cap_e=cap_e)}"
-            for k in log_intervals
-        }
-
-    else:
-        marks = {(i): f"{base**i:#.3g}" for i in log_intervals[1:]}
-        marks = {int(k) if k.is_integer() else k: v for k, v in marks.items()}
-    return marks
-
-
 # All-in-One Components should be suffixed with 'AIO'
 class FloatSliderAIO(html.Div):  # html.Div will be the "parent" component
     """A set of functions that create pattern-matching callbacks of the subcomponents"""
@@ -238,11 +198,14 @@ class FloatSliderAIO(html.Div):  # html.Div will be the "parent" component
             style={"display": "block"},
         )
 
-    # Define this component's stateless pattern-matching callback
-    # that will apply to every instance of this component.
+    # Define this component's stateless pattern-matching clientside
+    # callback that will apply to every instance of this component.
 
     # Link slider and input box values, seeded with initial x-min / max values
-    @callback(
+    clientside_callback(
+        ClientsideFunction(
+            namespace="fpbiolib_aio", function_name="floatSlider"
+        ),
         Output(ids.slider(MATCH), "value"),
         Output(
             ids.input(MATCH),
@@ -255,44 +218,6 @@ class FloatSliderAIO(html.Div):  # html.Div will be the "parent" component
         ),
         # prevent_initial_call=True,
     )
-    def aio_float_slider_cb(slider_val, input_val):
-        """Binds the slider and input values together"""
-        trigger_id = ctx.triggered_id
-        # print("trigger_id: ", trigger_id)
-        # if slider_val is None:
-        #     slider_val = 0
-        # if input_val is None:
-        #     input_val = "0"
-
-        # Format slider values (and accompanying inputs since they are initially defined by slider values)
-
-        if slider_val is None:
-            slider_val = 0
-            input_val = 0
-
-        slider_str_value = sci_num_format(
-            float(slider_val),
-            sci_sig_figs=3,
-            sci_note_upper=10000,
-            sci_note_lower=0.001,
-        )
-        # Set values to those in either the input box or slider values
-        input_val = (
-            input_val
-            if isinstance(trigger_id, list)
-            and trigger_id["subcomponent"] == "input"
-            else slider_str_value
-        )
-        # print("input_val: ", input_val)
-
-        slider_rtn = (
-            slider_val
-            if isinstance(trigger_id, list)
-            and trigger_id["subcomponent"] == "slider"
-            else float(input_val)
-        )
-        # print("returning: ", float(slider_rtn), slider_rtn, input_val)
-        return slider_rtn, input_val
 
 
 class FloatRangeSliderAIO(html.Div):  # html.Div will be the "parent" component
@@ -475,11 +400,14 @@ class FloatRangeSliderAIO(html.Div):  # html.Div will be the "parent" component
             style={"width": "100%", "margin-bottom": "-8px"},
         )
 
-    # Define this component's stateless pattern-matching callback
-    # that will apply to every instance of this component.
+    # Define this component's stateless pattern-matching clientside
+    # callback that will apply to every instance of this component.
 
     # Link slider and input box values, seeded with initial x-min / max values
-    @callback(
+    clientside_callback(
+        ClientsideFunction(
+            namespace="fpbiolib_aio", function_name="floatRangeSlider"
+        ),
         Output(ids.range_slider(MATCH), "value"),
         Output(
             ids.input_start(MATCH),
@@ -504,66 +432,6 @@ class FloatRangeSliderAIO(html.Div):  # html.Div will be the "parent" component
         ),
         # prevent_initial_call=True,
     )
-    def aio_float_range_slider_callback(
-        slider_value, input_low_value, input_high_value
-    ):
-        """Binds the slider and input values together"""
-        trigger_id = ctx.triggered_id
-        # print("\n\ntrigger id in aio float slider: ", trigger_id)
-        # print("slider_value initial aio float slider: ", slider_value)
-        # print("input_low_value in aio float slider: ", input_low_value)
-
-        # Format slider values (and accompanying inputs since they are initially defined by slider values)
-        slider_low_str = sci_num_format(slider_value[0])
-        slider_high_str = sci_num_format(slider_value[1])
-
-        # Set truncation values to those in either the input box or slider values
-        input_low_value = (
-            input_low_value
-            if isinstance(trigger_id, list)
-            and trigger_id["subcomponent"] == "input_start"
-            else slider_low_str
-        )
-        input_high_value = (
-            input_high_value
-            if isinstance(trigger_id, list)
-            and trigger_id["subcomponent"] == "input_end"
-            else slider_high_str
-        )
-        slider_value = (
-            slider_value
-            if isinstance(trigger_id, list)
-            and trigger_id["subcomponent"] == "range_slider"
-            else [float(input_low_value), float(input_high_value)]
-        )
-
-        # Pass width of dcc input based on number of characters in the input number
-        input_start_width = str_px_width(
-            input_low_value, font="open_sans_12pt_px"
-        )
-
-        input_min_style = {
-            "width": input_start_width,
-            "text-align": "right",
-            "font-size": "12px",
-            "height": "14px",
-            "border": "none",
-            "background-color": "transparent",
-        }
-
-        # print("slider_value: ", slider_value)
-        # print("input_min_style: ", input_min_style)
-        # print("input_low_value: ", input_low_value, type(input_low_value))
-        # print("input_high_value: ", input_high_value, type(input_high_value))
-
-        # print("returning output: ", output)
-        # print("returning ctx.outputs: ", ctx.outputs_list)
-        return (
-            slider_value,
-            input_low_value,
-            input_high_value,
-            input_min_style,
-        )
 
 
 class FloatLogSliderAIO(html.Div):  # html.Div will be the "parent" component
@@ -764,11 +632,14 @@ class FloatLogSliderAIO(html.Div):  # html.Div will be the "parent" component
             style={"display": "block"},
         )
 
-    # Define this component's stateless pattern-matching callback
-    # that will apply to every instance of this component.
+    # Define this component's stateless pattern-matching clientside
+    # callback that will apply to every instance of this component.
 
     # Link slider and input box values, seeded with initial x-min / max values
-    @callback(
+    clientside_callback(
+        ClientsideFunction(
+            namespace="fpbiolib_aio", function_name="floatLogSlider"
+        ),
         Output(ids.output(MATCH), "data"),
         Output(
             ids.input(MATCH),
@@ -783,36 +654,6 @@ class FloatLogSliderAIO(html.Div):  # html.Div will be the "parent" component
         Input(ids.base(MATCH), "data"),
         prevent_initial_call=True,
     )
-    def float_log_slider_callback(slider_value, input_value, base):
-        """Binds the slider and input values together"""
-        if base is None:
-            base = 10
-        trigger_id = ctx.triggered_id
-        if trigger_id == None:
-            raise PreventUpdate
-
-        # Format slider values (and accompanying inputs since they are initially defined by slider values)
-        slider_str_value = sci_num_format(
-            float(base ** (slider_value)),
-            sci_sig_figs=3,
-            sci_note_upper=10000,
-            sci_note_lower=0.01,
-        )
-
-        # Set values to those in either the input box or slider values
-        input_value = (
-            input_value
-            if trigger_id["subcomponent"] == "input"
-            else slider_str_value
-        )
-
-        slider_value = (
-            slider_value
-            if trigger_id["subcomponent"] == "slider"
-            else math.log(float(input_value), base)
-        )
-
-        return float(input_value), input_value, slider_value
 
 
 class FloatLogRangeSliderAIO(
@@ -1053,11 +894,14 @@ class FloatLogRangeSliderAIO(
             style={"display": "block"},
         )
 
-    # Define this component's stateless pattern-matching callback
-    # that will apply to every instance of this component.
+    # Define this component's stateless pattern-matching clientside
+    # callback that will apply to every instance of this component.
 
     # Link slider and input box values, seeded with initial x-min / max values
-    @callback(
+    clientside_callback(
+        ClientsideFunction(
+            namespace="fpbiolib_aio", function_name="floatLogRangeSlider"
+        ),
         Output(ids.output(MATCH), "data"),
         Output(ids.range_slider(MATCH), "value"),
         Output(
@@ -1088,86 +932,3 @@ class FloatLogRangeSliderAIO(
         Input(ids.base(MATCH), "data"),
         prevent_initial_call=True,
     )
-    def float_log_range_slider_callback(slider, start, end, base):
-        """Binds the slider and input values together"""
-        trigger_id = ctx.triggered_id
-        if base is None:
-            base = 10
-        # Format slider values (and accompanying inputs since they are initially defined by slider values)
-        slider_0_str = sci_num_format(
-            float(base ** (slider[0])),
-            sci_sig_figs=3,
-            sci_note_upper=10000,
-            sci_note_lower=0.01,
-        )
-        slider_1_str = sci_num_format(
-            (base ** (slider[1])),
-            sci_sig_figs=3,
-            sci_note_upper=10000,
-            sci_note_lower=0.01,
-        )
-
-        # Set truncation values to those in either the input box or slider values
-        slider_start = (
-            start
-            if trigger_id["subcomponent"] == "input_start"
-            else slider_0_str
-        )
-        slider_end = (
-            end if trigger_id["subcomponent"] == "input_end" else slider_1_str
-        )
-
-        slider_value = (
-            slider
-            if trigger_id["subcomponent"] == "range_slider"
-            else [
-                math.log(float(slider_start), base),
-                math.log(float(slider_end), base),
-            ]
-        )
-
-        # Pass width of dcc input based on number of characters in the input number
-        input_start_width = (
-            f"{str(sum(c.isalnum() for c in str(slider_start))*10 + 2)}px"
-        )
-        if input_start_width == "12px":  # need min of 23px
-            input_start_width = "23px"
-
-        input_end_width = (
-            f"{str(sum(c.isalnum() for c in str(slider_end))*10 + 2)}px"
-        )
-        if input_end_width == "12px":  # need min of 23px
-            input_end_width = "23px"
-
-        style_start = {
-            "width": input_start_width,
-            "text-align": "right",
-            "font-size": "12px",
-            "height": "14px",
-            "border": "none",
-            "background-color": "transparent",
-        }
-
-        style_end = {
-            "width": input_end_width,
-            "text-align": "left",
-            "font-size": "12px",
-            "height": "14px",
-            "border": "none",
-            "margin-right": "12px",
-            "background-color": "transparent",
-        }
-
-        converted_output = [
-            float(base ** (slider_value[0])),
-            float(base ** (slider_value[1])),
-        ]
-
-        return (
-            converted_output,
-            slider_value,
-            slider_start,
-            slider_end,
-            style_start,
-            style_end,
-        )
@@ -0,0 +1,202 @@
+// Clientside callbacks binding the slider and text input of the AIO sliders
+// in fpbiolib/dash/aio_sliders.py, so dragging a slider doesn't need a round
+// trip to the server. The number formatting follows sci_num_format.
+
+window.dash_clientside = window.dash_clientside || {};
+
+(function () {
+    // Same mapping as formatting.get_super for the characters of an exponent
+    var SUPERSCRIPTS = {
+        "0": "⁰", "1": "¹", "2": "²", "3": "³", "4": "⁴",
+        "5": "⁵", "6": "⁶", "7": "⁷", "8": "⁸", "9": "⁹",
+        "+": "⁺", "-": "⁻",
+    };
+
+    // Character widths from formatting.font_widths["open_sans_12pt_px"]
+    var OPEN_SANS_12PT_PX = {
+        ".": 4, "-": 5.3, "e": 7.1, "E": 9.8,
+        "0": 8, "1": 8, "2": 8, "3": 8, "4": 8, "5": 8, "6": 8, "7": 8, "8": 8, "9": 8,
+    };
+    var DEFAULT_CHAR_WIDTH = 8;
+
+    // toFixed / toExponential round exact ties (e.g. 0.0625 to 3 decimals)
+    // away from zero, Python rounds them to even. exact is the same number
+    // written with 100 digits, which is exact for the values formatted here.
+    function roundHalfEven(rounded, exact, digits) {
+        var parts = exact.split("e");
+        var mantissa = parts[0].split(".");
+        var tail = mantissa[1].slice(digits);
+        if (!/^50*$/.test(tail)) {
+            return rounded;
+        }
+        var truncated = mantissa[0] + (digits > 0 ? "." + mantissa[1].slice(0, digits) : "");
+        var lastDigit = Number(truncated.charAt(truncated.length - 1));
+        if (lastDigit % 2 !== 0) {
+            return rounded;
+        }
+        return parts.length > 1 ? truncated + "e" + parts[1] : truncated;
+    }
+
+    function toFixed(num, digits) {
+        return roundHalfEven(num.toFixed(digits), num.toFixed(100), digits);
+    }
+
+    function toExponential(num, digits) {
+        return roundHalfEven(num.toExponential(digits), num.toExponential(100), digits);
+    }
+
+    // Python style "{:.Ne}": at least two exponent digits, e.g. 3.560e+06
+    function sciNotation(num, sigFigs, eNotation, capE) {
+        var parts = toExponential(num, sigFigs).split("e");
+        var sign = parts[1].charAt(0);
+        var digits = parts[1].slice(1);
+        if (eNotation) {
+            if (digits.length < 2) {
+                digits = "0" + digits;
+            }
+            return parts[0] + (capE ? "E" : "e") + sign + digits;
+        }
+        // 3.560 × 10⁶, 3.560 × 10⁻⁵
+        var exponent = (sign === "-" ? "-" : "") + digits;
+        var sup = exponent.split("").map(function (c) {
+            return SUPERSCRIPTS[c] || c;
+        }).join("");
+        return parts[0] + " × 10" + sup;
+    }
+
+    function sciNumFormat(num, sigFigs, upper, lower, eNotation, capE) {
+        sigFigs = sigFigs === undefined ? 3 : sigFigs;
+        upper = upper === undefined ? 10000 : upper;
+        lower = lower === undefined ? 0.01 : lower;
+        eNotation = eNotation === undefined ? true : eNotation;
+        if (num === 0) {
+            return "0";
+        }
+        if (Math.abs(num) >= upper || Math.abs(num) < lower) {
+            return sciNotation(num, sigFigs, eNotation, capE);
+        }
+        return toFixed(num, 3).replace(/0+$/, "").replace(/\.$/, "");
+    }
+
+    // formatting.str_px_width
+    function strPxWidth(text) {
+        var width = 0;
+        String(text).split("").forEach(function (c) {
+            var w = OPEN_SANS_12PT_PX[c];
+            width += w === undefined ? DEFAULT_CHAR_WIDTH : w;
+        });
+        return (width <= 11 ? 11 : width) + "px";
+    }
+
+    // Input width of the log range slider, 10 px per letter or digit
+    function alnumPxWidth(text) {
+        var n = (String(text).match(/[\p{L}\p{N}]/gu) || []).length;
+        var width = n * 10 + 2;
+        return (width === 12 ? 23 : width) + "px";
+    }
+
+    function triggeredSubcomponent() {
+        var triggered = dash_clientside.callback_context.triggered_id;
+        return triggered ? triggered.subcomponent : null;
+    }
+
+    function parseNumber(text) {
+        var num = Number(String(text).trim());
+        if (String(text).trim() === "" || isNaN(num)) {
+            throw dash_clientside.PreventUpdate;
+        }
+        return num;
+    }
+
+    function logBase(num, base) {
+        return Math.log(num) / Math.log(base);
+    }
+
+    window.dash_clientside.fpbiolib_aio = {
+        sciNumFormat: sciNumFormat,
+        strPxWidth: strPxWidth,
+
+        floatSlider: function (sliderValue, inputValue) {
+            if (triggeredSubcomponent() === "input") {
+                return [parseNumber(inputValue), inputValue];
+            }
+            sliderValue = sliderValue === null || sliderValue === undefined ? 0 : sliderValue;
+            return [sliderValue, sciNumFormat(sliderValue, 3, 10000, 0.001)];
+        },
+
+        floatRangeSlider: function (sliderValue, inputLow, inputHigh) {
+            var sub = triggeredSubcomponent();
+            if (sub === "input_start" || sub === "input_end") {
+                sliderValue = [parseNumber(inputLow), parseNumber(inputHigh)];
+            } else {
+                inputLow = sciNumFormat(sliderValue[0]);
+                inputHigh = sciNumFormat(sliderValue[1]);
+            }
+            var inputMinStyle = {
+                "width": strPxWidth(inputLow),
+                "text-align": "right",
+                "font-size": "12px",
+                "height": "14px",
+                "border": "none",
+                "background-color": "transparent",
+            };
+            return [sliderValue, inputLow, inputHigh, inputMinStyle];
+        },
+
+        floatLogSlider: function (sliderValue, inputValue, base) {
+            base = base === null || base === undefined ? 10 : base;
+            var sub = triggeredSubcomponent();
+            if (sub === null) {
+                throw dash_clientside.PreventUpdate;
+            }
+            if (sub === "input") {
+                var num = parseNumber(inputValue);
+                return [num, inputValue, logBase(num, base)];
+            }
+            var value = Math.pow(base, sliderValue);
+            return [value, sciNumFormat(value, 3, 10000, 0.01), sliderValue];
+        },
+
+        floatLogRangeSlider: function (sliderValue, start, end, base) {
+            base = base === null || base === undefined ? 10 : base;
+            var sub = triggeredSubcomponent();
+            if (sub !== "input_start") {
+                start = sciNumFormat(Math.pow(base, sliderValue[0]), 3, 10000, 0.01);
+            }
+            if (sub !== "input_end") {
+                end = sciNumFormat(Math.pow(base, sliderValue[1]), 3, 10000, 0.01);
+            }
+            if (sub !== "range_slider") {
+                sliderValue = [
+                    logBase(parseNumber(start), base),
+                    logBase(parseNumber(end), base),
+                ];
+            }
+            var styleStart = {
+                "width": alnumPxWidth(start),
+                "text-align": "right",
+                "font-size": "12px",
+                "height": "14px",
+                "border": "none",
+                "background-color": "transparent",
+            };
+            var styleEnd = {
+                "width": alnumPxWidth(end),
+                "text-align": "left",
+                "font-size": "12px",
+                "height": "14px",
+                "border": "none",
+                "margin-right": "12px",
+                "background-color": "transparent",
+            };
+            return [
+                [Math.pow(base, sliderValue[0]), Math.pow(base, sliderValue[1])],
+                sliderValue,
+                start,
+                end,
+                styleStart,
+                styleEnd,
+            ];
+        },
+    };
+})();
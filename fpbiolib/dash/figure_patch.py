@@ -0,0 +1,432 @@
+import copy
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+from dash import Patch, no_update
+
+from ..array_transforms import XAxis
+from ..custom_plots import PeakAnnotations, primary_graph, trace_styles
+from ..shrink_df import minmax_decimate
+
+
+def _same_options(a, b):
+    """Whether two primary_graph option dicts are equal. Options can hold
+    arrays (e.g. pk_label_indexes from find_peaks), which are compared by
+    value."""
+    if a.keys() != b.keys():
+        return False
+    for k, value in a.items():
+        other = b[k]
+        if isinstance(value, np.ndarray) or isinstance(other, np.ndarray):
+            if not np.array_equal(value, other):
+                return False
+        elif value != other:
+            return False
+    return True
+
+
+class PrimaryGraphCache:
+    """
+    Caches the primary_graph figure per dataset and turns slider changes into
+    dash.Patch updates, so only the parts of the figure that changed are sent
+    to the browser.
+
+    figure() builds the full figure the first time a dataset key (or a change
+    to the build options) is seen. update() then compares the new slider
+    values with the ones last sent and returns a Patch holding only:
+
+      - zoom_level: the y axis range
+      - trace_colors, trace_dash, trace_width: line styles of the traces
+        that changed
+      - current_anno: the edited annotation attributes
+      - stack_value: the y arrays of the traces (x data and layout are not
+        resent) and the y positions of the peak labels
+
+    The cached figure is kept in sync with every Patch, so figure() can hand
+    it out again (e.g. on a page reload) without rebuilding it.
+
+    With max_points set, the full resolution data stays on the server and
+    the browser only gets a min/max decimated view (see
+    shrink_df.minmax_decimate) of at most max_points points per trace.
+    relayout() re-decimates the visible x range whenever the user zooms or
+    pans, so full detail appears as the user zooms in.
+
+    Entries are kept in this process. When the app runs in several worker
+    processes (e.g. gunicorn), pass a DataCache over the shared backend
+    (Redis, DiskCache) as data_cache, so any worker can carry on from the
+    last figure sent, whichever worker built it. The data is saved there
+    once when the figure is built, and the small state (options, slider
+    values, visible x range) whenever it changes. A process only reloads an
+    entry, rebuilding its figure from the data and state, when another one
+    has changed it since. Without it, update() and relayout() return
+    dash.no_update for a dataset this process has not built.
+
+    Example:
+        graph_cache = PrimaryGraphCache(data_cache=DataCache(redis_client))
+
+        # Callback for a new upload or build options
+        fig, layout_data = graph_cache.figure(data_key, df, reference_trace, **options)
+
+        # Callback for the stack, zoom and style sliders
+        patch = graph_cache.update(data_key, stack_value=stack, zoom_level=zoom)
+
+        # Callback for the graph's relayoutData (when max_points is set)
+        patch = graph_cache.relayout(data_key, relayout_data)
+    """
+
+    def __init__(self, maxsize=8, max_points=None, data_cache=None):
+        """
+        Parameters:
+            maxsize (int): Number of datasets to keep, least recently used
+                datasets are dropped first.
+            max_points (int, optional): Send at most this many points per
+                trace, about twice the plot width in pixels works well. By
+                default every point is sent.
+            data_cache (cache_utils.DataCache, optional): Shared cache the
+                entries are saved to, for apps running several worker
+                processes.
+        """
+        self.maxsize = maxsize
+        self.max_points = max_points
+        self.data_cache = data_cache
+        self._entries = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+    def figure(self, key, df, reference_trace, **kwargs):
+        """
+        Full figure for the dataset, as a dict ready for dcc.Graph.
+
+        Parameters:
+            key (hashable): Identifies the dataset, e.g. the upload's cache
+                key. Use a new key whenever df changes.
+            df (pandas.DataFrame): x, many-y layout, as for primary_graph.
+            reference_trace (str): As for primary_graph.
+            **kwargs: Any other primary_graph option.
+
+        Returns:
+            tuple: (figure dict, layout_data) as from primary_graph.
+        """
+        entry = self._entry(key)
+        if (
+            entry is None
+            or entry["reference_trace"] != reference_trace
+            or not _same_options(entry["kwargs"], kwargs)
+        ):
+            fig, layout_data = primary_graph(df, reference_trace, **kwargs)
+            entry = self._build_entry(
+                df, reference_trace, kwargs, fig.to_plotly_json(), layout_data
+            )
+            if self.max_points:
+                self._set_view(entry, None)
+            self._store(key, entry, df)
+        return entry["fig"], entry["layout_data"]
+
+    def _entry(self, key):
+        """The entry for key, reloaded from data_cache if another process
+        has changed it, or None if there is none"""
+        entry = self._entries.get(key)
+        if self.data_cache is not None:
+            try:
+                version = self.data_cache.pickle_load(self._cache_key("version", key))
+            except ValueError:
+                version = None
+            if version is not None and (entry is None or entry["version"] != version):
+                entry = self._load(key)
+        if entry is not None:
+            self._keep(key, entry)
+        return entry
+
+    def _keep(self, key, entry):
+        """Hold entry in this process as the most recently used"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _cache_key(part, key):
+        return f"primary_graph_{part}_{key}"
+
+    def _store(self, key, entry, df=None):
+        """Keep entry in this process and save its state to data_cache. df
+        is only saved when given, i.e. when the entry was (re)built."""
+        self._keep(key, entry)
+        if self.data_cache is None:
+            return
+        entry["version"] = uuid.uuid4().hex
+        if df is not None:
+            self.data_cache.pickle_save(df, key=self._cache_key("df", key))
+        state = dict(
+            reference_trace=entry["reference_trace"],
+            kwargs={
+                k: v.tolist() if isinstance(v, np.ndarray) else v
+                for k, v in entry["kwargs"].items()
+            },
+            x_range=entry["x_range"],
+        )
+        self.data_cache.pickle_save(state, key=self._cache_key("state", key))
+        # Saved last, so other processes only reload a complete entry
+        self.data_cache.pickle_save(entry["version"], key=self._cache_key("version", key))
+
+    def _load(self, key):
+        """Entry rebuilt from the df and state _store saved to data_cache,
+        or None if they are not there. The options hold every slider value
+        sent so far, so primary_graph gives the figure last sent."""
+        try:
+            state = self.data_cache.pickle_load(self._cache_key("state", key))
+            df = self.data_cache.pickle_load(self._cache_key("df", key))
+            version = self.data_cache.pickle_load(self._cache_key("version", key))
+        except ValueError:
+            return None
+        reference_trace, kwargs = state["reference_trace"], state["kwargs"]
+        fig, layout_data = primary_graph(df, reference_trace, **kwargs)
+        entry = self._build_entry(
+            df, reference_trace, kwargs, fig.to_plotly_json(), layout_data
+        )
+        entry["version"] = version
+        if self.max_points:
+            self._set_view(entry, state["x_range"])
+            if state["x_range"] is not None:
+                self._set_x_axis(entry, state["x_range"])
+        return entry
+
+    @staticmethod
+    def _build_entry(df, reference_trace, kwargs, fig, layout_data):
+        """Everything update() needs to work out a Patch without the
+        original figure object. fig is the figure as a dict."""
+        trace_idx = [(i + 1) for i in range(len(df.columns) - 1)]
+        if kwargs.get("hide_reference_trace", False):
+            del trace_idx[df.columns.get_loc(reference_trace) - 1]
+
+        # Peak labels move with the stack of the selected trace. They are
+        # kept unstacked and without user edits, and restacked and merged
+        # again on every change, as primary_graph builds them.
+        annotations, anno_stack = None, 0
+        if kwargs.get("pk_labeling", False):
+            sel_trace = kwargs.get("pk_label_sel_trace", "default")
+            anno_stack = len(df.columns) - 1 - df.columns.get_loc(sel_trace)
+            annotations = PeakAnnotations.from_df(
+                df,
+                kwargs.get("pk_labels", []),
+                sel_trace,
+                kwargs.get("pk_label_indexes", []),
+                0,
+                pk_label_arrow=kwargs.get("pk_label_arrow", True),
+                pk_label_angle=kwargs.get("pk_label_angle", 0),
+                pk_label_line_length=kwargs.get("pk_label_line_length", 35),
+            )
+
+        y_range = fig["layout"]["yaxis"]["range"]
+        return dict(
+            # "reversed" when reverse=True, restored when the zoom is reset
+            x_autorange=fig["layout"].get("xaxis", {}).get("autorange"),
+            # Visible x range of the decimated view, None for all of it
+            x_range=None,
+            version=None,
+            reference_trace=reference_trace,
+            # Arrays are copied so later changes by the caller don't alter
+            # the options the figure was built with
+            kwargs={
+                k: v.copy() if isinstance(v, np.ndarray) else v
+                for k, v in kwargs.items()
+            },
+            fig=fig,
+            layout_data=layout_data,
+            n_traces=len(df.columns) - 1,
+            x_axis=XAxis(df.iloc[:, 0].to_numpy()),
+            Y=df.iloc[:, trace_idx].to_numpy(),
+            trace_idx=trace_idx,
+            annotations=annotations,
+            anno_stack=anno_stack,
+            # zoom only divides the top of the range
+            y_limits=(y_range[0], y_range[1] * kwargs.get("zoom_level", 1.0)),
+        )
+
+    def update(
+        self,
+        key,
+        stack_value=None,
+        zoom_level=None,
+        trace_colors=None,
+        trace_dash=None,
+        trace_width=None,
+        current_anno=None,
+    ):
+        """
+        Patch that brings the figure last sent for key up to date with the
+        given values. Arguments left as None are unchanged.
+
+        Returns:
+            dash.Patch: Empty if nothing changed. dash.no_update if there is
+            no figure for key (figure() was never called for it, or it has
+            been dropped from the cache).
+        """
+        entry = self._entry(key)
+        if entry is None:
+            return no_update
+        kwargs, fig = entry["kwargs"], entry["fig"]
+        patch = Patch()
+        changed = False
+
+        if zoom_level is not None and zoom_level != kwargs.get("zoom_level", 1.0):
+            min_y, max_y = entry["y_limits"]
+            y_range = [min_y, max_y / zoom_level]
+            patch["layout"]["yaxis"]["range"] = y_range
+            fig["layout"]["yaxis"]["range"] = y_range
+            kwargs["zoom_level"] = zoom_level
+            changed = True
+
+        annotations_changed = bool(current_anno)
+        if stack_value is not None and stack_value != kwargs.get("stack_value", 0):
+            self._patch_stack(entry, patch, stack_value)
+            annotations_changed = changed = True
+
+        styles = dict(trace_colors=trace_colors, trace_dash=trace_dash, trace_width=trace_width)
+        if any(v is not None and v != kwargs.get(k, []) for k, v in styles.items()):
+            styles = {k: kwargs.get(k, []) if v is None else v for k, v in styles.items()}
+            self._patch_styles(entry, patch, styles)
+            changed = True
+
+        if current_anno:
+            kwargs["current_anno"] = {**(kwargs.get("current_anno") or {}), **current_anno}
+            changed = True
+        if annotations_changed and entry["annotations"] is not None:
+            self._patch_annotations(entry, patch)
+
+        if changed:
+            self._store(key, entry)
+        return patch
+
+    def relayout(self, key, relayout_data):
+        """
+        Patch with the traces decimated to the visible x range, for a
+        dcc.Graph relayoutData event. Only does anything when max_points is
+        set and the event changed the x axis range (zoom, pan or autoscale).
+
+        Returns:
+            dash.Patch: Empty if there is nothing to resend. dash.no_update
+            if there is no figure for key, as for update().
+        """
+        patch = Patch()
+        if not self.max_points or not relayout_data:
+            return patch
+
+        if relayout_data.get("xaxis.autorange"):
+            x_range = None
+        elif "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+            x_range = (relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"])
+        elif "xaxis.range" in relayout_data:
+            x_range = tuple(relayout_data["xaxis.range"])
+        else:
+            return patch
+        entry = self._entry(key)
+        if entry is None:
+            return no_update
+
+        x_view, y_stacked = self._set_view(entry, x_range)
+        self._set_x_axis(entry, x_range)
+        for k in range(len(entry["trace_idx"])):
+            patch["data"][k]["x"] = x_view
+            patch["data"][k]["y"] = y_stacked[:, k]
+        self._store(key, entry)
+        return patch
+
+    @staticmethod
+    def _set_x_axis(entry, x_range):
+        """Keep the visible range with the decimated view in the cached
+        figure, so a full redraw from figure() shows the same window"""
+        xaxis = entry["fig"]["layout"].setdefault("xaxis", {})
+        if x_range is None:
+            xaxis.pop("range", None)
+            if entry["x_autorange"] is None:
+                xaxis.pop("autorange", None)
+            else:
+                xaxis["autorange"] = entry["x_autorange"]
+        else:
+            xaxis["range"] = list(x_range)
+            xaxis["autorange"] = False
+
+    def _set_view(self, entry, x_range):
+        """Decimate the traces to the x_range (everything if None) and store
+        the view in the cached figure. Returns x and the stacked y arrays."""
+        x_axis, Y = entry["x_axis"], entry["Y"]
+        x = x_axis.x
+        if x_range is not None:
+            rows = x_axis.range_slice(min(x_range), max(x_range))
+            if isinstance(rows, slice):
+                # One point beyond each edge so the lines reach the plot edges
+                rows = slice(max(rows.start - 1, 0), min(rows.stop + 1, x.size))
+            x, Y = x[rows], Y[rows]
+        x_view, Y_view = minmax_decimate(x, Y, self.max_points)
+        entry["Y_view"] = Y_view
+        entry["x_range"] = x_range
+
+        n_plotted = len(entry["trace_idx"])
+        stack_value = entry["kwargs"].get("stack_value", 0)
+        y_stacked = Y_view + stack_value * (entry["n_traces"] - 1 - np.arange(n_plotted))
+        for k in range(n_plotted):
+            entry["fig"]["data"][k]["x"] = x_view
+            entry["fig"]["data"][k]["y"] = y_stacked[:, k]
+        return x_view, y_stacked
+
+    @staticmethod
+    def _patch_stack(entry, patch, stack_value):
+        """New y arrays for every trace"""
+        kwargs, fig = entry["kwargs"], entry["fig"]
+        n_plotted = len(entry["trace_idx"])
+        offsets = stack_value * (entry["n_traces"] - 1 - np.arange(n_plotted))
+        y_stacked = entry.get("Y_view", entry["Y"]) + offsets
+        for k in range(n_plotted):
+            patch["data"][k]["y"] = y_stacked[:, k]
+            fig["data"][k]["y"] = y_stacked[:, k]
+
+        kwargs["stack_value"] = stack_value
+
+    @staticmethod
+    def _patch_styles(entry, patch, styles):
+        """Line color, dash and width of the traces whose style changed"""
+        kwargs, fig = entry["kwargs"], entry["fig"]
+        colors, dashes, widths = trace_styles(entry["n_traces"], **styles)
+        for k, col_idx in enumerate(entry["trace_idx"]):
+            line = fig["data"][k]["line"]
+            new_line = dict(
+                color=colors[col_idx - 1],
+                dash=dashes[col_idx - 1],
+                width=widths[col_idx - 1],
+            )
+            for attr, value in new_line.items():
+                if line.get(attr) != value:
+                    line[attr] = value
+                    patch["data"][k]["line"][attr] = value
+        kwargs.update(styles)
+
+    @staticmethod
+    def _patch_annotations(entry, patch):
+        """Rebuild the peak labels for the current stack_value and
+        current_anno as primary_graph does, and patch the attributes that
+        changed. layout_data is rebuilt with them."""
+        kwargs, fig = entry["kwargs"], entry["fig"]
+        annotations = copy.deepcopy(entry["annotations"])
+        annotations.columns["y"] = (
+            annotations.columns["y"] + kwargs.get("stack_value", 0) * entry["anno_stack"]
+        )
+        current_anno = kwargs.get("current_anno")
+        if current_anno:
+            annotations.merge(current_anno)
+
+        fig_annotations = fig["layout"].get("annotations", [])
+        for i, anno in enumerate(annotations.to_plotly()):
+            for attr in PeakAnnotations.attrs:
+                if fig_annotations[i].get(attr) != anno[attr]:
+                    fig_annotations[i][attr] = anno[attr]
+                    patch["layout"]["annotations"][i][attr] = anno[attr]
+        entry["layout_data"] = annotations.layout_data() if current_anno else {}
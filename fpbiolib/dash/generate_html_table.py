@@ -1,25 +1,105 @@
-from dash import html
+import math
 
+import numpy as np
+import pandas as pd
+from dash import dash_table, html
 
-def generate_table(dataframe, max_rows=26):
-    """Create a HTML table. Important:  Will fail if all
-    dataframe elements are not converted to string elements."""
+
+def format_columns(dataframe, float_format=None, na_rep=""):
+    """Convert every column to strings, one vectorized step per column.
+    float_format is a printf style format for float columns (e.g. "%.4g"),
+    by default floats are written as str() would. Missing values become
+    na_rep."""
+    formatted = {}
+    for col in dataframe.columns:
+        values = dataframe[col]
+        missing = values.isna().to_numpy()
+        if float_format and pd.api.types.is_float_dtype(values):
+            text = np.char.mod(float_format, values.to_numpy(dtype=float)).astype(object)
+        else:
+            text = values.astype(str).to_numpy(dtype=object)
+        text[missing] = na_rep
+        formatted[col] = text
+    return pd.DataFrame(formatted, index=dataframe.index, columns=dataframe.columns)
+
+
+def generate_table(dataframe, max_rows=26, float_format=None):
+    """Create a HTML table of the first max_rows rows. Cells are converted
+    to strings column by column (see format_columns), so the dataframe
+    doesn't need to be converted beforehand. Use paged_table for large
+    tables."""
+    rows = format_columns(dataframe.head(max_rows), float_format).to_numpy()
     return html.Table(
         # Header
         [html.Thead(html.Tr([html.Th(col) for col in dataframe.columns]))] +
         # Body
         [
             html.Tbody(
-                [
-                    html.Tr(
-                        [
-                            html.Td(dataframe.iloc[i][col])
-                            for col in dataframe.columns
-                        ]
-                    )
-                    for i in range(min(len(dataframe), max_rows))
-                ]
+                [html.Tr([html.Td(cell) for cell in row]) for row in rows.tolist()]
             )
         ],
         className="norbi-table",
     )
+
+
+def table_page(dataframe, page_current=0, page_size=25, sort_by=None, float_format=None):
+    """
+    Rows of one page of a paged_table, as DataTable records. Only the rows
+    on the page are formatted.
+
+    Parameters:
+        dataframe (pandas.DataFrame): The full table.
+        page_current (int): Page number, from the DataTable page_current.
+        page_size (int): Rows per page.
+        sort_by (list, optional): DataTable sort_by, e.g.
+            [{"column_id": "area", "direction": "desc"}].
+        float_format (str, optional): printf style format for float columns.
+    """
+    if sort_by:
+        # DataTable column ids are str(label), see paged_table
+        labels = {str(c): c for c in dataframe.columns}
+        dataframe = dataframe.sort_values(
+            [labels[s["column_id"]] for s in sort_by],
+            ascending=[s["direction"] == "asc" for s in sort_by],
+            kind="stable",
+        )
+    page_current = page_current or 0
+    start = page_current * page_size
+    page = dataframe.iloc[start : start + page_size]
+    page = format_columns(page, float_format)
+    page.columns = [str(c) for c in page.columns]
+    return page.to_dict("records")
+
+
+def paged_table(dataframe, id, page_size=25, float_format=None, **datatable_kwargs):
+    """
+    dash_table.DataTable that gets its rows from the server one page at a
+    time (page_action and sort_action "custom"), so only page_size rows are
+    ever sent to (and rendered by) the browser. The table is created with its
+    first page; later pages come from a callback using table_page:
+
+        @callback(
+            Output("fit-table", "data"),
+            Input("fit-table", "page_current"),
+            Input("fit-table", "page_size"),
+            Input("fit-table", "sort_by"),
+        )
+        def fit_table_page(page_current, page_size, sort_by):
+            return table_page(load_fit_results(), page_current, page_size, sort_by)
+
+    datatable_kwargs are passed on to DataTable (e.g. style_table).
+    """
+    datatable_kwargs.setdefault("style_table", {"overflowX": "auto"})
+    return dash_table.DataTable(
+        id=id,
+        columns=[{"name": str(c), "id": str(c)} for c in dataframe.columns],
+        data=table_page(dataframe, 0, page_size, float_format=float_format),
+        page_current=0,
+        page_size=page_size,
+        page_count=max(math.ceil(len(dataframe) / page_size), 1),
+        page_action="custom",
+        sort_action="custom",
+        sort_mode="multi",
+        sort_by=[],
+        **datatable_kwargs,
+    )
@@ -0,0 +1,90 @@
+"""
+Slider mark generation shared by sliders.py and aio_sliders.py.
+
+Marks only depend on the slider range and the notation, so they are built
+once per (min, max, notation) and reused by every slider instance (and every
+layout call) with the same settings. A fresh dict is returned each time so
+callers can't change the cached marks.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from fpbiolib import dec_notation, interval_range, sci_notation
+
+
+def sci_num_format(
+    num: float,
+    sci_sig_figs: int = 3,
+    sci_note_upper: float = 10000,
+    sci_note_lower: float = 0.01,
+    e_notation: bool = True,
+    cap_e: bool = False,
+) -> str:
+    """Formats numbers above and below a specified
+    limit to a string in scientific or decimal notation.
+    """
+    if num == 0:
+        return "0"
+    elif abs(num) >= sci_note_upper or abs(num) < sci_note_lower:
+        return sci_notation(
+            num, sci_sig_figs, e_notation=e_notation, cap_e=cap_e
+        )
+    else:
+        return dec_notation(num, sci_note_upper).rstrip("0").rstrip(".")
+
+
+@lru_cache(maxsize=512)
+def _linear_slider_marks(x_min, x_max, e_notation, cap_e):
+    intervals = interval_range(x_min, x_max)
+    marks = {
+        i: sci_num_format(
+            i, sci_note_lower=0.001, e_notation=e_notation, cap_e=cap_e
+        )
+        for i in intervals
+    }
+    return tuple(
+        (int(k) if k.is_integer() else k, v) for k, v in marks.items()
+    )
+
+
+def linear_slider_marks(x_min, x_max, e_notation=True, cap_e=False) -> dict:
+    """Generate linearly spaced slider value
+    dictionary for generating slider marks.
+    Returns a new dict on every call, so it is safe to modify.
+    """
+    return dict(_linear_slider_marks(x_min, x_max, e_notation, cap_e))
+
+
+@lru_cache(maxsize=512)
+def _log_slider_marks(log_intervals, base, round_to_ord_mag, e_notation, cap_e):
+    # Back to float64 values, so base**k is computed as before
+    log_intervals = np.asarray(log_intervals, dtype=float)
+    if round_to_ord_mag:
+        # Convert the intervals to sorted, unique list of integers
+        log_intervals = np.unique(np.rint(log_intervals))
+        # for some reason, mark values that are -2, -1, 1, 2, etc must be explicitely converted to integers to display in the slider
+        marks = {
+            int(
+                k
+            ): f"{sci_num_format(base**k, sci_sig_figs=0, sci_note_upper=10000, sci_note_lower=0.001, e_notation=e_notation, cap_e=cap_e)}"
+            for k in log_intervals
+        }
+
+    else:
+        marks = {(i): f"{base**i:#.3g}" for i in log_intervals[1:]}
+        marks = {int(k) if k.is_integer() else k: v for k, v in marks.items()}
+    return tuple(marks.items())
+
+
+def log_slider_marks(
+    log_intervals, base=10, round_to_ord_mag=True, e_notation=True, cap_e=False
+) -> dict:
+    """Generate log spaced slider value
+    dictionary for generating slider marks.
+    Returns a new dict on every call, so it is safe to modify.
+    """
+    key = tuple(np.asarray(log_intervals, dtype=float).tolist())
+    return dict(
+        _log_slider_marks(key, base, round_to_ord_mag, e_notation, cap_e)
+    )
@@ -3,7 +3,6 @@ import re
 import uuid
 
 import dash_bootstrap_components as dbc
-import numpy as np
 from dash import (
     MATCH,
     Dash,
@@ -23,13 +22,12 @@ clientside_callback
 # from dash_fpbio_components.ids import ids
 
 from fpbiolib import (
-    dec_notation,
-    interval_range,
     process_str_list,
-    sci_notation,
     str_px_width,
 )
 
+from .slider_marks import linear_slider_marks, log_slider_marks, sci_num_format
+
 
 def dfc_dbc_label(label: str):
     """Takes in an optional label string and
@@ -49,64 +47,6 @@ def dfc_dbc_label(label: str):
     return label_div
 
 
-def sci_num_format(
-    num: float,
-    sci_sig_figs: int = 3,
-    sci_note_upper: float = 10000,
-    sci_note_lower: float = 0.01,
-    e_notation: bool = True,
-    cap_e: bool = False,
-) -> str:
-    """Formats numbers above and below a specified
-    limit to a string in scientific or decimal notation.
-    """
-    if num == 0:
-        return "0"
-    elif abs(num) >= sci_note_upper or abs(num) < sci_note_lower:
-        return sci_notation(
-            num, sci_sig_figs, e_notation=e_notation, cap_e=cap_e
-        )
-    else:
-        return dec_notation(num, sci_note_upper).rstrip("0").rstrip(".")
-
-
-def linear_slider_marks(x_min, x_max, e_notation=True, cap_e=False) -> dict:
-    """Generate linearly spaced slider value
-    dictionary for generating slider marks.
-    """
-    intervals = interval_range(x_min, x_max)
-    marks = {
-        i: sci_num_format(
-            i, sci_note_lower=0.001, e_notation=e_notation, cap_e=cap_e
-        )
-        for i in intervals
-    }
-    return {int(k) if k.is_integer() else k: v for k, v in marks.items()}
-
-
-def log_slider_marks(
-    log_intervals, base=10, round_to_ord_mag=True, e_notation=True, cap_e=False
-) -> dict:
-    """Generate log spaced slider value
-    dictionary for generating slider marks.
-    """
-    if round_to_ord_mag:
-        # Convert the intervals to sorted, unique list of integers
-        log_intervals = np.unique(np.rint(log_intervals))
-        # for some reason, mark values that are -2, -1, 1, 2, etc must be explicitely converted to integers to display in the slider
-        marks = {
-            int(
-                k
-            ): f"{sci_num_format(base**k, sci_sig_figs=0, sci_note_upper=10000, sci_note_lower=0.001, e_notation=e_notation, cap_e=cap_e)}"
-            for k in log_intervals
-        }
-
-    else:
-        marks = {(i): f"{base**i:#.3g}" for i in log_intervals[1:]}
-        marks = {int(k) if k.is_integer() else k: v for k, v in marks.items()}
-    return marks
-
-
 # FLOAT_SLIDER FUNCTIONS
 def float_slider_layout(
     id="f-s",
@@ -0,0 +1,161 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from .array_transforms import y_at_x_values
+from .df_cleanup import fix_dups
+
+
+class DatasetRegistry:
+    """
+    Append-only store of uploaded traces with a lazily computed common x-axis.
+
+    An alternative to repeatedly calling combine_uploaded_dfs. Each upload's
+    native x and y arrays are stored once (the x array is shared by all
+    traces of an x, many-y upload). The common grid follows the same rules
+    as many_x_y_to_x_many_y and is only worked out when the combined frame is
+    requested. Every trace is resampled from its native arrays at most once
+    per grid, so appending an upload whose x range and length fit in the
+    current grid only interpolates the new traces. When an upload extends
+    the grid's range or length, the spacing of every grid point changes, so
+    everything is resampled again from the native arrays (never from
+    previously interpolated data). Keeping the old samples and padding them
+    would give a different frame from many_x_y_to_x_many_y.
+
+    Example:
+        registry = DatasetRegistry()
+        registry.append(first_df)
+        registry.append(second_df)
+        df = registry.to_df()
+    """
+
+    def __init__(self, cap=False, new_x=False):
+        """
+        Parameters:
+            cap (bool): Limit the common grid to 5000 points.
+            new_x (bool): Round the grid end points to nice numbers for
+                plotly tools.
+        """
+        self.cap = cap
+        self.new_x = new_x
+        self.names = []
+        # (x, names, Y) native arrays, one entry per shared x-axis of an upload
+        self.uploads = []
+        self._x_min = np.inf
+        self._x_max = -np.inf
+        self._num_rows = 0
+        self._grid = None
+        self._grid_key = None
+        self._grid32 = None  # x_data column of to_df
+        self._resampled = {}  # name: float32 trace on self._grid
+
+    def __len__(self):
+        return len(self.names)
+
+    def append(self, df, many_x=False):
+        """
+        Add the traces of an uploaded DataFrame.
+
+        Parameters:
+            df (pandas.DataFrame): x, many-y layout (x in the first column),
+                or many-x-y layout (x, y, x, y, ...) when many_x is True.
+            many_x (bool): df is in many-x-y layout.
+
+        Returns:
+            list: The names the new traces were registered under. Names that
+            clash with existing traces get a ".1", ".2", ... suffix, as in
+            rename_dup_cols_in_two_dfs.
+        """
+        if many_x:
+            groups = [
+                (df.iloc[:, j], [(df.columns[j + 1], df.iloc[:, j + 1])])
+                for j in range(0, len(df.columns) - 1, 2)
+            ]
+        else:
+            y_cols = [(df.columns[k], df.iloc[:, k]) for k in range(1, len(df.columns))]
+            groups = [(df.iloc[:, 0], y_cols)]
+
+        pairs = []
+        for x_col, y_cols in groups:
+            x = np.asarray(x_col.dropna())
+            if x.dtype == object:
+                continue
+            for name, y_col in y_cols:
+                y = np.asarray(y_col.dropna())
+                if y.dtype != object:
+                    pairs.append((str(name), x, y))
+
+        # "x_data" is reserved for the x column of the combined frame
+        all_names = fix_dups(
+            ["x_data"] + self.names + [name for name, _, _ in pairs],
+            sep=".",
+            start=0,
+            update_first=False,
+        )
+        new_names = all_names[len(self.names) + 1 :]
+        self.names.extend(new_names)
+
+        # Traces that share an x array (and length) are stored, and later
+        # interpolated, together
+        entries = {}
+        for name, (_, x, y) in zip(new_names, pairs):
+            # If the x, y pairs are differing lengths for some reason, handle it by truncating
+            min_size = min(x.size, y.size)
+            key = (id(x), min_size)
+            if key not in entries:
+                entries[key] = (x[:min_size].astype(float), [], [])
+            entries[key][1].append(name)
+            entries[key][2].append(y[:min_size].astype(float))
+        for x, names, ys in entries.values():
+            self.uploads.append((x, names, np.column_stack(ys)))
+            self._x_min = min(self._x_min, x.min())
+            self._x_max = max(self._x_max, x.max())
+            self._num_rows = max(self._num_rows, x.size)
+        return new_names
+
+    @property
+    def x_grid(self):
+        """Common x-axis, following many_x_y_to_x_many_y. Only recomputed
+        when an upload has changed the x range or length."""
+        if not self.uploads:
+            return np.array([])
+        x_min, x_max, num_rows = self._x_min, self._x_max, self._num_rows
+        if self.new_x:
+            x_min = math.ceil(x_min * 100) / 100
+            x_max = math.floor(x_max * 100) / 100
+        if num_rows > 5000 and self.cap is True:
+            num_rows = 5000
+
+        grid_key = (x_min, x_max, num_rows)
+        if grid_key != self._grid_key:
+            # The grid changed, traces get resampled from their native arrays
+            self._grid = np.linspace(x_min, x_max, num_rows)
+            self._grid_key = grid_key
+            self._grid32 = self._grid.astype(np.float32)
+            self._resampled = {}
+        return self._grid
+
+    def to_df(self):
+        """
+        Combined x, many-y DataFrame on the common grid. Only traces that
+        haven't been resampled onto the current grid yet are interpolated,
+        one batch per upload.
+
+        The columns are the registry's own float32 arrays, wrapped without
+        copying them (the frame keeps one block per column rather than
+        consolidating them into a new 2-D block). Values changed in place
+        are therefore seen by the registry as well, replace columns
+        (df[col] = ...) or copy the frame to modify it.
+        """
+        grid = self.x_grid
+        for x, names, Y in self.uploads:
+            if names[0] not in self._resampled:
+                Y_new = y_at_x_values(x, Y, grid).astype(np.float32)
+                self._resampled.update(zip(names, Y_new.T))
+
+        if not self.uploads:
+            return pd.DataFrame({"x_data": grid.astype(np.float32)})
+        data = {"x_data": self._grid32}
+        data.update((name, self._resampled[name]) for name in self.names)
+        return pd.DataFrame(data, copy=False)
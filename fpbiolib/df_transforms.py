@@ -1,11 +1,14 @@
 import math
 import uuid
+from functools import lru_cache
 
 import numpy as np
 import pandas as pd
-from scipy.signal import find_peaks, savgol_filter
+from scipy.signal import find_peaks, savgol_coeffs
 
-from .df_cleanup import downcast_floats_and_ints, rename_dup_cols_in_two_dfs
+from . import dataset_registry, normalize
+from .array_transforms import XAxis, y_at_x_values
+from .df_cleanup import downcast_floats_and_ints
 
 
 def find_idxs_of_str_in_dataframe(df: pd.DataFrame, search_str: str):
@@ -22,47 +25,50 @@ def promote_first_row_to_header(df):
     return df.reset_index(drop=True)
 
 
-def idx_val(df, val):
+def idx_val(df, val, x_axis=None):
     """
     In an x, mult-y dataframe, returns the index for the
     column 0 value closest to the value passed.
+    Pass an XAxis built once from df.iloc[:, 0] to reuse its
+    monotonic check across many queries.
     """
-    return df.iloc[:, 0].sub(val).abs().idxmin()
+    if x_axis is None:
+        x_axis = XAxis(df.iloc[:, 0])
+    return df.index[x_axis.nearest_idx(val)]
 
 
-def y_in_df_x_range(df, sel_trace, min_x, max_x):
+def y_in_df_x_range(df, sel_trace, min_x, max_x, x_axis=None):
     """Truncate a dataframe's x (index 0) and
     y (specified column name) values and return
-    y array"""
-    x = df[df.columns[0]]
-    y = df[sel_trace]
-    y_trunc = y[(x >= min_x) & (x <= max_x)].values
-    return y_trunc
+    y array (a view when x is monotonic)"""
+    if x_axis is None:
+        x_axis = XAxis(df.iloc[:, 0])
+    return df[sel_trace].to_numpy()[x_axis.range_slice(min_x, max_x)]
 
 
-def x_y_in_df_x_range(df: pd.DataFrame, sel_trace: str, min_x: float, max_x: float):
+def x_y_in_df_x_range(
+    df: pd.DataFrame, sel_trace: str, min_x: float, max_x: float, x_axis=None
+):
     """Truncate a dataframe's x (index 0) and
     y (specified column name) values and return
-    x and y arrays"""
-    x = df[df.columns[0]]
-    y = df[sel_trace]
-    x_trunc = x[(x >= min_x) & (x <= max_x)].values
-    y_trunc = y[(x >= min_x) & (x <= max_x)].values
-    return x_trunc, y_trunc
+    x and y arrays (views when x is monotonic)"""
+    if x_axis is None:
+        x_axis = XAxis(df.iloc[:, 0])
+    in_range = x_axis.range_slice(min_x, max_x)
+    return df.iloc[:, 0].to_numpy()[in_range], df[sel_trace].to_numpy()[in_range]
 
 
 def log_df(df):
     """Convert x, y arrays in df to log arrays"""
-    log_df = pd.DataFrame()
-    for column in df.columns[1:]:
-        # Can't take the log of zero or a negative number (one limitation
-        # of this methodology.  Therefore baseline correct to minimum value.
-        y = df[column].values
-        y_cor = y - y.min()
-        # To avoid -inf values in the array, replace with zeros
-        # Still get a divide by zero warning, but it works...
-        log_df[column] = np.where(y_cor > 0, np.log10(y_cor), 0)
-
+    # Can't take the log of zero or a negative number (one limitation
+    # of this methodology.  Therefore baseline correct to minimum value.
+    Y = df.iloc[:, 1:].to_numpy(dtype=float)
+    Y_cor = Y - Y.min(axis=0)
+    # To avoid -inf values in the array, replace with zeros
+    with np.errstate(divide="ignore"):
+        log_Y = np.where(Y_cor > 0, np.log10(Y_cor), 0)
+
+    log_df = pd.DataFrame(log_Y, columns=df.columns[1:])
     log_df.insert(0, df.columns[0], np.log10(df.iloc[:, 0].values))
     return log_df
 
@@ -104,35 +110,11 @@ def x_many_y_interpolate(df, cap=True):
     else:
         x_new = np.linspace(new_x_start, new_x_end, num_rows)
 
-    # Create new dataframe to eventually hold interpolated y data
-    proc_df = pd.DataFrame(x_new, columns=["x_data"])
-
-    j = 0
-    col_list = df.columns
+    # Every y column shares the x column
     x = np.asarray(df.iloc[:, 0].dropna())
+    pairs = [(col, x, np.asarray(df[col].dropna())) for col in df.columns[1:]]
 
-    for i in range(int(len(col_list) - 1)):
-        # Loop through y-columns and replace with interpolated values based on x_new
-        y = np.asarray(df[col_list[j + 1]].dropna())
-
-        if y.dtype != object:
-            # If the x, y pairs are differing lengths for some reason, handle it by truncating
-            min_size = min(x.size, y.size)
-            x = x[:min_size]
-            y = y[:min_size]
-
-            y_new = np.interp(
-                x_new, x, y
-            )  # create new y data by interpolation of x, y to x_new range
-
-            # add to temporary df
-            y_series = pd.Series(y_new, name=col_list[j + 1])
-
-            proc_df = pd.concat([proc_df, y_series], axis=1)
-
-        j += 1
-
-    return downcast_floats_and_ints(proc_df)
+    return _interp_pairs_to_df(pairs, x_new)
 
 
 def many_x_y_to_x_many_y(df, cap=True, new_x=True, num_rows=None, x_data=[]):
@@ -174,34 +156,49 @@ def many_x_y_to_x_many_y(df, cap=True, new_x=True, num_rows=None, x_data=[]):
         new_x_start = x_array.min()
         new_x_end = x_array.max()
 
-    # Create new dataframe to eventually hold interpolated y data
-    proc_df = pd.DataFrame(x_new, columns=["x_data"])
+    # x columns are 0, 2, 4, ... and y columns are 1, 3, 5, ...
+    pairs = [
+        (
+            df.columns[j + 1],
+            np.asarray(df.iloc[:, j].dropna()),
+            np.asarray(df.iloc[:, j + 1].dropna()),
+        )
+        for j in range(0, len(df.columns) - 1, 2)
+    ]
 
-    j = 0
-    col_list = df.columns
-    for i in range(int(len(col_list) / 2)):
-        # Loop through x-columns 0, 2, 4, ... and replace each with a common spacing
-        x = np.asarray(df[col_list[j]].dropna())
-        # Loop through y-columns 1, 3, 5, ... and replace with interpolated values based on x_new
-        y = np.asarray(df[col_list[j + 1]].dropna())
+    return _interp_pairs_to_df(pairs, x_new)
+
+
+def _interp_pairs_to_df(pairs, x_new):
+    """
+    Interpolate (name, x, y) pairs onto x_new and build the x, many-y
+    DataFrame in one go.
 
+    Values are written into a preallocated float32 matrix, and pairs that
+    share the same x-axis are interpolated together in one batch rather than
+    one np.interp call per trace. Pairs with non-numeric x or y are dropped.
+    """
+    # If the x, y pairs are differing lengths for some reason, handle it by truncating
+    valid = []
+    for name, x, y in pairs:
         if (y.dtype != object) and (x.dtype != object):
-            # If the x, y pairs are differing lengths for some reason, handle it by truncating
             min_size = min(x.size, y.size)
-            x = x[:min_size]
-            y = y[:min_size]
+            valid.append((name, x[:min_size], y[:min_size]))
 
-            y_new = np.interp(
-                x_new, x, y
-            )  # create new y data by interpolation of x, y to x_new range
+    matrix = np.empty((len(x_new), len(valid) + 1), dtype=np.float32)
+    matrix[:, 0] = x_new
 
-            # add to temporary df
-            y_series = pd.Series(y_new, name=col_list[j + 1])
+    # Group the traces by x-axis so each group is one batched interpolation
+    groups = {}
+    for k, (_, x, _) in enumerate(valid):
+        x = np.asarray(x, dtype=float)
+        groups.setdefault(x.tobytes(), (x, []))[1].append(k)
 
-            proc_df = pd.concat([proc_df, y_series], axis=1)
+    for x, members in groups.values():
+        Y = np.column_stack([valid[k][2] for k in members]).astype(float)
+        matrix[:, np.asarray(members) + 1] = y_at_x_values(x, Y, x_new)
 
-        j += 2
-    return downcast_floats_and_ints(proc_df)
+    return pd.DataFrame(matrix, columns=["x_data"] + [name for name, _, _ in valid])
 
 
 def many_x_y_to_x_many_y_no_interpolate(df):
@@ -266,42 +263,83 @@ def df_trunc(df, left_cut, right_cut):
 
 
 def df_center(df, df_ctr_pks, thres, reference_trace):
-    # Find maximum peak center X, and Y values for every data column
+    """Align every y column to the reference trace by the first peak in each
+    column of df_ctr_pks with a prominence of at least thres. df is returned
+    unchanged if any column has no such peak.
+
+    The columns are stacked into one array with +inf between them and
+    searched with a single find_peaks call. The +inf separators stop each
+    prominence search at the column edges, and are dropped from the peaks
+    found, so the peaks are the same as calling find_peaks on every column.
+    """
+    x_val = df_ctr_pks.iloc[:, 0].to_numpy()
+    Y = df_ctr_pks.iloc[:, 1:].to_numpy(dtype=float)
+    n_rows, n_cols = Y.shape
+
+    stacked = np.full((n_rows + 1, n_cols), np.inf)
+    stacked[:n_rows] = Y
+    peaks, _ = find_peaks(stacked.ravel(order="F"), prominence=thres)
+    # A separator is a maximum of infinite prominence between two columns
+    peaks = peaks[peaks % (n_rows + 1) != n_rows]
+
+    # Peaks come out in order, so the first in each column is its first peak
+    cols, first = np.unique(peaks // (n_rows + 1), return_index=True)
+    if cols.size < n_cols:
+        return df
+    xctrs = x_val[peaks[first] % (n_rows + 1)]
+
+    # Shift the x-axis of the data to align to max peak of reference
+    return shift_columns(df, _x_to_row_shifts(df, xctrs, reference_trace))
 
-    x_val = df_ctr_pks.iloc[:, 0].values
-    xctrs = []
 
-    for i in range(len(df_ctr_pks.columns) - 1):
-        y_val = np.asarray(df_ctr_pks.iloc[:, (i + 1)])
+def df_center_apex(df, df_ctr_pks, reference_trace):
+    """Align every y column to the reference trace by the apex (maximum) of
+    each column in df_ctr_pks (e.g. df truncated to the peak region).
 
-        ctr_indexes, _ = find_peaks(y_val, prominence=thres)
-        if ctr_indexes.size == 0:
-            return df
-        else:
-            xctrs.append(x_val[ctr_indexes][0].tolist())
+    The apexes are found with one argmax over the whole block. Returns the
+    shifted df and the row shift vector, which can undo the alignment with
+    shift_columns(df, shifts, reverse=True) without finding the peaks again.
+    """
+    x_val = df_ctr_pks.iloc[:, 0].to_numpy()
+    apex_idx = np.argmax(df_ctr_pks.iloc[:, 1:].to_numpy(), axis=0)
+    shifts = _x_to_row_shifts(df, x_val[apex_idx], reference_trace)
+    return shift_columns(df, shifts), shifts
 
-    # print("reference trace: ", reference_trace)
-    # print("X centers: ", xctrs)
 
+def _x_to_row_shifts(df, xctrs, reference_trace):
+    """Integer rows to shift each y column so its x center lines up with
+    the reference trace's center"""
+    xctrs = np.asarray(xctrs, dtype=float)
     x_interval = df.iloc[1, 0] - df.iloc[0, 0]  # x-data interval
 
-    # Shift the x-axis of the data to align to max peak of reference
-
     # Get index of reference column in df, which will be related to the index
     # in the xctrs array by a factor of -1 (no x column in the xctrs array)
-    # then shift each y-data column by the appropriate factor
     ref_idx = df.columns.get_loc(reference_trace) - 1
+    return np.round((xctrs - xctrs[ref_idx]) / x_interval).astype(int)
 
-    # print("ref_idx: ", ref_idx)
-    for i in range(len(df.columns) - 1):
-        shft = int(
-            round((xctrs[i] - xctrs[ref_idx]) / x_interval)
-        )  # calculate the integer rows to shift data relative to 1st sample
-        df.iloc[:, (i + 1)] = df.iloc[:, (i + 1)].shift(-shft)
 
-    # Fill in ends of data after dataframe shift
-    df.ffill(axis=0, inplace=True)
-    df.bfill(axis=0, inplace=True)
+def shift_columns(df, shifts, reverse=False):
+    """Shift every y column by its integer number of rows in one step.
+
+    Equivalent to df.iloc[:, i + 1].shift(-shifts[i]) for each column followed
+    by df.ffill() and df.bfill(), but done with a single fancy-indexing gather
+    into a new array, with the indices clamped to the edges. NaNs that were
+    already in the frame are still filled from the nearest value above (then
+    below). reverse=True applies the opposite shifts, undoing a previous call
+    with the same shift vector (apart from the padded ends).
+    """
+    shifts = np.asarray(shifts, dtype=int)
+    if reverse:
+        shifts = -shifts
+    Y = df.iloc[:, 1:].to_numpy()
+    rows = np.clip(np.arange(len(Y))[:, None] + shifts[None, :], 0, len(Y) - 1)
+    df[df.columns[1:]] = np.take_along_axis(Y, rows, axis=0)
+
+    # Fill in NaNs the data already had, clamping gives the same ends as
+    # filling after the shift
+    if df.isna().to_numpy().any():
+        df.ffill(axis=0, inplace=True)
+        df.bfill(axis=0, inplace=True)
     return df
 
 
@@ -311,111 +349,144 @@ def df_center2(df, xctrs, reference_trace):
     in the xctrs array by a factor of -1 (no x column in the xctrs array)
     then shift each y-data column by the appropriate factor
     """
-    ref_col_idx = df.columns.get_loc(reference_trace) - 1
-
-    for i in range(len(df.columns) - 1):
-        shft = xctrs[i][0] - xctrs[ref_col_idx][0]  # shift data relative to ref sample
-        df.iloc[:, (i + 1)] = df.iloc[:, (i + 1)].shift(-shft)
-
-    # Fill in ends of data after dataframe shift
-    df.ffill(axis=0, inplace=True)
-    df.bfill(axis=0, inplace=True)
-    return df
+    return shift_columns(df, _idx_shifts(df, xctrs, reference_trace))
 
 
 def df_center_reverse(df, xctrs, reference_trace):
     """Undo df_center2"""
-    ref_col_idx = df.columns.get_loc(reference_trace) - 1
+    return shift_columns(df, _idx_shifts(df, xctrs, reference_trace), reverse=True)
 
-    for i in range(len(df.columns) - 1):
-        shft = xctrs[i][0] - xctrs[ref_col_idx][0]  # shift data relative to ref sample
-        df.iloc[:, (i + 1)] = df.iloc[:, (i + 1)].shift(shft)
 
-    # Fill in ends of data after dataframe shift
-    df.ffill(axis=0, inplace=True)
-    df.bfill(axis=0, inplace=True)
-    return df
+def _idx_shifts(df, xctrs, reference_trace):
+    """Row shifts relative to the reference sample, from [[index], ...] centers"""
+    ctr_idx = np.array([ctr[0] for ctr in xctrs])
+    ref_col_idx = df.columns.get_loc(reference_trace) - 1
+    return ctr_idx - ctr_idx[ref_col_idx]
 
 
 def find_deriv(df, flip, window_length=5):
     """Adds the 2nd derivative of the chosen signal to the DataFrame
     Window_length=5 is recommended from our studies"""
 
-    proteins = list(df.columns)[1:]
-    # print("Flip inside find deriv: \n", flip)
-    for i in proteins:
-        if flip:
-            # negative if want flipped
-            dd = -1 * savgol_filter(
-                df[i], deriv=2, window_length=window_length, polyorder=3
-            )
-        else:
-            dd = savgol_filter(df[i], deriv=2, window_length=window_length, polyorder=3)
-
-        df.loc[:, i] = dd
-
-    return df
+    return smooth_and_deriv(df, order=2, window_length=window_length, flip=flip)
 
 
-def smooth_and_deriv(df, order=0, window_length=5, flip=False):
-    """Smooths and adds any derivative (0-4) of the chosen signal to the DataFrame"""
+def smooth_and_deriv(df, order=0, window_length=5, flip=False, delta=1.0):
+    """Smooths and adds any derivative (0-4) of the chosen signal to the DataFrame
 
-    proteins = list(df.columns)[1:]
+    The filter is applied along axis 0 of the whole y block at once, with
+    the Savitzky-Golay coefficients from savgol_kernel. delta is the x
+    spacing, pass it to get derivatives per x unit rather than per row."""
 
-    for i in proteins:
-        if flip:
-            # negative if want flipped
-            dd = -1 * savgol_filter(
-                df[i], deriv=order, window_length=window_length, polyorder=3
-            )
-        else:
-            dd = savgol_filter(
-                df[i], deriv=order, window_length=window_length, polyorder=3
-            )
+    Y = df.iloc[:, 1:].to_numpy(dtype=float)
+    # Replace the columns whole, float32 input (many_x_y_to_x_many_y) can't
+    # hold the float64 result in place
+    df[df.columns[1:]] = _savgol_block(Y, order, window_length, flip, delta)
+    return df
 
-        df.loc[:, i] = dd
 
-    return df
+def smooth_and_derivs(df, orders=(0, 1, 2), window_length=5, flip=False, delta=1.0):
+    """Smoothed signal and several derivative orders from one extraction of
+    the y block, returned as {order: DataFrame}. Each order applies its
+    cached coefficients to the same block, and each frame is built from the
+    result rather than from a copy of df. The input df is not modified."""
+
+    Y = df.iloc[:, 1:].to_numpy(dtype=float)
+    x_col = df.iloc[:, 0]
+    derivs = {}
+    for order in orders:
+        deriv_df = pd.DataFrame(
+            _savgol_block(Y, order, window_length, flip, delta),
+            index=df.index,
+            columns=df.columns[1:],
+        )
+        deriv_df.insert(0, df.columns[0], x_col, allow_duplicates=True)
+        derivs[order] = deriv_df
+    return derivs
+
+
+@lru_cache(maxsize=64)
+def savgol_kernel(window_length, polyorder, deriv, delta):
+    """
+    Savitzky-Golay coefficients for savgol_filter(mode="interp"), worked
+    out once per (window_length, polyorder, deriv, delta).
+
+    Returns:
+        tuple: (center, left, right) read-only arrays. center (window_length,)
+        gives the interior points, left and right (window_length // 2,
+        window_length) the points whose window would run past the first and
+        last rows, from the polynomial fitted to the first and last windows.
+    """
+    coeffs = np.array(
+        [
+            savgol_coeffs(window_length, polyorder, deriv=deriv, delta=delta, pos=pos, use="dot")
+            for pos in range(window_length)
+        ]
+    )
+    # Default pos, which sits between the two middle points of an even window
+    center = savgol_coeffs(window_length, polyorder, deriv=deriv, delta=delta, use="dot")
+    half = window_length // 2
+    kernel = (center, coeffs[:half], coeffs[window_length - half :])
+    for a in kernel:
+        a.flags.writeable = False
+    return kernel
+
+
+def _savgol_block(Y, order, window_length, flip, delta=1.0, polyorder=3):
+    """Savitzky-Golay filter (polyorder 3) of every column of Y at once,
+    the same as savgol_filter(Y, ..., axis=0)"""
+    n = len(Y)
+    if window_length > n:
+        raise ValueError(
+            "window_length must be less than or equal to the number of rows"
+        )
+    center, left, right = savgol_kernel(window_length, polyorder, order, float(delta))
+    # Equal for odd windows; an even window has one more point on the right
+    half_left = (window_length - 1) // 2
+    half_right = window_length // 2
+
+    dd = np.empty_like(Y)
+    # Interior rows, one scaled shifted block per coefficient
+    interior = dd[half_left : n - half_right]
+    np.multiply(Y[: n - window_length + 1], center[0], out=interior)
+    for k in range(1, window_length):
+        interior += center[k] * Y[k : n - window_length + 1 + k]
+    # Edge rows from the polynomial fitted to the first and last windows,
+    # window_length // 2 at each end as savgol_filter(mode="interp") does
+    dd[:half_right] = left @ Y[:window_length]
+    dd[n - half_right :] = right @ Y[n - window_length :]
+
+    if flip:
+        # negative if want flipped
+        dd = -1 * dd
+    return dd
 
 
 def df_area_norm(df):
     """Normalize to area of 1 to give intuitive feel for peak area fraction"""
     df.reset_index(drop=True, inplace=True)
-
-    proteins = list(df.columns)[1:]
-
-    for i in proteins:
-        dy = np.trapz(abs(df[i]), df[df.columns[0]])
-        df[i] = df[i] / abs(
-            dy
-        )  # absolute value because decreasing x-values give negative area
-
-    return df
+    return normalize.df_area_norm(df)
 
 
 def df_min_max_norm(df):
-    # df.iloc[:, 1:] = df.iloc[:, 1:].apply(lambda x: (x-x.mean())/ x.std(), axis=0)  # This is a std way of normalizing where you simply subtract the mean and divide by standard deviation.
-    df.iloc[:, 1:] = (df.iloc[:, 1:] - df.iloc[:, 1:].min()) / (
-        df.iloc[:, 1:].max() - df.iloc[:, 1:].min()
-    )  # This is a true min max normalization
-    return df
-    return df
+    return normalize.df_min_max_norm(df)
 
 
 def combine_uploaded_dfs(prev_df, df, cap=False, new_x=False):
     """
     To enable files to be added after an initial upload, we
-    need to assimilate x-axis from each source.  This is accomplished
-    by creating a multiple x, y set for each dataframe, concatenating
-    them together, and then running the many_x_y_to_x_many_y function
-    to recombine to a common x-axis (with interpolation as necessary)
+    need to assimilate x-axis from each source. prev_df (x, many-y) and
+    df (many-x-y) are combined on a common x-axis, following the same
+    rules as many_x_y_to_x_many_y (with interpolation as necessary).
+
+    The traces are added to a dataset_registry.DatasetRegistry, which
+    interpolates each upload's traces from their own x array, without
+    expanding prev_df into many-x-y form or concatenating the frames.
+    Neither input is modified. To add files one at a time without
+    re-interpolating the previous traces on every upload, keep a
+    DatasetRegistry and append to it directly.
     """
-    prev_df = x_many_y_to_many_x_y(prev_df)
-
-    # concatenating dfs won't work if they have cols with same names
-    df1, df2 = rename_dup_cols_in_two_dfs(prev_df, df)
-    df = pd.concat([df1, df2], axis=1)
-
-    df = many_x_y_to_x_many_y(df, cap=cap, new_x=new_x)
-    df.reset_index(drop=True, inplace=True)
-    return df
+    registry = dataset_registry.DatasetRegistry(cap=cap, new_x=new_x)
+    registry.append(prev_df)
+    registry.append(df, many_x=True)
+    return registry.to_df()
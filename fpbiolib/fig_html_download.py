@@ -1,11 +1,11 @@
-import io
-from base64 import b64encode
+from .fig_serialize import iter_fig_html_base64
 
 
-def create_fig_html_download(fig):
-    buffer = io.StringIO()
-    fig.write_html(buffer)
-    html_bytes = buffer.getvalue().encode()
-    encoded = b64encode(html_bytes).decode()
+def create_fig_html_download(fig, single_precision=False):
+    """Data URI of a standalone HTML export of the figure, for an html.A
+    download link. Trace data is written as base64 typed arrays and the
+    document is base64 encoded chunk by chunk (see fig_serialize), so the
+    encoded URI is the only full-size copy that is built."""
+    encoded = "".join(iter_fig_html_base64(fig, single_precision=single_precision))
     trace_html_download_href = "data:text/html;base64," + encoded
     return trace_html_download_href
@@ -0,0 +1,212 @@
+"""
+Compact figure serialization for Dash responses, caches and HTML exports.
+
+NumPy arrays (and pandas Series) are written in the plotly.js typed array
+form, {"dtype": "f8", "bdata": "<base64>"}, rather than as JSON number
+lists. This is smaller and much cheaper to encode and parse. plotly.js
+(and so dcc.Graph) decodes it natively. Since plotly 6, go.Figure already
+encodes its arrays this way, encode_arrays covers figure dicts holding raw
+arrays and older plotly versions. single_precision=True stores float64 data
+as float32, including arrays plotly has already encoded as "f8", which
+halves the payload again and is plenty for plotting.
+
+orjson is used for the JSON encoding when it is installed, otherwise the
+standard library json module with PlotlyJSONEncoder.
+"""
+
+import base64
+import json
+import uuid
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+import plotly.utils
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# numpy dtype: plotly.js typed array dtype
+TYPED_ARRAY_DTYPES = {
+    "int8": "i1",
+    "uint8": "u1",
+    "int16": "i2",
+    "uint16": "u2",
+    "int32": "i4",
+    "uint32": "u4",
+    "float32": "f4",
+    "float64": "f8",
+}
+
+# Keys plotly.js expects as plain lists
+SKIPPED_KEYS = ("range", "geojson", "layer", "layers")
+
+
+def typed_array(a, single_precision=False):
+    """plotly.js typed array spec for a numeric array, or the array itself
+    if it has no typed array equivalent (e.g. strings or dates)"""
+    a = np.asarray(a)
+    if a.size == 0:
+        return a
+    if a.dtype.kind in "iu" and a.dtype.itemsize == 8:
+        # plotly.js has no 64 bit integers, use the smallest type that fits
+        if a.dtype.kind == "i":
+            candidates = (np.int8, np.int16, np.int32)
+        else:
+            candidates = (np.uint8, np.uint16, np.uint32)
+        for dtype in candidates:
+            info = np.iinfo(dtype)
+            if a.min() >= info.min and a.max() <= info.max:
+                a = a.astype(dtype)
+                break
+        else:
+            return a
+    elif single_precision and a.dtype == np.float64:
+        a = a.astype(np.float32)
+
+    dtype = TYPED_ARRAY_DTYPES.get(a.dtype.name)
+    if dtype is None:
+        return a
+    spec = {
+        "dtype": dtype,
+        "bdata": base64.b64encode(np.ascontiguousarray(a)).decode("ascii"),
+    }
+    if a.ndim > 1:
+        spec["shape"] = ", ".join(str(n) for n in a.shape)
+    return spec
+
+
+def _single_precision_spec(spec):
+    """Re-encode an "f8" typed array spec (e.g. from to_plotly_json) as "f4",
+    other specs are returned as they are"""
+    if spec["dtype"] != "f8" or not isinstance(spec["bdata"], (str, bytes)):
+        return spec
+    a = np.frombuffer(base64.b64decode(spec["bdata"]), dtype="<f8")
+    if "shape" in spec:
+        a = a.reshape([int(n) for n in str(spec["shape"]).split(",")])
+    return {**spec, **typed_array(a, single_precision=True)}
+
+
+def encode_arrays(obj, single_precision=False):
+    """Copy of a figure (go.Figure or figure dict) or any JSON-like value with
+    every numeric array replaced by its typed array spec"""
+    if hasattr(obj, "to_plotly_json"):
+        obj = obj.to_plotly_json()
+    if isinstance(obj, dict):
+        if "dtype" in obj and "bdata" in obj:
+            return _single_precision_spec(obj) if single_precision else obj
+        return {
+            k: v if k in SKIPPED_KEYS else encode_arrays(v, single_precision)
+            for k, v in obj.items()
+        }
+    if isinstance(obj, (list, tuple)):
+        return [encode_arrays(v, single_precision) for v in obj]
+    if isinstance(obj, (pd.Series, pd.Index)):
+        obj = obj.to_numpy()
+    if isinstance(obj, np.ndarray):
+        return typed_array(obj, single_precision)
+    return obj
+
+
+def fig_to_json_bytes(fig, single_precision=False, engine="auto"):
+    """
+    Serialize a figure (or any JSON-like value holding arrays) to UTF-8 JSON.
+
+    Parameters:
+        fig: go.Figure, figure dict or other JSON-like value.
+        single_precision (bool): Store float64 arrays as float32.
+        engine (str): "orjson", "json", or "auto" to use orjson when it is
+            installed.
+
+    Returns:
+        bytes: The JSON document.
+    """
+    obj = encode_arrays(fig, single_precision)
+    if engine == "auto":
+        engine = "json" if orjson is None else "orjson"
+
+    if engine == "orjson":
+        if orjson is None:
+            raise ImportError("orjson is not installed, use engine='json'")
+        return orjson.dumps(
+            obj,
+            default=plotly.utils.PlotlyJSONEncoder().default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    elif engine == "json":
+        return json.dumps(
+            obj, cls=plotly.utils.PlotlyJSONEncoder, separators=(",", ":")
+        ).encode("utf-8")
+    raise ValueError(f"Unknown engine {engine}, use 'orjson', 'json' or 'auto'")
+
+
+def fig_to_json(fig, single_precision=False, engine="auto"):
+    """As fig_to_json_bytes, returning a str"""
+    return fig_to_json_bytes(fig, single_precision, engine).decode("utf-8")
+
+
+def fig_from_json(data):
+    """Figure dict from fig_to_json(_bytes) output. Typed arrays are left
+    encoded, dcc.Graph and plotly.js read them as they are."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def iter_fig_html(fig, chunk_size=1 << 20, single_precision=False, **html_kwargs):
+    """
+    Standalone HTML export of a figure, yielded as chunks of chunk_size
+    bytes (the last one may be shorter), e.g. for a streamed flask.Response
+    or to write to a file.
+
+    The page around the plot is rendered by plotly.io.to_html with an empty
+    trace list, and the traces are then serialized and yielded one at a
+    time in its place. Only one trace's JSON is held in memory at once,
+    never the whole document. Chunks are cut at byte boundaries, join them
+    before decoding.
+
+    html_kwargs are passed to plotly.io.to_html (e.g. include_plotlyjs="cdn").
+    """
+    if hasattr(fig, "to_plotly_json"):
+        fig = fig.to_plotly_json()
+    html_kwargs.setdefault("validate", False)
+    div_id = html_kwargs.setdefault("div_id", str(uuid.uuid4()))
+
+    shell = {k: v for k, v in fig.items() if k != "data"}
+    shell["data"] = []
+    page = pio.to_html(encode_arrays(shell, single_precision), **html_kwargs)
+    # The trace list is the argument after the div id in Plotly.newPlot
+    new_plot = page.index("Plotly.newPlot(")
+    data_pos = page.index("[]", page.index(f'"{div_id}"', new_plot))
+
+    def pieces():
+        yield page[:data_pos] + "["
+        for i, trace in enumerate(fig.get("data", [])):
+            trace_json = pio.json.to_json_plotly(encode_arrays(trace, single_precision))
+            yield "," + trace_json if i else trace_json
+        yield "]" + page[data_pos + 2 :]
+
+    buffer = bytearray()
+    for piece in pieces():
+        buffer += piece.encode("utf-8")
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+def iter_fig_html_base64(fig, chunk_size=1 << 20, single_precision=False, **html_kwargs):
+    """As iter_fig_html, with every chunk base64 encoded. Chunks are re-cut to
+    multiples of 3 bytes so that the encoded chunks can simply be joined."""
+    carry = b""
+    for chunk in iter_fig_html(fig, chunk_size, single_precision, **html_kwargs):
+        chunk = carry + chunk
+        cut = len(chunk) - len(chunk) % 3
+        carry = chunk[cut:]
+        if cut:
+            yield base64.b64encode(chunk[:cut]).decode("ascii")
+    if carry:
+        yield base64.b64encode(carry).decode("ascii")
@@ -1,5 +1,6 @@
 import math
 import re
+from functools import lru_cache
 
 
 # function to convert to superscript
@@ -139,13 +140,46 @@ font_widths = {
 }
 
 
+# Width used for characters missing from a font's table
+fallback_char_widths = {
+    "open_sans_12pt_px": 8,
+}
+
+
+@lru_cache(maxsize=None)
+def _font_width_table(font):
+    """font_widths[font] and the width used for characters missing from it
+    (fallback_char_widths, or the average width of the font's characters)"""
+    char_widths = font_widths.get(font)
+    if char_widths is None:
+        raise ValueError(f"Unknown font {font}, add it to font_widths")
+    fallback = fallback_char_widths.get(
+        font, sum(char_widths.values()) / len(char_widths)
+    )
+    return char_widths, fallback
+
+
+@lru_cache(maxsize=4096)
+def text_px_width(text, font="open_sans_12pt_px"):
+    """Total px width of the characters in text. Characters missing from
+    font_widths count as the font's fallback width."""
+    char_widths, fallback = _font_width_table(font)
+    return sum(char_widths.get(c, fallback) for c in str(text))
+
+
 def str_px_width(text: str, font="open_sans_12pt_px"):
     """Determine total px width of text
     - requires a font_widths dictionary of
     characters and px widths.
     """
-    char_widths = font_widths.get(font)
-    px_width = sum(char_widths.get(c) for c in str(text))
+    px_width = text_px_width(str(text), font)
     if px_width <= 11:
         px_width = 11
     return f"{str(px_width)}px"
+
+
+def str_px_widths(texts, font="open_sans_12pt_px"):
+    """str_px_width of many strings, each distinct string is only measured
+    once"""
+    widths = {text: str_px_width(text, font) for text in set(map(str, texts))}
+    return [widths[str(text)] for text in texts]
@@ -1,7 +1,13 @@
-from .ftir_band_assignments import yang_h20_2015, yang_h20_2015_w_side_chains
+from .ftir_band_assignments import (
+    secondary_structure,
+    yang_h20_2015,
+    yang_h20_2015_w_side_chains,
+)
+from .array_transforms import y_at_x_values
 import numpy as np
 import pandas as pd
 import math
+from concurrent.futures import ProcessPoolExecutor
 from scipy import optimize
 
 def interpolate_dataframe(df):
@@ -40,8 +46,9 @@ def interpolate_dataframe(df):
 def guess_heights(df, col, center_list, gain=0.95):
     """Determines guesses for the heights based on measured data.
 
-    Function creates an integer mapping to the measured frequencies, and then
-    creates an initial peak height guess of gain*actual height at x=freq*. A
+    Function looks up the measured absorbance at each center (linear
+    interpolation between the neighbouring x values), and then creates an
+    initial peak height guess of gain*actual height at x=freq*. A
     Default of 0.95 seems to work best for most spectra, but can be change to
     improve convergence.
 
@@ -65,17 +72,11 @@ def guess_heights(df, col, center_list, gain=0.95):
         by default, all initial peak guesses are 95% of the peak max.
 
     """
-    heights = []
-    freq_map = {}
-    # print("df cols inside guess_heights: ", df.columns)
-    df = interpolate_dataframe(df.copy())
-    for i in df.iloc[:, 0]:
-        j = math.floor(i)
-        freq_map[j] = float(df[col].get(df.iloc[:, 0] == i).item())
-    for i in center_list:
-        height = freq_map[i]
-        heights.append(gain * height)
-    return heights
+    heights = gain * y_at_x_values(
+        df.iloc[:, 0].to_numpy(), df[col].to_numpy(), center_list
+    )
+    return heights.tolist()
+
 
 def gaussian_least_squares(df, col, peaks=yang_h20_2015, peak_width=5, params=dict()):
     """
@@ -103,14 +104,26 @@ def gaussian_least_squares(df, col, peaks=yang_h20_2015, peak_width=5, params=di
     """
     if not col:
         col = df.columns[1]
+    # Work on a copy so the optimizer settings don't leak between calls
+    # through the shared default dict
+    params = dict(params)
     # print("col: ", col)
     def fun(p, x, y):
         """
         Define the objective function for the least-squares optimization.
         This function calculates the difference between the sum of Gaussians (model)
         and the observed data for given parameters 'p' over x-values 'x' and y-data 'y'.
+        All peaks are evaluated in a single broadcast by gaussian_peaks.
         """
-        return gaussian_sum(x, *p) - y
+        return gaussian_peaks(x, p).sum(axis=0) - y
+
+    def jac(p, x, y):
+        """
+        Analytic Jacobian of 'fun' with respect to 'p', which spares
+        least_squares the 3 x n_peaks extra model evaluations per iteration
+        needed for a finite-difference estimate.
+        """
+        return gaussian_jacobian(x, p)
 
     # Concatenate the first column (assumed to be x-data) and the specified y-data column,
     # then convert to a NumPy array. The resulting array 'data' has two columns: x and y.
@@ -120,7 +133,7 @@ def gaussian_least_squares(df, col, peaks=yang_h20_2015, peak_width=5, params=di
     # 'peaks["means"]' provides the expected centers of the peaks.
     # print("data: ", data)
     # print("df.head")
-    heights = guess_heights(df.copy(), col, peaks["means"], gain=1.0)
+    heights = guess_heights(df, col, peaks["means"], gain=1.0)
     # Initialize lists for lower bounds (lb), upper bounds (ub), and the initial guess (guess)
     # for the optimization. Each Gaussian peak is modeled with three parameters:
     # [height, center (mean), width].
@@ -163,6 +176,7 @@ def gaussian_least_squares(df, col, peaks=yang_h20_2015, peak_width=5, params=di
     # - 'bounds': a tuple of lower and upper bounds for the parameters.
     params["args"] = (data[:, 0], data[:, 1])
     params["bounds"] = (np.array(lb), np.array(ub))
+    params.setdefault("jac", jac)
 
     # Run the least-squares optimization to fit the sum of Gaussians to the data.
     # The optimizer adjusts the parameters in 'guess' within the specified 'bounds'
@@ -191,6 +205,124 @@ def gaussian_least_squares(df, col, peaks=yang_h20_2015, peak_width=5, params=di
     # - 'res': the full result object from the least-squares optimization.
     return areas, res
 
+def fit_secondary_structure_batch(
+    df, peaks=yang_h20_2015, peak_width=5, n_jobs=None, params=dict()
+):
+    """
+    Fit the gaussian band model to every y-column of an x, many-y DataFrame
+    and return the per-sample band parameters and secondary structure.
+
+    The x-grid, band bounds and height guesses are computed once for the whole
+    set. The median spectrum is fit first (cold start) and its solution is used
+    as a robust consensus warm start for every sample, so each individual fit
+    only has to refine a nearby solution. Sample fits are spread across a
+    process pool.
+
+    Parameters:
+        df (pandas.DataFrame): x data in the first column, one spectrum per
+            remaining column.
+        peaks (dict, optional): Peak definition with "means", "uncertainties"
+            and "assignments". Default is yang_h20_2015.
+        peak_width (float, optional): Initial guess and upper bound for the
+            width of each Gaussian peak. Default is 5.
+        n_jobs (int, optional): Number of worker processes. None uses all
+            available cores, 1 fits serially in the calling process.
+        params (dict, optional): Additional keyword arguments for
+            scipy.optimize.least_squares.
+
+    Returns:
+        pandas.DataFrame: Tidy frame with one row per sample and band, with
+        columns sample, band, assignment, height, center, width, area,
+        area_fraction and structure_fraction (the total fraction of the
+        band's assignment in that sample).
+    """
+    x = df.iloc[:, 0].to_numpy(dtype=float)
+    samples = list(df.columns[1:])
+    y_all = df.iloc[:, 1:].to_numpy(dtype=float)
+
+    means = np.asarray(peaks["means"], dtype=float)
+    n_pks = means.size
+
+    # Bounds that are shared by every sample; only the height upper bound
+    # depends on the measured data
+    lb = np.zeros(3 * n_pks)
+    ub = np.empty(3 * n_pks)
+    lb[1::3] = [bound[0] for bound in peaks["uncertainties"]]
+    ub[1::3] = [bound[1] for bound in peaks["uncertainties"]]
+    ub[2::3] = peak_width
+
+    def bounds_and_guess(heights):
+        sample_ub = ub.copy()
+        sample_ub[0::3] = np.where(heights <= 0, np.inf, heights)
+        guess = np.empty(3 * n_pks)
+        guess[0::3] = heights * 0.95
+        guess[1::3] = means
+        guess[2::3] = peak_width
+        return np.clip(guess, lb, sample_ub), sample_ub
+
+    # Robust consensus solution from the median spectrum (cold start)
+    y_median = np.median(y_all, axis=1)
+    guess, median_ub = bounds_and_guess(y_at_x_values(x, y_median, means))
+    consensus = _fit_gaussian_bands((x, y_median, guess, lb, median_ub, params))
+
+    # Measured heights at the band centers for every sample in one lookup
+    heights_all = y_at_x_values(x, y_all, means)
+
+    jobs = []
+    for j in range(len(samples)):
+        _, sample_ub = bounds_and_guess(heights_all[:, j])
+        # The warm start must sit inside this sample's bounds
+        warm_start = np.clip(consensus, lb, sample_ub)
+        jobs.append((x, y_all[:, j], warm_start, lb, sample_ub, params))
+
+    if n_jobs == 1 or len(jobs) <= 1:
+        fits = [_fit_gaussian_bands(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            fits = list(executor.map(_fit_gaussian_bands, jobs))
+
+    rows = []
+    for sample, fit in zip(samples, fits):
+        heights, centers, widths = _split_params(fit)
+        areas = heights * widths * math.sqrt(2 * math.pi)
+        total = areas.sum()
+        fractions = areas / total if total else np.zeros(n_pks)
+        structures = (
+            secondary_structure(areas, peaks)
+            if total
+            else {k: 0.0 for k in peaks["assignments"]}
+        )
+        for i, assignment in enumerate(peaks["assignments"]):
+            rows.append(
+                {
+                    "sample": sample,
+                    "band": i + 1,
+                    "assignment": assignment,
+                    "height": heights[i],
+                    "center": centers[i],
+                    "width": widths[i],
+                    "area": areas[i],
+                    "area_fraction": fractions[i],
+                    "structure_fraction": structures[assignment],
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def _fit_gaussian_bands(job):
+    """Single band fit, kept at module level so it can run in a process pool"""
+    x, y, x0, lb, ub, params = job
+
+    def fun(p):
+        return gaussian_peaks(x, p).sum(axis=0) - y
+
+    def jac(p):
+        return gaussian_jacobian(x, p)
+
+    kwargs = {"jac": jac, **params, "bounds": (lb, ub)}
+    return optimize.least_squares(fun, x0, **kwargs).x
+
+
 def gaussian(x, height, center, width):
     """Function defining a gaussian distribution"""
     return height * np.exp(-((x - center) ** 2) / (2 * width**2))
@@ -198,29 +330,84 @@ def gaussian(x, height, center, width):
 
 def gaussian_sum(x, *args):
     """Returns the sum of the gaussian function inputs"""
-    return sum(gaussian_list(x, *args))
+    return gaussian_peaks(x, args).sum(axis=0)
 
 
 def gaussian_list(x, *args):
     """Returns a list containing all gaussian component peaks passed in by *args"""
-    if len(args) % 3 != 0:
-        raise ValueError("Args must divisible by 3")
-    gausslist = []
-    count = 0
-    for i in range(int(len(args) / 3)):
-        gausstemp = gaussian(x, args[count], args[count + 1], args[count + 2])
-        gausslist.append(gausstemp)
-        count += 3
-
-    gausslist = [
-        np.where(gausslist[i] < 1.0e-30, 0.0, gausslist[i])
-        for i, _ in enumerate(gausslist)
-    ]
-
     # The gaussian peaks resulting from the curve fit often result in values
     # that are insanely small (e.g. < 1e-30) and should just be converted to zero
+    gausslist = gaussian_peaks(x, args)
+    gausslist[gausslist < 1.0e-30] = 0.0
+
+    return list(gausslist)
 
-    return gausslist
+
+def gaussian_peaks(x, params):
+    """Vectorized multi-peak gaussian kernel.
+
+    Evaluates every peak in one broadcast instead of looping over the
+    peaks in Python.
+
+    Parameters
+    ----------
+    x : array-like
+        1-D array of x values (n_points)
+
+    params : array-like
+        Flat sequence of [height, center, width] triplets, one per peak
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (n_peaks, n_points) with one gaussian per row
+    """
+    heights, centers, widths = _split_params(params)
+    x = np.asarray(x, dtype=float)
+    return heights[:, None] * np.exp(
+        -((x[None, :] - centers[:, None]) ** 2) / (2 * widths[:, None] ** 2)
+    )
+
+
+def gaussian_jacobian(x, params):
+    """Analytic Jacobian of gaussian_sum with respect to params.
+
+    Parameters
+    ----------
+    x : array-like
+        1-D array of x values (n_points)
+
+    params : array-like
+        Flat sequence of [height, center, width] triplets, one per peak
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (n_points, 3 * n_peaks), with columns ordered the same
+        way as params, i.e. d/dheight, d/dcenter, d/dwidth for each peak
+    """
+    heights, centers, widths = _split_params(params)
+    x = np.asarray(x, dtype=float)
+    dx = x[None, :] - centers[:, None]
+    inv_w2 = 1.0 / widths[:, None] ** 2
+    shape = np.exp(-0.5 * dx**2 * inv_w2)  # unit height gaussians
+    d_center = heights[:, None] * shape * dx * inv_w2
+    d_width = d_center * dx / widths[:, None]
+
+    jac = np.empty((x.size, 3 * heights.size))
+    jac[:, 0::3] = shape.T
+    jac[:, 1::3] = d_center.T
+    jac[:, 2::3] = d_width.T
+    return jac
+
+
+def _split_params(params):
+    """Split a flat [height, center, width, ...] sequence into three arrays"""
+    params = np.asarray(params, dtype=float)
+    if params.size % 3 != 0:
+        raise ValueError("Args must divisible by 3")
+    params = params.reshape(-1, 3)
+    return params[:, 0], params[:, 1], params[:, 2]
 
 
 def gaussian_integral(height, width):
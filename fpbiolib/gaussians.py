@@ -5,14 +5,15 @@ import math
 from scipy import optimize
 from .df_transforms import idx_val
 import math
-from .array_transforms import y_in_x_range, y_fm_x_value
+from .array_transforms import y_at_x_values, y_in_x_range, y_fm_x_value
 
 
 def guess_heights(df, col, center_list, gain=0.95):
     """Determines guesses for the heights based on measured data.
 
-    Function creates an integer mapping to the measured frequencies, and then
-    creates an initial peak height guess of gain*actual height at x=freq*. A
+    Function looks up the measured absorbance at each center (linear
+    interpolation between the neighbouring x values), and then creates an
+    initial peak height guess of gain*actual height at x=freq*. A
     Default of 0.95 seems to work best for most spectra, but can be change to
     improve convergence.
 
@@ -36,16 +37,10 @@ def guess_heights(df, col, center_list, gain=0.95):
         by default, all initial peak guesses are 95% of the peak max.
 
     """
-    heights = []
-    freq_map = {}
-    for i in df.iloc[:, 0]:
-        j = math.floor(i)
-        mask = df.iloc[:, 0] == i
-        freq_map[j] = float(df.loc[mask, col].values[0])
-    for i in center_list:
-        height = freq_map[i]
-        heights.append(gain * height)
-    return heights
+    heights = gain * y_at_x_values(
+        df.iloc[:, 0].to_numpy(), df[col].to_numpy(), center_list
+    )
+    return heights.tolist()
 
 
 def gaussian_least_squares(
@@ -2,6 +2,8 @@ import numpy as np
 import pandas as pd
 from scipy.optimize import curve_fit, least_squares
 
+LN2 = np.log(2)
+
 
 """curve fit function will sometimes fail, while least_squares works
 when curve_fit works, it gives the identical fitted parameters as least_squares
@@ -18,6 +20,24 @@ def gaussian(x, height, center, width):
     return height * np.exp(-((x - center) ** 2) / (2 * width**2))
 
 
+def lorentzian(x, height, center, width):
+    """Function defining a lorentzian (Cauchy) lineshape, width is the
+    half width at half maximum"""
+    return height / (1 + ((x - center) / width) ** 2)
+
+
+def pseudo_voigt(x, height, center, width, fraction):
+    """Pseudo-Voigt lineshape, a linear combination of a lorentzian and a
+    gaussian sharing the same height, center and half width at half maximum.
+    fraction is the lorentzian contribution (0 = pure gaussian, 1 = pure
+    lorentzian).
+    """
+    u_sq = ((x - center) / width) ** 2
+    return height * (
+        fraction / (1 + u_sq) + (1 - fraction) * np.exp(-LN2 * u_sq)
+    )
+
+
 def ls_leach_scheraga(x, b, n):
     """Leach SJ, Scheraga HA. Effect of Light Scattering on Ultraviolet Difference Spectra 1. J Am Chem Soc. 1960;82(18):4790-4792."""
     return b * x ** (-n)
@@ -33,3 +53,60 @@ def rayleigh_mie(x, a, b, c):
     origin of the blue of the sky.
     """
     return a / x**c + b
+
+
+"""Analytic partial derivatives of the lineshapes above with respect to each
+of their parameters (in signature order). Like the lineshapes, they broadcast,
+so a whole set of components can be evaluated at once by passing parameter
+columns of shape (n_components, 1) against x of shape (n_points,). Partials
+that are constant are returned as scalars.
+"""
+
+
+def linear_fun_jac(x, m, b):
+    return x, 1.0
+
+
+def gaussian_jac(x, height, center, width):
+    dx = x - center
+    shape = np.exp(-(dx**2) / (2 * width**2))
+    d_center = height * shape * dx / width**2
+    return shape, d_center, d_center * dx / width
+
+
+def lorentzian_jac(x, height, center, width):
+    u = (x - center) / width
+    shape = 1 / (1 + u**2)
+    d_center = height * 2 * u * shape**2 / width
+    return shape, d_center, d_center * u
+
+
+def pseudo_voigt_jac(x, height, center, width, fraction):
+    u = (x - center) / width
+    lor = 1 / (1 + u**2)
+    gau = np.exp(-LN2 * u**2)
+    shape = fraction * lor + (1 - fraction) * gau
+    d_center = (
+        height * (fraction * 2 * u * lor**2 + (1 - fraction) * 2 * LN2 * u * gau) / width
+    )
+    return shape, d_center, d_center * u, height * (lor - gau)
+
+
+def ls_leach_scheraga_jac(x, b, n):
+    x_pow = x ** (-n)
+    return x_pow, -b * x_pow * np.log(x)
+
+
+def rayleigh_mie_jac(x, a, b, c):
+    x_pow = x ** (-c)
+    return x_pow, 1.0, -a * x_pow * np.log(x)
+
+
+jacobians = {
+    linear_fun: linear_fun_jac,
+    gaussian: gaussian_jac,
+    lorentzian: lorentzian_jac,
+    pseudo_voigt: pseudo_voigt_jac,
+    ls_leach_scheraga: ls_leach_scheraga_jac,
+    rayleigh_mie: rayleigh_mie_jac,
+}
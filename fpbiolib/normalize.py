@@ -1,24 +1,117 @@
+"""
+Normalizations operate on the whole numeric block at once: Y is a 2-D array
+with one trace per column (e.g. df.iloc[:, 1:].to_numpy()), or a single 1-D
+trace. Pass inplace=True to write the result back into Y when the caller owns
+the (float) buffer and doesn't need the original values, which avoids
+allocating a second full-size array. Traces whose normalization factor is
+zero are left unchanged.
+"""
+
 import numpy as np
-import pandas as pd
 
 
-def df_area_norm(df):
+def _scale(Y, factor, inplace=False):
+    """Divide Y by factor (one value per column), leaving columns with a
+    zero factor unchanged"""
+    out = Y if inplace else np.array(Y, dtype=float)
+    np.divide(out, factor, out=out, where=factor != 0)
+    return out
+
+
+def _in_x_range(Y, x, x_range):
+    """Rows of Y (and x) inside the inclusive x_range, or everything"""
+    if x_range is None:
+        return Y, x
+    mask = (x >= min(x_range)) & (x <= max(x_range))
+    return Y[mask], x[mask]
+
+
+def area_norm(Y, x, inplace=False):
     """Normalize to area of 1 to give intuitive feel for peak area fraction"""
+    # absolute value because decreasing x-values give negative area
+    area = np.abs(np.trapezoid(np.abs(Y), x, axis=0))
+    return _scale(Y, area, inplace)
+
+
+def min_max_norm(Y, inplace=False):
+    """Scale every trace to run from 0 to 1 (a true min max normalization)"""
+    y_min = Y.min(axis=0)
+    out = Y if inplace else np.array(Y, dtype=float)
+    np.subtract(out, y_min, out=out)
+    return _scale(out, out.max(axis=0), inplace=True)
+
+
+def vector_norm(Y, inplace=False):
+    """Scale every trace to unit Euclidean (L2) length"""
+    return _scale(Y, np.linalg.norm(Y, axis=0), inplace)
+
+
+def snv(Y, inplace=False):
+    """Standard normal variate: subtract the mean of each trace and divide by
+    its standard deviation"""
+    y_mean = Y.mean(axis=0)
+    y_std = Y.std(axis=0, ddof=1)
+    out = Y if inplace else np.array(Y, dtype=float)
+    np.subtract(out, y_mean, out=out)
+    return _scale(out, y_std, inplace=True)
 
-    proteins = list(df.columns)[1:]
 
-    for i in proteins:
-        dy = np.trapz(abs(df[i]), df[df.columns[0]])
-        df[i] = df[i] / abs(
-            dy
-        )  # absolute value because decreasing x-values give negative area
+def peak_height_norm(Y, x=None, x_range=None, inplace=False):
+    """Scale every trace so its maximum (within x_range, if given) is 1"""
+    Y_range, _ = _in_x_range(Y, x, x_range)
+    return _scale(Y, Y_range.max(axis=0), inplace)
 
+
+def internal_standard_norm(Y, x, x_range, measure="area", inplace=False):
+    """Normalize to an internal standard band between the x values in
+    x_range, using either the band "area" or its peak "height"."""
+    Y_range, x_in_range = _in_x_range(Y, x, x_range)
+    if measure == "area":
+        factor = np.abs(np.trapezoid(Y_range, x_in_range, axis=0))
+    elif measure == "height":
+        factor = Y_range.max(axis=0)
+    else:
+        raise ValueError(f"Unknown measure {measure}, use 'area' or 'height'")
+    return _scale(Y, factor, inplace)
+
+
+def df_normalize(df, method="area", **kwargs):
+    """Normalize every y column of an x, many-y DataFrame in one step.
+
+    method is one of "area", "min_max", "vector", "snv", "peak_height" or
+    "internal_standard", and kwargs are passed to the matching function
+    above (x is taken from the first column). The df is modified in place
+    and returned, as with df_area_norm.
+    """
+    x = df.iloc[:, 0].to_numpy(dtype=float)
+    Y = np.array(df.iloc[:, 1:], dtype=float)  # a new buffer we own
+
+    if method == "area":
+        Y = area_norm(Y, x, inplace=True)
+    elif method == "min_max":
+        Y = min_max_norm(Y, inplace=True)
+    elif method == "vector":
+        Y = vector_norm(Y, inplace=True)
+    elif method == "snv":
+        Y = snv(Y, inplace=True)
+    elif method == "peak_height":
+        Y = peak_height_norm(Y, x, inplace=True, **kwargs)
+    elif method == "internal_standard":
+        Y = internal_standard_norm(Y, x, inplace=True, **kwargs)
+    else:
+        raise ValueError(f"Unknown normalization method {method}")
+
+    # Assign whole columns rather than into the existing ones (iloc), so int
+    # and float32 columns become float64 instead of raising on pandas 3
+    df[df.columns[1:]] = Y
     return df
 
 
+def df_area_norm(df):
+    """Normalize to area of 1 to give intuitive feel for peak area fraction"""
+    return df_normalize(df, "area")
+
+
 def df_min_max_norm(df):
-    # df.iloc[:, 1:] = df.iloc[:, 1:].apply(lambda x: (x-x.mean())/ x.std(), axis=0)  # This is a std way of normalizing where you simply subtract the mean and divide by standard deviation.
-    df.iloc[:, 1:] = (df.iloc[:, 1:] - df.iloc[:, 1:].min()) / (
-        df.iloc[:, 1:].max() - df.iloc[:, 1:].min()
-    )  # This is a true min max normalization
-    return df
+    # df.iloc[:, 1:] = df.iloc[:, 1:].apply(lambda x: (x-x.mean())/ x.std(), axis=0)  # This is a std way of normalizing where you simply subtract the mean and divide by standard deviation (see snv).
+    return df_normalize(df, "min_max")  # This is a true min max normalization
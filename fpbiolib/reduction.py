@@ -1,8 +1,17 @@
-from scipy.stats import cauchy as cauchy_dist
-from scipy.stats import norm as norm_dist
+"""Reducers are written in closed form rather than through scipy.stats
+distribution objects, which carry a heavy per-call overhead when used inside
+a minimizer. Each reducer accepts grad=True to also return the gradient of
+the scalar with respect to the residual array, for gradient-based minimizers
+(see curvefitting.loss_and_grad).
+"""
 
+import numpy as np
 
-def reduce_chisquare(r):
+LOG_SQRT_2PI = 0.5 * np.log(2 * np.pi)
+LOG_PI = np.log(np.pi)
+
+
+def reduce_chisquare(r, grad=False):
     """Reduce residual array to scalar (chi-square).
 
     Calculate the chi-square value from residual array `r` as
@@ -13,16 +22,24 @@ def reduce_chisquare(r):
     r : numpy.ndarray
         Residual array.
 
+    grad : bool, optional
+        Also return the gradient with respect to `r`.
+
     Returns
     -------
     float
         Chi-square calculated from the residual array.
+    numpy.ndarray
+        Gradient ``2*r``, only if `grad` is True.
 
     """
+    r = np.asarray(r)
+    if grad:
+        return (r * r).sum(), 2 * r
     return (r * r).sum()
 
 
-def reduce_negentropy(r):
+def reduce_negentropy(r, grad=False):
     """Reduce residual array to scalar (negentropy).
 
     Reduce residual array `r` to scalar using negative entropy and the
@@ -38,16 +55,26 @@ def reduce_negentropy(r):
     r : numpy.ndarray
         Residual array.
 
+    grad : bool, optional
+        Also return the gradient with respect to `r`.
+
     Returns
     -------
     float
         Negative entropy value calculated from the residual array.
+    numpy.ndarray
+        Gradient ``-r*pdf(r)*(logpdf(r) + 1)``, only if `grad` is True.
 
     """
-    return (norm_dist.pdf(r) * norm_dist.logpdf(r)).sum()
+    r = np.asarray(r)
+    logpdf = -0.5 * r * r - LOG_SQRT_2PI
+    pdf = np.exp(logpdf)
+    if grad:
+        return (pdf * logpdf).sum(), -r * pdf * (logpdf + 1)
+    return (pdf * logpdf).sum()
 
 
-def reduce_cauchylogpdf(r):
+def reduce_cauchylogpdf(r, grad=False):
     """Reduce residual array to scalar (cauchylogpdf).
 
     Reduce residual array `r` to scalar using negative log-likelihood and
@@ -65,10 +92,58 @@ def reduce_cauchylogpdf(r):
     r : numpy.ndarray
         Residual array.
 
+    grad : bool, optional
+        Also return the gradient with respect to `r`.
+
     Returns
     -------
     float
-        Negative entropy value calculated from the residual array.
+        Negative log-likelihood calculated from the residual array.
+    numpy.ndarray
+        Gradient ``2*r/(1+r*r)``, only if `grad` is True.
+
+    """
+    r = np.asarray(r)
+    r_sq = r * r
+    loss = (LOG_PI + np.log1p(r_sq)).sum()
+    if grad:
+        return loss, 2 * r / (1 + r_sq)
+    return loss
+
+
+def reduce_huber(r, delta=1.0, grad=False):
+    """Reduce residual array to scalar (Huber loss).
+
+    Quadratic for small residuals and linear for large ones:
+
+       ``0.5*r*r`` where ``abs(r) <= delta``, otherwise
+       ``delta*(abs(r) - 0.5*delta)``
+
+    This limits the influence of outliers while keeping the least-squares
+    behaviour for well-fitted points.
+
+    Parameters
+    ----------
+    r : numpy.ndarray
+        Residual array.
+    delta : float, optional
+        Residual magnitude where the loss switches from quadratic to linear.
+    grad : bool, optional
+        Also return the gradient with respect to `r`.
+
+    Returns
+    -------
+    float
+        Huber loss calculated from the residual array.
+    numpy.ndarray
+        Gradient ``clip(r, -delta, delta)``, only if `grad` is True.
 
     """
-    return -cauchy_dist.logpdf(r).sum()
+    r = np.asarray(r)
+    abs_r = np.abs(r)
+    loss = np.where(
+        abs_r <= delta, 0.5 * r * r, delta * (abs_r - 0.5 * delta)
+    ).sum()
+    if grad:
+        return loss, np.clip(r, -delta, delta)
+    return loss
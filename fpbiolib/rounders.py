@@ -66,9 +66,6 @@ def interval_range(x_min, x_max):
 
 def ten_to_the_x(value):
     if type(value) == list:
-        valueList = []
-        for i in value:
-            valueList.append(10**i)
-        return valueList
+        return [10**i for i in value]
     else:
         return 10**value
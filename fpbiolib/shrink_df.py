@@ -44,3 +44,128 @@ def df_reduced(df_r_in):
     )  # this method deals with arrays of different size
 
     return df_r_out
+
+
+# PEAK PRESERVING DOWNSAMPLING FOR VISUALIZATION
+# Linear resampling onto a fixed grid (df_reduced) can step over narrow
+# chromatographic peaks. The functions below keep the extremes of every
+# trace instead, and work on all y columns at once.
+
+
+def minmax_decimate(x, Y, n_out=2000):
+    """Min/max decimation of every column of Y.
+
+    x is split into n_out // 2 equal buckets, and each column keeps its
+    minimum and maximum in every bucket (in the order they occur), so no
+    peak is lost. The two points are placed at the first and last x of the
+    bucket, which keeps a shared x-axis for all columns while moving each
+    point by less than one bucket (i.e. less than a pixel at display size).
+
+    Returns (x_out, Y_out), with Y_out of shape (n_out, n_columns).
+    """
+    x = np.asarray(x)
+    Y = np.asarray(Y, dtype=float)
+    one_d = Y.ndim == 1
+    if one_d:
+        Y = Y[:, None]
+    n = x.size
+    n_buckets = n_out // 2
+    if n <= n_out or n_buckets < 1:
+        return x, Y[:, 0] if one_d else Y
+
+    bucket_len = math.ceil(n / n_buckets)
+    n_buckets = math.ceil(n / bucket_len)
+    # Edge padding repeats the last point, which can't create a new extreme
+    pad = n_buckets * bucket_len - n
+    Y_buckets = np.pad(Y, ((0, pad), (0, 0)), mode="edge").reshape(
+        n_buckets, bucket_len, -1
+    )
+    nans = np.isnan(Y_buckets)
+    if nans.any():
+        idx_min = np.argmin(np.where(nans, np.inf, Y_buckets), axis=1)
+        idx_max = np.argmax(np.where(nans, -np.inf, Y_buckets), axis=1)
+    else:
+        idx_min = np.argmin(Y_buckets, axis=1)
+        idx_max = np.argmax(Y_buckets, axis=1)
+    y_min = np.take_along_axis(Y_buckets, idx_min[:, None, :], axis=1)[:, 0]
+    y_max = np.take_along_axis(Y_buckets, idx_max[:, None, :], axis=1)[:, 0]
+    min_first = idx_min <= idx_max
+
+    Y_out = np.empty((2 * n_buckets, Y.shape[1]))
+    Y_out[0::2] = np.where(min_first, y_min, y_max)
+    Y_out[1::2] = np.where(min_first, y_max, y_min)
+
+    starts = np.arange(n_buckets) * bucket_len
+    x_out = np.empty(2 * n_buckets, dtype=x.dtype)
+    x_out[0::2] = x[starts]
+    x_out[1::2] = x[np.minimum(starts + bucket_len - 1, n - 1)]
+    return x_out, Y_out[:, 0] if one_d else Y_out
+
+
+def lttb_indices(x, Y, n_out=2000):
+    """Largest-triangle-three-buckets point selection for every column of Y.
+
+    Returns an (n_out, n_columns) array of the row indices selected for each
+    column. The loop runs over the buckets only; each step handles all
+    columns and all points of the bucket at once.
+    """
+    x = np.asarray(x, dtype=float)
+    Y = np.asarray(Y, dtype=float)
+    if Y.ndim == 1:
+        Y = Y[:, None]
+    n, n_cols = Y.shape
+    if n_out >= n or n_out < 3:
+        return np.repeat(np.arange(n)[:, None], n_cols, axis=1)
+
+    cols = np.arange(n_cols)
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty((n_out, n_cols), dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = np.zeros(n_cols, dtype=int)
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < edges.size else n
+        # Average point of the next bucket
+        avg_x = x[hi:next_hi].mean()
+        avg_y = Y[hi:next_hi].mean(axis=0)
+
+        ax = x[a]
+        ay = Y[a, cols]
+        xs = x[lo:hi, None]
+        area = np.abs((ax - avg_x) * (Y[lo:hi] - ay) - (ax - xs) * (avg_y - ay))
+        a = lo + np.argmax(area, axis=0)
+        selected[i + 1] = a
+
+    return selected
+
+
+def df_downsample(df, n_out=2000, method="minmax"):
+    """Display resolution copy of an x, many-y DataFrame that keeps peaks.
+
+    method "minmax" (min/max decimation) returns an x, many-y DataFrame with
+    a shared x-axis. method "lttb" picks different points for every trace,
+    so it returns the many-x-y layout (x, y, x, y, ...) used by
+    many_x_y_to_x_many_y, with the x columns named "<trace> x".
+    """
+    x = df.iloc[:, 0].to_numpy()
+    Y = df.iloc[:, 1:].to_numpy(dtype=float)
+
+    if method == "minmax":
+        x_out, Y_out = minmax_decimate(x, Y, n_out)
+        out = pd.DataFrame(Y_out, columns=df.columns[1:])
+        out.insert(0, df.columns[0], x_out)
+        return out
+
+    if method == "lttb":
+        selected = lttb_indices(x, Y, n_out)
+        cols = np.arange(Y.shape[1])
+        data = {}
+        for k, name in enumerate(df.columns[1:]):
+            data[f"{name} x"] = x[selected[:, k]]
+            data[name] = Y[selected[:, k], cols[k]]
+        return pd.DataFrame(data)
+
+    raise ValueError(f"Unknown method {method}, use 'minmax' or 'lttb'")
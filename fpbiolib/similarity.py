@@ -1,40 +1,44 @@
-import math
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 
+from .normalize import area_norm
+
+
+def _as_columns(y, y_fit):
+    """Convert to float arrays and, when only one of y / y_fit is 2-D
+    (n_points, n_samples), turn the 1-D one into a column so it broadcasts
+    against every sample."""
+    y = np.asarray(y, dtype=float)
+    y_fit = np.asarray(y_fit, dtype=float)
+    if y.ndim == 1 and y_fit.ndim == 2:
+        y = y[:, None]
+    elif y_fit.ndim == 1 and y.ndim == 2:
+        y_fit = y_fit[:, None]
+    return y, y_fit
+
 
 def wss(y, y_fit):
-    """Work in progress, do not use.  Calculates the Weighted Trace Similarity for two samples"""
-    n = int(len(y))
-    y_avg = sum(y) / n
-    wss_sq = 0
-    for i in range(n):
-        wss_sq = (
-            wss_sq
-            + (1 / n) * (abs(y[i]) / abs(y_avg)) * ((y_fit[i]) - (y[i])) ** 2
-        )
-    wss = 1 - 100 * math.sqrt(wss_sq)
-    return wss
+    """Work in progress, do not use.  Calculates the Weighted Trace Similarity for two samples.
+    y and/or y_fit may be 2-D (n_points, n_samples) to score many samples at once."""
+    y, y_fit = _as_columns(y, y_fit)
+    y_avg = y.mean(axis=0)
+    wss_sq = np.mean(np.abs(y) / np.abs(y_avg) * (y_fit - y) ** 2, axis=0)
+    return 1 - 100 * np.sqrt(wss_sq)
 
 
 def wsd(y, y_fit):
-    """Calculates the WSD for two samples"""
-    n = int(len(y))
-    y_avg = sum(y) / n
-
-    if y_avg != 0:
-        wsd_sq = 0
-        for i in range(n):
-            wsd_sq = (
-                wsd_sq
-                + (1 / n)
-                * (abs(y[i]) / abs(y_avg))
-                * ((y_fit[i]) - (y[i])) ** 2
-            )
-        wsd = math.sqrt(wsd_sq)
-    else:
-        wsd = 0
-    return wsd
+    """Calculates the WSD for two samples.
+    y and/or y_fit may be 2-D (n_points, n_samples) to score many samples at once."""
+    y, y_fit = _as_columns(y, y_fit)
+    y_avg = np.abs(y.mean(axis=0))
+
+    # WSD is defined as zero when the reference averages to zero
+    weights = np.divide(
+        np.abs(y), y_avg, out=np.zeros(np.broadcast(y, y_avg).shape), where=y_avg != 0
+    )
+    wsd_sq = np.mean(weights * (y_fit - y) ** 2, axis=0)
+    return np.sqrt(wsd_sq)
 
 
 def overlap(x, y, y_compare):
@@ -49,17 +53,12 @@ def overlap(x, y, y_compare):
     two traces differ in sign.
     """
 
+    y, y_compare = _as_columns(y, y_compare)
+
     # There must be zero overlap if y values have different signs
     # therefore, create an array of 1's and 0's so we can
     # zero out each point in the overlap array later in the algorithm.
-    zero_opp_signs = []
-    for a, b in zip(y, y_compare):
-        if np.sign(a) == np.sign(b):
-            zero_opp_signs.append(1)
-        else:
-            zero_opp_signs.append(0)
-
-    zero_opp_signs = np.asarray(zero_opp_signs)  # create array
+    zero_opp_signs = np.sign(y) == np.sign(y_compare)
 
     # Make array all positive to facilitate calculation
     # of minimum absolute intensity in point-by-point comparisons
@@ -70,22 +69,9 @@ def overlap(x, y, y_compare):
     # E.g. divide each trace area by the integrated area
     # to create an area of 1.  Then, any area of overlap
     # will be a fractional area.
-    y_pos_area = np.abs(np.trapz(y_pos, x))  # need abs to ensure positive area
-    y_pos_norm = y_pos / y_pos_area
-
-    # need abs to ensure positive area
-    # Avoid division by zero
-    if not y_pos_area == 0:
-        y_pos_norm = y_pos / y_pos_area
-    else:
-        y_pos_norm = y_pos_area
-
-    y_compare_pos_area = np.abs(np.trapz(y_compare_pos, x))
-    # Avoid division by zero
-    if not y_compare_pos_area == 0:
-        y_compare_pos_norm = y_compare_pos / y_compare_pos_area
-    else:
-        y_compare_pos_norm = y_compare_pos_area
+    # need abs to ensure positive area, and avoid division by zero
+    y_pos_norm = area_norm(y_pos, x)
+    y_compare_pos_norm = area_norm(y_compare_pos, x)
 
     y_min = np.minimum(
         (y_pos_norm), (y_compare_pos_norm)
@@ -95,38 +81,164 @@ def overlap(x, y, y_compare):
     y_min = y_min * zero_opp_signs
 
     y_min_area = np.abs(
-        np.trapz(y_min, x)
+        np.trapezoid(y_min, x, axis=0)
     )  # get area of y_min, need abs to ensure positive area. Can be negative if wavelength is descending
 
     return y_min_area
 
 
 def R2(y, y_compare):
+    y, y_compare = _as_columns(y, y_compare)
     resid = y - y_compare
-    return 1 - np.sum((resid**2)) / np.sum((y - y.mean()) ** 2)
+    return 1 - np.sum((resid**2), axis=0) / np.sum((y - y.mean(axis=0)) ** 2, axis=0)
 
 
 def dca(x, y, y_fit):
-    """Calculates the derivative correlation algorithm (DCA) for two samples in the DataFrame"""
-
-    n = int(len(y))
-    p_sq = 0
-    A = 0
-    B = 0
-    C = 0
-    # create a list of n elements, all zero to make endpoints zero after loop below
-    y_der = [0] * n
-    y_fit_der = [0] * n
-
-    for i in range(2, n - 1):  # want i = 1 and i = n elements equal to zero
-        y_der[i] = (y[i + 1] - y[i - 1]) / 2
-        y_fit_der[i] = (y_fit[i + 1] - y_fit[i - 1]) / 2
-
-    for i in range(n):
-        A = A + y_der[i] * y_fit_der[i]
-        B = B + (y_der[i]) ** 2
-        C = C + (y_fit_der[i]) ** 2
-
-    p_sq = A**2 / (B * C)
-    p = math.sqrt(p_sq)
+    """Calculates the derivative correlation algorithm (DCA) for two samples in the DataFrame.
+    y and/or y_fit may be 2-D (n_points, n_samples) to score many samples at once."""
+    y, y_fit = _as_columns(y, y_fit)
+    y_der = _central_diff(y)
+    y_fit_der = _central_diff(y_fit)
+
+    A = np.sum(y_der * y_fit_der, axis=0)
+    B = np.sum(y_der**2, axis=0)
+    C = np.sum(y_fit_der**2, axis=0)
+
+    p = np.sqrt(A**2 / (B * C))
     return (p**21 + p) / 2
+
+
+def _central_diff(y):
+    """Central difference derivative, with the first two and the last
+    points left at zero"""
+    n = y.shape[0]
+    y_der = np.zeros_like(y)
+    y_der[2 : n - 1] = (y[3:n] - y[1 : n - 2]) / 2
+    return y_der
+
+
+def similarity_matrix(
+    Y, metric="dca", x=None, block_size=256, n_jobs=None, out=None
+):
+    """All-pairs similarity scores for a set of traces.
+
+    Scores are computed in (block_size x block_size) tiles spread across a
+    thread pool (NumPy releases the GIL). DCA is expanded into a matrix
+    product so each tile is a single BLAS call. WSD and R² are summed from
+    the actual differences between traces, one reference row of the tile at
+    a time, because the expanded-norm forms cancel badly for near-identical
+    traces. For the symmetric metrics (dca, overlap) only the upper triangle
+    of tiles is computed and mirrored.
+
+    Parameters
+    ----------
+    Y : array-like
+        (n_points, n_samples) array with one trace per column, e.g.
+        df.iloc[:, 1:] of an x, many-y DataFrame.
+    metric : str
+        "wsd", "dca", "r2" or "overlap". For the asymmetric metrics (wsd, r2),
+        element [i, j] uses trace i as the reference (y) and trace j as the
+        sample (y_fit / y_compare), matching the pairwise functions above.
+    x : array-like, optional
+        x values, only used for "overlap". Defaults to unit spacing.
+    block_size : int
+        Number of traces per tile.
+    n_jobs : int, optional
+        Number of worker threads, None lets the executor decide.
+    out : str or numpy.ndarray, optional
+        Output array, or a .npy file path to write a memory-mapped array to
+        when n_samples² is too large to hold in memory.
+
+    Returns
+    -------
+    numpy.ndarray
+        (n_samples, n_samples) array of scores (a numpy.memmap if `out` is
+        a path).
+    """
+    Y = np.asarray(Y, dtype=float)
+    n_points, n = Y.shape
+    if x is None:
+        x = np.arange(n_points, dtype=float)
+
+    if isinstance(out, str):
+        out = np.lib.format.open_memmap(out, mode="w+", dtype=float, shape=(n, n))
+    elif out is None:
+        out = np.empty((n, n))
+
+    if metric == "wsd":
+        y_avg = np.abs(Y.mean(axis=0))
+        W = np.divide(
+            np.abs(Y), y_avg, out=np.zeros_like(Y), where=y_avg != 0
+        )
+
+        def tile(i, j):
+            block = np.empty((i.stop - i.start, j.stop - j.start))
+            for k in range(i.start, i.stop):
+                diff = Y[:, j] - Y[:, k, None]
+                block[k - i.start] = W[:, k] @ (diff * diff)
+            return np.sqrt(block / n_points)
+
+        symmetric = False
+
+    elif metric == "dca":
+        D = _central_diff(Y)
+        norms = np.sqrt(np.sum(D**2, axis=0))
+
+        def tile(i, j):
+            p = np.abs(D[:, i].T @ D[:, j]) / np.outer(norms[i], norms[j])
+            return (p**21 + p) / 2
+
+        symmetric = True
+
+    elif metric == "r2":
+        ss_tot = np.sum((Y - Y.mean(axis=0)) ** 2, axis=0)
+
+        def tile(i, j):
+            ss_res = np.empty((i.stop - i.start, j.stop - j.start))
+            for k in range(i.start, i.stop):
+                diff = Y[:, j] - Y[:, k, None]
+                ss_res[k - i.start] = np.einsum("pj,pj->j", diff, diff)
+            return 1 - ss_res / ss_tot[i, None]
+
+        symmetric = False
+
+    elif metric == "overlap":
+        P = area_norm(np.abs(Y), x)
+        S = np.sign(Y)
+
+        def tile(i, j):
+            block = np.empty((i.stop - i.start, j.stop - j.start))
+            for k in range(i.start, i.stop):
+                y_min = np.minimum(P[:, k, None], P[:, j])
+                y_min *= S[:, k, None] == S[:, j]
+                block[k - i.start] = np.abs(np.trapezoid(y_min, x, axis=0))
+            return block
+
+        symmetric = True
+
+    else:
+        raise ValueError(
+            f"Unknown metric {metric}, use 'wsd', 'dca', 'r2' or 'overlap'"
+        )
+
+    blocks = [slice(k, min(k + block_size, n)) for k in range(0, n, block_size)]
+    tiles = [
+        (i, j)
+        for a, i in enumerate(blocks)
+        for b, j in enumerate(blocks)
+        if not symmetric or b >= a
+    ]
+
+    def fill(ij):
+        i, j = ij
+        block = tile(i, j)
+        out[i, j] = block
+        if symmetric and i != j:
+            out[j, i] = block.T
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        list(executor.map(fill, tiles))
+
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
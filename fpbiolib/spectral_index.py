@@ -0,0 +1,169 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from .array_transforms import y_at_x_values
+from .normalize import area_norm
+from .similarity import overlap
+
+
+class SpectralIndex:
+    """
+    Nearest-reference search over a library of spectra.
+
+    The library is resampled to one common x-axis and area normalized once
+    (same conventions as many_x_y_to_x_many_y and df_area_norm) and stored as
+    a compact float32 matrix with one spectrum per row. Queries are answered
+    in two stages:
+
+      1. A prefilter ranks the whole library with dot products in a small
+         PCA (truncated SVD) space of the metric features.
+
+      2. The best candidates are rescored exactly with the chosen metric.
+
+    Supported metrics:
+      - "correlation": Pearson correlation of the normalized spectra
+      - "dca": derivative correlation algorithm, as in similarity.dca
+      - "overlap": area of overlap, as in similarity.overlap (prefiltered
+        by correlation)
+
+    Example:
+        index = SpectralIndex(library_df)
+        index.save("library.npz")
+        index = SpectralIndex.load("library.npz")
+        hits = index.query(x, y, k=5, metric="dca")
+    """
+
+    metrics = ("correlation", "dca", "overlap")
+
+    def __init__(self, df=None, num_rows=None, n_components=32):
+        """
+        Parameters:
+            df (pandas.DataFrame): Library in x, many-y layout (x data in the
+                first column, one reference spectrum per remaining column).
+            num_rows (int, optional): Resample the library onto this many
+                evenly spaced x values between nice round end points. By
+                default the library's own x values are kept.
+            n_components (int): Number of PCA components used by the
+                prefilter.
+        """
+        if df is None:
+            # Empty instance, filled in by load()
+            return
+
+        x = df.iloc[:, 0].to_numpy(dtype=float)
+        Y = df.iloc[:, 1:].to_numpy(dtype=float)
+        order = np.argsort(x)
+        x, Y = x[order], Y[order]
+
+        if num_rows:
+            # Nice round numbers for plotly tools, as with many_x_y_to_x_many_y
+            x_new = np.linspace(
+                math.ceil(x[0] * 100) / 100, math.floor(x[-1] * 100) / 100, num_rows
+            )
+            Y = y_at_x_values(x, Y, x_new)
+            x = x_new
+
+        self.x = x
+        self.names = np.asarray([str(c) for c in df.columns[1:]])
+        self.library = area_norm(Y, x).T.astype(np.float32)
+
+        self.components = {}
+        self.projections = {}
+        for feature in ("correlation", "dca"):
+            F = self._features(self.library, feature)
+            k = min(n_components, *F.shape)
+            _, _, vt = np.linalg.svd(F, full_matrices=False)
+            self.components[feature] = vt[:k].astype(np.float32)
+            self.projections[feature] = F @ self.components[feature].T
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def _features(S, feature):
+        """Unit length feature rows whose dot products give the metric"""
+        S = np.asarray(S, dtype=np.float32)
+        if feature == "correlation":
+            F = S - S.mean(axis=1, keepdims=True)
+        else:
+            # Central difference, with the first two and last points at
+            # zero as in similarity.dca
+            F = np.zeros_like(S)
+            F[:, 2:-1] = (S[:, 3:] - S[:, 1:-2]) / 2
+        norms = np.linalg.norm(F, axis=1, keepdims=True)
+        return np.divide(F, norms, out=np.zeros_like(F), where=norms != 0)
+
+    def query(self, x, y, k=5, metric="correlation", n_candidates=None):
+        """
+        Find the k library spectra most similar to y.
+
+        Parameters:
+            x (array-like): x values of the query spectrum.
+            y (array-like): y values of the query spectrum.
+            k (int): Number of matches to return.
+            metric (str): "correlation", "dca" or "overlap".
+            n_candidates (int, optional): Number of prefilter candidates that
+                get rescored exactly. Default is max(10 * k, 100).
+
+        Returns:
+            pandas.DataFrame: columns "name" and "score", best match first.
+        """
+        if metric not in self.metrics:
+            raise ValueError(f"Unknown metric {metric}, use one of {self.metrics}")
+
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        y = area_norm(y_at_x_values(x, y, self.x), self.x)
+
+        # Stage 1: approximate dot products in PCA space
+        feature = "dca" if metric == "dca" else "correlation"
+        q = self._features(y[None, :], feature)[0]
+        approx = self.projections[feature] @ (self.components[feature] @ q)
+        if feature == "dca":
+            approx = np.abs(approx)
+
+        n_candidates = min(n_candidates or max(10 * k, 100), len(self))
+        candidates = np.argpartition(-approx, n_candidates - 1)[:n_candidates]
+
+        # Stage 2: exact scores for the candidates only
+        lib = self.library[candidates]
+        if metric == "overlap":
+            scores = overlap(self.x, y, lib.T.astype(float))
+        else:
+            scores = self._features(lib, feature) @ q
+            if metric == "dca":
+                p = np.abs(scores)
+                scores = (p**21 + p) / 2
+
+        best = np.argsort(-scores)[:k]
+        return pd.DataFrame(
+            {"name": self.names[candidates[best]], "score": scores[best]}
+        )
+
+    def save(self, path):
+        """Save the index to a .npz file"""
+        np.savez(
+            path,
+            x=self.x,
+            names=self.names,
+            library=self.library,
+            **{f"components_{f}": v for f, v in self.components.items()},
+            **{f"projections_{f}": v for f, v in self.projections.items()},
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Load an index written by save()"""
+        index = cls()
+        with np.load(path, allow_pickle=False) as data:
+            index.x = data["x"]
+            index.names = data["names"]
+            index.library = data["library"]
+            index.components = {}
+            index.projections = {}
+            for feature in ("correlation", "dca"):
+                index.components[feature] = data[f"components_{feature}"]
+                index.projections[feature] = data[f"projections_{feature}"]
+        return index
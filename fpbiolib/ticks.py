@@ -0,0 +1,158 @@
+"""
+Axis tick engine for custom_plots.axis_ticks.
+
+The nice tick spacing, rounded end points and label format of many axes are
+worked out together with NumPy. Each axis's tick values and labels are then
+cached by the rounded range and spacing they come from, so every (min, max,
+zoom) that rounds to the same ticks (e.g. repeated figure rebuilds and slider
+callbacks) reuses them. The values and labels are identical to the scalar
+roundup/rounddown/magnitude implementation.
+"""
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+
+def magnitudes(values):
+    """Order of magnitude (floor of log10) of every value, 0 for zero"""
+    values = np.abs(np.asarray(values, dtype=float))
+    with np.errstate(divide="ignore"):
+        mags = np.floor(np.log10(np.where(values == 0, 1, values)))
+    return mags.astype(int)
+
+
+def powers_of_ten(exponents):
+    """10**exponents for integer exponents, matching Python's 10**k. Negative
+    powers are computed as 1 / 10**-k, numpy's float power can be off by an
+    ulp there."""
+    exponents = np.asarray(exponents)
+    positive = 10.0 ** np.abs(exponents)
+    return np.where(exponents >= 0, positive, 1 / positive)
+
+
+def round_to_place(x, val, up=False):
+    """Vectorized custom_plots.roundup (up=True) and rounddown: round x to a
+    multiple of the place value val (100, 10, 1, 0.1, ...). Values that are
+    already a multiple are returned as they are."""
+    x = np.asarray(x, dtype=float)
+    val = np.asarray(val, dtype=float)
+    rem = np.mod(x, val)
+    shifted = x + val - rem if up else x - rem
+    # Round again at the place value to clear floating point noise, as
+    # round(shifted, -log10(val)) does
+    decimals = -np.trunc(np.log10(val))
+    scale = powers_of_ten(np.abs(decimals))
+    rounded = np.where(
+        decimals >= 0,
+        np.rint(shifted * scale) / scale,
+        np.rint(shifted / scale) * scale,
+    )
+    return np.where(rem == 0, x, rounded)
+
+
+def tick_params(a_mins, dfmaxes, zooms=1.0, y_axes=True):
+    """
+    Per-axis tick parameters for axis_ticks, for many axes at once.
+
+    Returns:
+        dict of arrays: a_min, a_max, tick_low, tick_stop (end of the
+        np.arange calls), major (major tick spacing), minor (minor tick
+        spacing) and decimals (label decimal places).
+    """
+    a_mins, dfmaxes, zooms, y_axes = np.broadcast_arrays(
+        np.asarray(a_mins, dtype=float),
+        np.asarray(dfmaxes, dtype=float),
+        np.asarray(zooms, dtype=float),
+        np.asarray(y_axes, dtype=bool),
+    )
+    zooms = np.where(y_axes, zooms, 1.0)
+    a_min = a_mins / zooms
+    a_max = dfmaxes / zooms
+    delta_mag = magnitudes(a_max - a_min)
+    place = powers_of_ten(delta_mag)
+
+    tick_low = round_to_place(a_min, place)
+    tick_hi = round_to_place(a_max, place, up=True)
+
+    # Normalized difference, i.e. if a_max is 600 and delta_mag is 2 it is 6
+    dif_norm = a_max / place - a_min / place
+    wide = dif_norm >= 5
+    major = np.where(wide, place, place / 2)
+    # Narrow ranges space the minor ticks out with the zoom
+    minor = np.where(wide, major / 5, major / 5 * zooms)
+
+    # Decimal places only for magnitudes <= 1, i.e. values below 100
+    mag_a_max = magnitudes(a_max)
+    decimals = np.where(mag_a_max <= 1, 2 - mag_a_max, 0)
+
+    return dict(
+        a_min=a_min,
+        a_max=a_max,
+        tick_low=tick_low,
+        tick_stop=tick_hi * zooms,
+        major=major,
+        minor=minor,
+        decimals=decimals,
+    )
+
+
+@lru_cache(maxsize=1024)
+def _ticks(tick_low, tick_stop, major, minor, decimals, negative_zero=False):
+    """Tick values and labels of one axis, as tuples so they can be cached.
+    negative_zero keeps -0.0 and 0.0 (equal as cache keys) apart, since
+    the first label keeps the sign."""
+    tick_vals = np.arange(tick_low, tick_stop, minor)
+    tick_vals_major = np.arange(tick_low, tick_stop, major)
+    # Scientific notation above 10000
+    if abs(tick_vals[0]) >= 10000 or abs(tick_vals[-1]) >= 10000:
+        tick_txt_major = np.char.mod("%.2e", tick_vals_major)
+    else:
+        tick_txt_major = np.char.mod(f"%.{decimals}f", tick_vals_major)
+    return (
+        tuple(tick_vals),
+        ("",) * len(tick_vals),
+        tuple(tick_vals_major),
+        tuple(tick_txt_major.tolist()),
+    )
+
+
+def axis_ticks_many(a_mins, dfmaxes, zooms=1.0, y_axes=True):
+    """
+    custom_plots.axis_ticks for many axes in one call.
+
+    Parameters:
+        a_mins (array-like): Minimum data value of each axis.
+        dfmaxes (array-like): Maximum data value of each axis.
+        zooms (array-like): Zoom level of each axis (only used by y axes).
+        y_axes (array-like of bool): Whether each axis is a y axis.
+
+    Returns:
+        list: One (a_min, a_max, tick_vals, tick_txt, tick_vals_major,
+        tick_txt_major) tuple per axis, as from axis_ticks.
+    """
+    params = tick_params(a_mins, dfmaxes, zooms, y_axes)
+    axes = []
+    for a_min, a_max, tick_low, tick_stop, major, minor, decimals in zip(
+        *(np.ravel(params[k]).tolist() for k in params)
+    ):
+        tick_vals, tick_txt, tick_vals_major, tick_txt_major = _ticks(
+            tick_low,
+            tick_stop,
+            major,
+            minor,
+            decimals,
+            negative_zero=math.copysign(1, tick_low) < 0 and tick_low == 0,
+        )
+        axes.append(
+            (
+                a_min,
+                a_max,
+                list(tick_vals),
+                list(tick_txt),
+                list(tick_vals_major),
+                list(tick_txt_major),
+            )
+        )
+    return axes
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+# (height, center, width, baseline) of the band in each y column
+SPECTRA_BANDS = {"a": (100, 1650, 5, 0), "b": (40, 1630, 40**0.5, 3)}
+
+
+def xy_df(x=None, bands=None, dtype="float64"):
+    """x, many-y DataFrame with one gaussian band per y column"""
+    if x is None:
+        x = np.linspace(1600, 1700, 51)
+    if bands is None:
+        bands = SPECTRA_BANDS
+    df = pd.DataFrame({"x": x})
+    for name, (height, center, width, baseline) in bands.items():
+        y = height * np.exp(-((x - center) ** 2) / (2 * width**2)) + baseline
+        df[name] = y.astype(dtype)
+    return df
+
+
+@pytest.fixture
+def make_xy_df():
+    """Factory for x, many-y frames, make_xy_df(x=None, bands=None,
+    dtype="float64"). By default two bands on 51 points between 1600 and
+    1700."""
+    return xy_df
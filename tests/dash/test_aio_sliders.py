@@ -0,0 +1,54 @@
+import fnmatch
+import re
+from pathlib import Path
+
+import dash
+import pytest
+from dash import html
+from dash._callback import GLOBAL_CALLBACK_LIST
+
+from fpbiolib.dash import aio_sliders
+
+ASSET = Path(aio_sliders.__file__).parent / "assets" / "aio_sliders.js"
+FUNCTIONS = {
+    "FloatSliderAIO": "floatSlider",
+    "FloatRangeSliderAIO": "floatRangeSlider",
+    "FloatLogSliderAIO": "floatLogSlider",
+    "FloatLogRangeSliderAIO": "floatLogRangeSlider",
+}
+
+
+@pytest.mark.parametrize("component, function_name", FUNCTIONS.items())
+def test_sliders_register_clientside_callbacks(component, function_name):
+    callbacks = [
+        cb for cb in GLOBAL_CALLBACK_LIST if f'"component":"{component}"' in cb["output"]
+    ]
+    assert [cb["clientside_function"] for cb in callbacks] == [
+        {"namespace": "fpbiolib_aio", "function_name": function_name}
+    ]
+    assert re.search(rf"^\s+{function_name}: function", ASSET.read_text(), re.M)
+
+
+def test_asset_is_package_data():
+    tomllib = pytest.importorskip("tomllib")
+    pyproject = Path(__file__).parents[2] / "pyproject.toml"
+    with open(pyproject, "rb") as f:
+        package_data = tomllib.load(f)["tool"]["setuptools"]["package-data"]
+    assert any(
+        fnmatch.fnmatch("assets/aio_sliders.js", pattern)
+        for pattern in package_data["fpbiolib.dash"]
+    )
+
+
+def test_app_serves_asset():
+    app = dash.Dash(__name__)
+    app.layout = html.Div()
+    client = app.server.test_client()
+
+    index = client.get("/").get_data(as_text=True)
+    src = re.search(r'src="([^"]*fpbiolib\.dash/assets/aio_sliders[^"]*\.js)"', index)
+    assert src, "aio_sliders.js is not in the page"
+
+    script = client.get(src.group(1))
+    assert script.status_code == 200
+    assert script.get_data(as_text=True) == ASSET.read_text()
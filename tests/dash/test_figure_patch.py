@@ -0,0 +1,174 @@
+import numpy as np
+import plotly.io as pio
+import pytest
+from dash import no_update
+
+from fpbiolib.cache_utils import DataCache
+from fpbiolib.custom_plots import primary_graph
+from fpbiolib.dash.figure_patch import PrimaryGraphCache
+
+
+# Three chromatogram peaks
+X = np.linspace(0, 10, 201)
+BANDS = {"a": (1, 3, 0.5**0.5, 0), "b": (2, 5, 0.5**0.5, 0), "c": (3, 7, 0.5**0.5, 0)}
+
+
+@pytest.fixture
+def df(make_xy_df):
+    return make_xy_df(X, BANDS)
+
+
+OPTIONS = dict(
+    pk_labeling=True,
+    pk_labels=["p1", "p2", "p3"],
+    pk_label_indexes=[60, 100, 140],
+    pk_label_sel_trace="b",
+)
+
+
+def as_json(fig):
+    return pio.from_json(pio.to_json(fig), skip_invalid=True).to_plotly_json()
+
+
+@pytest.mark.parametrize(
+    "updates",
+    [
+        [dict(stack_value=0.5)],
+        [dict(current_anno={"annotations[1].ay": -60})],
+        [dict(current_anno={"annotations[1].ay": -60}), dict(stack_value=1.5)],
+        [dict(stack_value=1.0), dict(current_anno={"annotations[0].y": 4.2})],
+        [
+            dict(current_anno={"annotations[2].y": 3.0, "annotations[2].text": "x"}),
+            dict(stack_value=2.0, zoom_level=2.0),
+            dict(current_anno={"annotations[0].textangle": 45}),
+        ],
+    ],
+)
+def test_update_matches_primary_graph(updates, df):
+    cache = PrimaryGraphCache()
+    cache.figure("key", df, "a", **OPTIONS)
+
+    kwargs = dict(OPTIONS)
+    for update in updates:
+        cache.update("key", **update)
+        for k, v in update.items():
+            if k == "current_anno":
+                kwargs[k] = {**kwargs.get(k, {}), **v}
+            else:
+                kwargs[k] = v
+
+    expected_fig, expected_layout_data = primary_graph(df, "a", **kwargs)
+    fig, layout_data = cache.figure("key", df, "a", **kwargs)
+
+    assert layout_data == expected_layout_data
+    assert as_json(fig) == as_json(expected_fig)
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_figure_after_relayout_keeps_x_range(reverse, df):
+    cache = PrimaryGraphCache(max_points=50)
+    fig, _ = cache.figure("key", df, "a", reverse=reverse)
+    full_x = np.asarray(fig["data"][0]["x"])
+
+    cache.relayout("key", {"xaxis.range[0]": 4.0, "xaxis.range[1]": 6.0})
+    fig, _ = cache.figure("key", df, "a", reverse=reverse)
+    xaxis = fig["layout"]["xaxis"]
+    assert xaxis["range"] == [4.0, 6.0]
+    assert xaxis["autorange"] is False
+    x = np.asarray(fig["data"][0]["x"])
+    assert x.min() < 4.0 and x.max() > 6.0 and x.max() - x.min() < 2.2
+
+    cache.relayout("key", {"xaxis.autorange": True})
+    fig, _ = cache.figure("key", df, "a", reverse=reverse)
+    xaxis = fig["layout"]["xaxis"]
+    assert "range" not in xaxis
+    assert xaxis.get("autorange") == ("reversed" if reverse else None)
+    np.testing.assert_array_equal(np.asarray(fig["data"][0]["x"]), full_x)
+
+
+def test_figure_with_array_options_is_cached(df):
+    options = {**OPTIONS, "pk_label_indexes": np.array([60, 100, 140])}
+    cache = PrimaryGraphCache()
+    fig, _ = cache.figure("key", df, "a", **options)
+    same = {**options, "pk_label_indexes": np.array([60, 100, 140])}
+    cached, _ = cache.figure("key", df, "a", **same)
+    assert cached is fig
+
+    changed = {**options, "pk_label_indexes": np.array([60, 100])}
+    rebuilt, _ = cache.figure("key", df, "a", **changed)
+    assert rebuilt is not fig
+    assert len(rebuilt["layout"]["annotations"]) == 2
+
+
+class DictBackend(dict):
+    """In-memory stand-in for the Redis or DiskCache backend"""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+
+    def set(self, key, value):
+        self[key] = value
+        self.writes.append(key)
+
+
+def test_update_and_relayout_without_figure_are_no_update(df):
+    cache = PrimaryGraphCache(max_points=50)
+    assert cache.update("key", stack_value=1.0) is no_update
+    assert cache.relayout("key", {"xaxis.range[0]": 4.0, "xaxis.range[1]": 6.0}) is no_update
+
+    cache.figure("key", df, "a")
+    cache.clear()
+    assert cache.update("key", zoom_level=2.0) is no_update
+
+
+def test_workers_share_entries_through_data_cache(df):
+    data_cache = DataCache(DictBackend())
+    worker_a = PrimaryGraphCache(max_points=50, data_cache=data_cache)
+    worker_b = PrimaryGraphCache(max_points=50, data_cache=data_cache)
+
+    worker_a.figure("key", df, "a", **OPTIONS)
+    # Built by worker_a, so worker_b only has it through data_cache
+    patch = worker_b.update("key", stack_value=1.5, current_anno={"annotations[1].ay": -60})
+    assert patch is not no_update and "key" in worker_b
+    worker_b.relayout("key", {"xaxis.range[0]": 4.0, "xaxis.range[1]": 6.0})
+
+    # worker_a reloads the entry worker_b changed rather than patching its own
+    worker_a.update("key", zoom_level=2.0)
+    fig, layout_data = worker_a.figure(
+        "key",
+        df,
+        "a",
+        **OPTIONS,
+        stack_value=1.5,
+        current_anno={"annotations[1].ay": -60},
+        zoom_level=2.0,
+    )
+    assert fig["layout"]["xaxis"]["range"] == [4.0, 6.0]
+    assert layout_data["annotations[1].ay"] == -60
+
+    expected, _ = primary_graph(
+        df, "a", **OPTIONS, stack_value=1.5, current_anno={"annotations[1].ay": -60}, zoom_level=2.0
+    )
+    assert fig["layout"]["yaxis"]["range"] == list(expected.layout.yaxis.range)
+    assert as_json(fig)["layout"]["annotations"] == as_json(expected)["layout"]["annotations"]
+    x = np.asarray(fig["data"][0]["x"])
+    y = np.asarray(fig["data"][0]["y"])
+    expected_y = np.interp(x, X, np.asarray(expected.data[0].y))
+    np.testing.assert_allclose(y, expected_y)
+
+
+def test_update_only_saves_changed_state(df):
+    backend = DictBackend()
+    cache = PrimaryGraphCache(max_points=50, data_cache=DataCache(backend))
+    cache.figure("key", df, "a", **OPTIONS, trace_width=[2, 2, 2])
+    assert any("primary_graph_df_key" in k for k in backend.writes)
+
+    backend.writes.clear()
+    cache.update("key", stack_value=0, zoom_level=1.0, trace_width=[2, 2, 2])
+    assert backend.writes == []
+
+    cache.update("key", stack_value=1.0)
+    # The small state and version only, the data and figure are not resent
+    assert backend.writes
+    assert all("state" in k or "version" in k for k in backend.writes)
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from fpbiolib.dash.generate_html_table import paged_table, table_page
+
+
+def make_table():
+    return pd.DataFrame(
+        {
+            "name": [f"pk{i}" for i in range(10)],
+            5: [3.0, 1.0, 2.0, 5.0, 4.0, 9.0, 8.0, 7.0, 6.0, 0.5],
+            "group": ["a", "b"] * 5,
+        }
+    )
+
+
+def test_table_page_pages():
+    df = make_table()
+    page = table_page(df, page_current=1, page_size=4)
+    assert [row["name"] for row in page] == ["pk4", "pk5", "pk6", "pk7"]
+    assert set(page[0]) == {"name", "5", "group"}
+    assert len(table_page(df, page_current=2, page_size=4)) == 2
+
+
+def test_table_page_sorts_by_non_string_label():
+    df = make_table()
+    sort_by = [{"column_id": "5", "direction": "desc"}]
+    page = table_page(df, page_current=0, page_size=3, sort_by=sort_by)
+    assert [row["5"] for row in page] == ["9.0", "8.0", "7.0"]
+
+
+def test_table_page_multi_sort():
+    df = make_table()
+    sort_by = [
+        {"column_id": "group", "direction": "asc"},
+        {"column_id": "5", "direction": "asc"},
+    ]
+    page = table_page(df, page_current=0, page_size=10, sort_by=sort_by)
+    expected = df.sort_values(["group", 5])["name"].tolist()
+    assert [row["name"] for row in page] == expected
+
+
+def test_paged_table_first_page():
+    df = make_table()
+    table = paged_table(df, "fit-table", page_size=4)
+    assert table.page_count == 3
+    assert [c["id"] for c in table.columns] == ["name", "5", "group"]
+    assert table.data == table_page(df, 0, 4)
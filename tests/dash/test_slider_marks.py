@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from fpbiolib import interval_range
+from fpbiolib.dash import slider_marks
+from fpbiolib.dash.slider_marks import (
+    linear_slider_marks,
+    log_slider_marks,
+    sci_num_format,
+)
+
+
+def uncached_linear_marks(x_min, x_max, e_notation=True, cap_e=False):
+    """linear_slider_marks before the cache"""
+    marks = {
+        i: sci_num_format(i, sci_note_lower=0.001, e_notation=e_notation, cap_e=cap_e)
+        for i in interval_range(x_min, x_max)
+    }
+    return {int(k) if k.is_integer() else k: v for k, v in marks.items()}
+
+
+def uncached_log_marks(
+    log_intervals, base=10, round_to_ord_mag=True, e_notation=True, cap_e=False
+):
+    """log_slider_marks before the cache"""
+    if round_to_ord_mag:
+        log_intervals = np.unique(np.rint(log_intervals))
+        return {
+            int(k): sci_num_format(
+                base**k,
+                sci_sig_figs=0,
+                sci_note_upper=10000,
+                sci_note_lower=0.001,
+                e_notation=e_notation,
+                cap_e=cap_e,
+            )
+            for k in log_intervals
+        }
+    marks = {(i): f"{base**i:#.3g}" for i in log_intervals[1:]}
+    return {int(k) if k.is_integer() else k: v for k, v in marks.items()}
+
+
+@pytest.mark.parametrize(
+    "x_min, x_max",
+    [(0, 1.2), (0, 100), (-3.5, 7.25), (1600, 1700), (0, 25000), (0.001, 0.004)],
+)
+@pytest.mark.parametrize(
+    "e_notation, cap_e", [(True, False), (False, False), (True, True)]
+)
+def test_linear_slider_marks_match_uncached(x_min, x_max, e_notation, cap_e):
+    expected = uncached_linear_marks(x_min, x_max, e_notation, cap_e)
+    for _ in range(2):  # computed, then from the cache
+        marks = linear_slider_marks(x_min, x_max, e_notation, cap_e)
+        assert marks == expected
+        assert [type(k) for k in marks] == [type(k) for k in expected]
+
+
+@pytest.mark.parametrize(
+    "log_intervals",
+    [
+        np.linspace(-3, 3, 7),
+        np.linspace(0, 5, 6),
+        np.linspace(-2.5, 1.5, 9),
+        np.array([-6, -4.5, -3]),
+    ],
+)
+@pytest.mark.parametrize("base", [10, 2])
+@pytest.mark.parametrize("round_to_ord_mag", [True, False])
+def test_log_slider_marks_match_uncached(log_intervals, base, round_to_ord_mag):
+    expected = uncached_log_marks(log_intervals, base, round_to_ord_mag)
+    for _ in range(2):
+        marks = log_slider_marks(log_intervals, base, round_to_ord_mag)
+        assert marks == expected
+        assert [type(k) for k in marks] == [type(k) for k in expected]
+
+
+def test_marks_are_cached_and_not_shared():
+    slider_marks._linear_slider_marks.cache_clear()
+    marks = linear_slider_marks(0, 10)
+    marks[0] = "changed"
+    marks.clear()
+
+    assert linear_slider_marks(0, 10) == uncached_linear_marks(0, 10)
+    assert slider_marks._linear_slider_marks.cache_info().hits == 1
+
+    log_marks = log_slider_marks(np.linspace(-3, 3, 7))
+    log_marks[0] = "changed"
+    assert log_slider_marks(np.linspace(-3, 3, 7))[0] == "1"
@@ -0,0 +1,81 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpbiolib import df_transforms, gaussian
+from fpbiolib.array_transforms import XAxis, y_at_x_values
+
+
+@pytest.mark.parametrize(
+    "x", [[1, 2, 3, np.nan, np.nan], [3, 2, 1, np.nan, np.nan], [2, np.nan, 1, 3, np.nan]]
+)
+@pytest.mark.parametrize("value", [-5, 1.4, 2.1, 2.5, 2.9, 10])
+def test_idx_val_skips_nan_padding(x, value):
+    df = pd.DataFrame({"x": x, "y": np.arange(len(x), dtype=float)})
+    expected = df["x"].sub(value).abs().idxmin()
+    assert df_transforms.idx_val(df, value) == expected
+
+
+@pytest.mark.parametrize("x", [np.linspace(0, 10, 101), np.linspace(10, 0, 101)])
+def test_nearest_idx_matches_scan(x):
+    xa = XAxis(x)
+    for value in np.linspace(-1, 11, 97):
+        assert xa.nearest_idx(value) == np.abs(x - value).argmin()
+
+
+def old_guess_heights(df, col, center_list, gain=0.95):
+    """gaussian.guess_heights before y_at_x_values: reinterpolate onto an
+    integer x grid and read the heights from a per-row map"""
+    df = df.set_index(df.columns[0])
+    df = df.reindex(np.arange(df.index.min(), df.index.max() + 1))
+    df = df.interpolate(method="linear").reset_index()
+    freq_map = {math.floor(x): y for x, y in zip(df.iloc[:, 0], df[col])}
+    return [gain * freq_map[center] for center in center_list]
+
+
+@pytest.mark.parametrize(
+    "x",
+    [
+        np.arange(1600.0, 1701.0),
+        np.arange(1700.0, 1599.0, -1),
+        np.arange(1600.0, 1700.5, 0.5),
+    ],
+)
+def test_guess_heights_matches_integer_grid_lookup(x, make_xy_df):
+    df = make_xy_df(x)
+    centers = [1600, 1624, 1633, 1650, 1687, 1700]
+    for col in ["a", "b"]:
+        np.testing.assert_allclose(
+            gaussian.guess_heights(df, col, centers),
+            old_guess_heights(df, col, centers),
+            rtol=1e-12,
+        )
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_y_at_x_values(descending):
+    x = np.linspace(0, 10, 11)
+    Y = np.column_stack([x**2, 3 * x + 1])
+    if descending:
+        x, Y = x[::-1], Y[::-1]
+    # On the grid, between grid points, and clamped outside the range
+    x_values = [0, 4, 2.5, 7.25, -1, 12]
+    expected = np.column_stack(
+        [[0, 16, 6.5, 52.75, 0, 100], [1, 13, 8.5, 22.75, 1, 31]]
+    )
+
+    np.testing.assert_allclose(y_at_x_values(x, Y, x_values), expected)
+    np.testing.assert_allclose(y_at_x_values(x, Y[:, 1], x_values), expected[:, 1])
+
+
+def test_y_at_x_values_unsorted_matches_interp():
+    rng = np.random.default_rng(0)
+    x = rng.permutation(np.linspace(0, 10, 41))
+    y = np.sin(x)
+    x_values = rng.uniform(-1, 11, 25)
+    order = np.argsort(x)
+    np.testing.assert_allclose(
+        y_at_x_values(x, y, x_values), np.interp(x_values, x[order], y[order])
+    )
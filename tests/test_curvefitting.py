@@ -0,0 +1,135 @@
+import numpy as np
+import pytest
+from lmfit import Parameters
+
+from fpbiolib.curvefitting import (
+    ComponentModel,
+    component_pks,
+    loss_and_grad,
+    loss_function,
+)
+from fpbiolib.lineshapes import (
+    gaussian,
+    linear_fun,
+    lorentzian,
+    ls_leach_scheraga,
+    pseudo_voigt,
+    rayleigh_mie,
+)
+from fpbiolib.reduction import (
+    reduce_cauchylogpdf,
+    reduce_chisquare,
+    reduce_huber,
+    reduce_negentropy,
+)
+
+X = np.linspace(200, 300, 201)
+
+# (lineshape, parameters of one component)
+COMPONENTS = [
+    (gaussian, [1.0, 240.0, 6.0]),
+    (lorentzian, [0.5, 260.0, 4.0]),
+    (gaussian, [0.8, 275.0, 3.0]),
+    (pseudo_voigt, [0.6, 230.0, 5.0, 0.3]),
+    (rayleigh_mie, [2.0e4, 0.05, 2.0]),
+    (ls_leach_scheraga, [3.0e3, 1.5]),
+    (linear_fun, [-0.01, 1.5]),
+]
+
+
+@pytest.fixture
+def model_and_params():
+    model = ComponentModel([f for f, _ in COMPONENTS])
+    params = np.concatenate([p for _, p in COMPONENTS])
+    return model, params
+
+
+def test_components_match_component_pks(model_and_params):
+    model, params = model_and_params
+    expected = np.vstack(
+        [component_pks(X, p, len(p), f) for f, p in COMPONENTS]
+    )
+    np.testing.assert_allclose(model.components(X, params), expected, rtol=1e-12)
+    # The linear component goes negative, and is zeroed there like component_pks
+    assert (model.components(X, params)[-1] >= 0).all()
+
+
+def test_evaluate_is_sum_of_lineshapes(model_and_params):
+    model, params = model_and_params
+    expected = sum(f(X, *p) for f, p in COMPONENTS)
+    np.testing.assert_allclose(model.evaluate(X, params), expected, rtol=1e-12)
+    np.testing.assert_allclose(model(X, *params), expected, rtol=1e-12)
+
+
+def test_jacobian_matches_finite_differences(model_and_params):
+    model, params = model_and_params
+    jac = model.jacobian(X, params)
+    assert jac.shape == (X.size, params.size)
+
+    numeric = np.empty_like(jac)
+    for k in range(params.size):
+        step = 1e-6 * max(abs(params[k]), 1.0)
+        up, down = params.copy(), params.copy()
+        up[k] += step
+        down[k] -= step
+        numeric[:, k] = (model.evaluate(X, up) - model.evaluate(X, down)) / (2 * step)
+    np.testing.assert_allclose(jac, numeric, rtol=1e-5, atol=1e-8)
+    np.testing.assert_allclose(model.residuals_jac(params, X, None), -jac)
+
+
+def test_lmfit_parameters(model_and_params):
+    model, params = model_and_params
+    lmfit_params = Parameters()
+    for k, value in enumerate(params):
+        lmfit_params.add(f"p{k}", value=value)
+    np.testing.assert_array_equal(
+        model.evaluate(X, lmfit_params), model.evaluate(X, params)
+    )
+
+
+def noisy_data(model, params):
+    """Model values plus noise, with a few outliers"""
+    rng = np.random.default_rng(0)
+    y = model.evaluate(X, params) + rng.normal(scale=0.05, size=X.size)
+    y[::40] += 1.0
+    return y
+
+
+def test_loss_function_defaults(model_and_params, capsys):
+    model, params = model_and_params
+    y = noisy_data(model, params)
+    resid = y - model.evaluate(X, params)
+
+    # verbose and reducer default to quiet chi-square
+    assert loss_function(params, X, y, model) == pytest.approx(np.sum(resid**2))
+    assert capsys.readouterr().out == ""
+
+    loss = loss_function(params, X, y, model, True, reduce_cauchylogpdf)
+    assert loss == pytest.approx(reduce_cauchylogpdf(resid))
+    assert capsys.readouterr().out.strip() == str(loss)
+
+
+@pytest.mark.parametrize(
+    "reducer",
+    [None, reduce_chisquare, reduce_negentropy, reduce_cauchylogpdf, reduce_huber],
+)
+def test_loss_and_grad_matches_finite_differences(model_and_params, reducer):
+    model, params = model_and_params
+    y = noisy_data(model, params)
+    # Away from the fitted values, so the residuals cover both Huber regimes
+    params = params * 1.01
+
+    loss, grad = loss_and_grad(params, X, y, model, model.jac, reducer)
+    assert loss == pytest.approx(loss_function(params, X, y, model, reducer=reducer))
+
+    numeric = np.empty_like(params)
+    for k in range(params.size):
+        step = 1e-6 * max(abs(params[k]), 1.0)
+        up, down = params.copy(), params.copy()
+        up[k] += step
+        down[k] -= step
+        numeric[k] = (
+            loss_function(up, X, y, model, reducer=reducer)
+            - loss_function(down, X, y, model, reducer=reducer)
+        ) / (2 * step)
+    np.testing.assert_allclose(grad, numeric, rtol=1e-4, atol=1e-6)
@@ -0,0 +1,59 @@
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+
+from fpbiolib.custom_plots import primary_graph
+
+X = np.linspace(0, 10, 201)
+BANDS = {"a": (1, 3, 0.5**0.5, 0), "b": (2, 5, 0.5**0.5, 0), "c": (3, 7, 0.5**0.5, 0)}
+
+
+@pytest.fixture
+def df(make_xy_df):
+    return make_xy_df(X, BANDS)
+
+
+@pytest.mark.parametrize("hide_reference_trace", [False, True])
+@pytest.mark.parametrize(
+    "options, trace_type, line_shape",
+    [
+        (dict(), go.Scatter, "spline"),
+        # Fast traces switch to WebGL once the plotted points exceed the
+        # threshold
+        (dict(fast=True), go.Scatter, "linear"),
+        (dict(fast=True, webgl_threshold=2 * 201 - 1), go.Scattergl, "linear"),
+        (dict(fast=True, webgl_threshold=0), go.Scattergl, "linear"),
+    ],
+)
+def test_primary_graph_trace_types(
+    df, options, trace_type, line_shape, hide_reference_trace
+):
+    args = dict(stack_value=0.5, hide_reference_trace=hide_reference_trace)
+    default, _ = primary_graph(df, "a", **args)
+    fig, _ = primary_graph(df, "a", **args, **options)
+
+    assert len(fig.data) == len(default.data) == 3 - hide_reference_trace
+    for trace, default_trace in zip(fig.data, default.data):
+        assert type(trace) is trace_type
+        assert trace.line.shape == line_shape
+        assert trace.name == default_trace.name
+        assert trace.line.color == default_trace.line.color
+        np.testing.assert_array_equal(trace.x, default_trace.x)
+        np.testing.assert_array_equal(trace.y, default_trace.y)
+
+
+def test_primary_graph_stack_offsets(df):
+    fig, _ = primary_graph(df, "a", stack_value=0.5, fast=True, webgl_threshold=0)
+    for trace, col, offset in zip(fig.data, "abc", [1.0, 0.5, 0.0]):
+        np.testing.assert_allclose(trace.y, df[col] + offset)
+
+
+def test_primary_graph_many_traces_use_webgl(make_xy_df):
+    # 300 traces of 401 points are over the default webgl_threshold
+    bands = {f"s{k}": (1, 2 + k / 50, 0.5, 0) for k in range(300)}
+    df = make_xy_df(np.linspace(0, 10, 401), bands)
+    fig, _ = primary_graph(df, "s0", fast=True)
+    default, _ = primary_graph(df, "s0")
+
+    assert {type(trace) for trace in fig.data} == {go.Scattergl}
+    np.testing.assert_array_equal(fig.data[-1].y, default.data[-1].y)
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpbiolib.dataset_registry import DatasetRegistry
+
+
+def upload(x, names, shift=0.0):
+    return pd.DataFrame({"x": x, **{n: np.sin(x + shift + k) for k, n in enumerate(names)}})
+
+
+def test_to_df_does_not_copy_columns():
+    x = np.linspace(0, 10, 200)
+    registry = DatasetRegistry()
+    registry.append(upload(x, ["a", "b", "c"]))
+    df = registry.to_df()
+
+    columns = {"x_data": registry._grid32, **registry._resampled}
+    for name, values in columns.items():
+        assert np.shares_memory(df[name].to_numpy(), values)
+
+    # An upload that fits the grid only adds its own traces, the existing
+    # arrays are reused as they are
+    before = dict(registry._resampled)
+    registry.append(upload(x[10:-10], ["d"], shift=0.5))
+    df = registry.to_df()
+    for name, values in before.items():
+        assert registry._resampled[name] is values
+        assert np.shares_memory(df[name].to_numpy(), values)
+    assert list(df.columns) == ["x_data", "a", "b", "c", "d"]
+
+
+def test_grid_extension_resamples_from_native_data():
+    x = np.linspace(0, 10, 200)
+    registry = DatasetRegistry()
+    registry.append(upload(x, ["a"]))
+    registry.to_df()
+    registry.append(upload(np.linspace(0, 20, 300), ["a"]))
+    df = registry.to_df()
+
+    assert list(df.columns) == ["x_data", "a", "a.1"]
+    grid = df["x_data"].to_numpy(dtype=float)
+    inside = grid <= 10
+    np.testing.assert_allclose(
+        df["a"].to_numpy()[inside], np.interp(grid[inside], x, np.sin(x)), atol=1e-5
+    )
+
+
+def old_combine(prev_df, df, cap=False, new_x=False):
+    """combine_uploaded_dfs before it used DatasetRegistry"""
+    from fpbiolib.df_cleanup import rename_dup_cols_in_two_dfs
+    from fpbiolib.df_transforms import many_x_y_to_x_many_y, x_many_y_to_many_x_y
+
+    prev_df = x_many_y_to_many_x_y(prev_df)
+    df1, df2 = rename_dup_cols_in_two_dfs(prev_df, df)
+    df = pd.concat([df1, df2], axis=1)
+    df = many_x_y_to_x_many_y(df, cap=cap, new_x=new_x)
+    df.reset_index(drop=True, inplace=True)
+    return df
+
+
+def many_x(*uploads):
+    """Many-x-y frame of (x, y) pairs, ragged uploads are NaN padded"""
+    pairs = []
+    for k, df in enumerate(uploads):
+        for name in df.columns[1:]:
+            pairs.append(df.iloc[:, 0].rename(f"x{k}-{name}"))
+            pairs.append(df[name])
+    return pd.concat(pairs, axis=1)
+
+
+@pytest.mark.parametrize("cap", [False, True])
+@pytest.mark.parametrize("new_x", [False, True])
+@pytest.mark.parametrize(
+    "prev, new",
+    [
+        (upload(np.linspace(0, 10, 100), ["a", "b"]), [upload(np.linspace(0, 10, 100), ["c"])]),
+        (
+            upload(np.linspace(0, 10, 100), ["a", "b"]),
+            [upload(np.linspace(-2, 12, 150), ["a", "b", "a.1"])],
+        ),
+        (
+            upload(np.linspace(0, 10, 6000), ["a"]),
+            [upload(np.linspace(1, 5, 50), ["p"]), upload(np.linspace(1, 9, 80), ["a"])],
+        ),
+    ],
+)
+def test_combine_uploaded_dfs_matches_concat(prev, new, cap, new_x):
+    from fpbiolib.df_transforms import combine_uploaded_dfs
+
+    new = many_x(*new)
+    expected = old_combine(prev.copy(), new.copy(), cap=cap, new_x=new_x)
+    prev_before, new_before = prev.copy(), new.copy()
+
+    combined = combine_uploaded_dfs(prev, new, cap=cap, new_x=new_x)
+
+    pd.testing.assert_frame_equal(combined, expected)
+    # The inputs are left as they were
+    pd.testing.assert_frame_equal(prev, prev_before)
+    pd.testing.assert_frame_equal(new, new_before)
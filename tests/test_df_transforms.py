@@ -0,0 +1,239 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.signal import find_peaks, savgol_filter
+
+from fpbiolib import df_transforms
+from fpbiolib.array_transforms import y_at_x_values
+from fpbiolib.df_cleanup import downcast_floats_and_ints
+
+
+def test_find_deriv_float32(make_xy_df):
+    df = make_xy_df(dtype="float32")
+    expected = -savgol_filter(
+        df.iloc[:, 1:].to_numpy(dtype=float), deriv=2, window_length=5, polyorder=3, axis=0
+    )
+
+    out = df_transforms.find_deriv(df, flip=True)
+
+    assert (out.dtypes.iloc[1:] == np.float64).all()
+    np.testing.assert_allclose(out.iloc[:, 1:].to_numpy(), expected, atol=1e-9)
+
+
+def test_smooth_and_derivs_float32(make_xy_df):
+    df = make_xy_df(dtype="float32")
+    derivs = df_transforms.smooth_and_derivs(df, orders=(0, 1))
+
+    for order, deriv_df in derivs.items():
+        expected = savgol_filter(
+            df.iloc[:, 1:].to_numpy(dtype=float),
+            deriv=order,
+            window_length=5,
+            polyorder=3,
+            axis=0,
+        )
+        np.testing.assert_allclose(deriv_df.iloc[:, 1:].to_numpy(), expected, atol=1e-9)
+    # The input is left as it was
+    assert (df.dtypes.iloc[1:] == np.float32).all()
+
+
+def shift_and_fill(df, shifts):
+    """The per-column shift then ffill/bfill that shift_columns replaces"""
+    df = df.copy()
+    for i, shift in enumerate(shifts):
+        df.iloc[:, i + 1] = df.iloc[:, i + 1].shift(-shift)
+    df.ffill(axis=0, inplace=True)
+    df.bfill(axis=0, inplace=True)
+    return df
+
+
+def test_shift_columns_fills_existing_nans(make_xy_df):
+    df = make_xy_df()
+    df.loc[[0, 10, 11, 50], "a"] = np.nan
+    df.loc[[3, 49], "b"] = np.nan
+    shifts = [2, -3]
+    expected = shift_and_fill(df, shifts)
+
+    out = df_transforms.shift_columns(df.copy(), shifts)
+
+    assert not out.isna().to_numpy().any()
+    pd.testing.assert_frame_equal(out, expected)
+
+
+def center_per_column(df, df_ctr_pks, thres, reference_trace):
+    """The per-column find_peaks loop that df_center replaces"""
+    x_val = df_ctr_pks.iloc[:, 0].values
+    xctrs = []
+    for i in range(len(df_ctr_pks.columns) - 1):
+        ctr_indexes, _ = find_peaks(np.asarray(df_ctr_pks.iloc[:, i + 1]), prominence=thres)
+        if ctr_indexes.size == 0:
+            return df
+        xctrs.append(x_val[ctr_indexes][0].tolist())
+    return df_transforms.shift_columns(
+        df, df_transforms._x_to_row_shifts(df, xctrs, reference_trace)
+    )
+
+
+@pytest.mark.parametrize("thres", [0.5, 5, 30, 500])
+def test_df_center_matches_per_column_find_peaks(make_xy_df, thres):
+    # A small side band before the main one, so the prominence threshold
+    # decides which peak is first, and a column edge that is its maximum
+    x = np.linspace(1600, 1700, 101)
+    bands = {
+        f"s{k}": (100 - 10 * k, 1645 + 2 * k, 5, 0) for k in range(5)
+    }
+    df = make_xy_df(x, bands)
+    df["s1"] += 20 * np.exp(-((x - 1620) ** 2) / 8)
+    df["s3"] += np.linspace(0, 150, 101)
+    expected = center_per_column(df.copy(), df.copy(), thres, "s2")
+
+    out = df_transforms.df_center(df.copy(), df.copy(), thres, "s2")
+
+    pd.testing.assert_frame_equal(out, expected)
+
+
+@pytest.mark.parametrize("missing", ["a", "b", "c"])
+def test_df_center_column_without_peak_returns_df(missing):
+    x = np.arange(6.0)
+    df = pd.DataFrame(
+        {"x": x, "a": [0, 1, 5, 1, 0, 0], "b": [0, 0, 1, 6, 1, 0], "c": [0, 1, 4, 1, 0, 0]},
+        dtype=float,
+    )
+    # A rising column has no peak
+    df[missing] = x
+    expected = center_per_column(df.copy(), df.copy(), 1, "a")
+
+    out = df_transforms.df_center(df.copy(), df.copy(), 1, "a")
+
+    pd.testing.assert_frame_equal(out, expected)
+    pd.testing.assert_frame_equal(out, df)
+
+
+def test_shift_columns_float32(make_xy_df):
+    df = make_xy_df(dtype="float32")
+    out = df_transforms.shift_columns(df.copy(), [1, -1])
+    np.testing.assert_array_equal(out["a"].to_numpy()[:-1], df["a"].to_numpy()[1:])
+    np.testing.assert_array_equal(out["b"].to_numpy()[1:], df["b"].to_numpy()[:-1])
+
+
+@pytest.mark.parametrize("window_length", [4, 5, 6, 7, 11])
+@pytest.mark.parametrize("order", [0, 1, 2, 3, 4])
+def test_savgol_block_matches_savgol_filter(window_length, order):
+    Y = np.random.default_rng(0).random((60, 3))
+    expected = savgol_filter(Y, window_length, 3, deriv=order, delta=0.5, axis=0)
+    np.testing.assert_allclose(
+        df_transforms._savgol_block(Y, order, window_length, False, delta=0.5),
+        expected,
+        atol=1e-9,
+    )
+
+
+def test_smooth_and_derivs_delta_scales_per_x_unit():
+    x = np.linspace(0, 2, 201)
+    df = pd.DataFrame({"x": x, "a": x**3})
+    dx = x[1] - x[0]
+    derivs = df_transforms.smooth_and_derivs(df, orders=(0, 1, 2), delta=dx)
+
+    np.testing.assert_allclose(derivs[0]["a"], x**3, atol=1e-9)
+    np.testing.assert_allclose(derivs[1]["a"], 3 * x**2, atol=1e-6)
+    np.testing.assert_allclose(derivs[2]["a"], 6 * x, atol=1e-6)
+    assert list(derivs[1].columns) == ["x", "a"]
+    assert derivs[1]["x"].equals(df["x"])
+
+
+def test_savgol_kernel_is_cached(make_xy_df):
+    df_transforms.savgol_kernel.cache_clear()
+    df_transforms.smooth_and_derivs(make_xy_df(), orders=(0, 2, 2))
+    df_transforms.find_deriv(make_xy_df(), flip=True)
+    info = df_transforms.savgol_kernel.cache_info()
+    assert info.misses == 2 and info.hits == 2
+
+
+def many_x_y_per_trace(df, x_new=None):
+    """The per-trace np.interp and concat that _interp_pairs_to_df replaces,
+    by default onto many_x_y_to_x_many_y's rounded x range"""
+    if x_new is None:
+        x_min = df.iloc[:, ::2].min().min()
+        x_max = df.iloc[:, ::2].max().max()
+        x_new = np.linspace(
+            math.ceil(x_min * 100) / 100, math.floor(x_max * 100) / 100, len(df)
+        )
+    proc_df = pd.DataFrame(x_new, columns=["x_data"])
+    for j in range(0, len(df.columns) - 1, 2):
+        x = np.asarray(df.iloc[:, j].dropna())
+        y = np.asarray(df.iloc[:, j + 1].dropna())
+        min_size = min(x.size, y.size)
+        y_new = np.interp(x_new, x[:min_size], y[:min_size])
+        proc_df = pd.concat([proc_df, pd.Series(y_new, name=df.columns[j + 1])], axis=1)
+    return downcast_floats_and_ints(proc_df)
+
+
+def many_x_y_df(traces):
+    """x, y, x, y, ... frame from {name: (x, y)}, NaN padded to equal length"""
+    columns = {}
+    for name, (x, y) in traces.items():
+        columns[f"{name}_x"] = pd.Series(x)
+        columns[name] = pd.Series(y)
+    return pd.DataFrame(columns)
+
+
+def band(x, center):
+    return np.exp(-((x - center) ** 2) / 50)
+
+
+SHARED_X = np.linspace(1600, 1700, 201)
+OTHER_X = np.linspace(1590.5, 1695.25, 150)
+RESAMPLE_CASES = {
+    "shared": {
+        "a": (SHARED_X, band(SHARED_X, 1640)),
+        "b": (SHARED_X, band(SHARED_X, 1650)),
+        "c": (SHARED_X, band(SHARED_X, 1660)),
+    },
+    "different": {
+        "a": (SHARED_X, band(SHARED_X, 1640)),
+        "b": (OTHER_X, band(OTHER_X, 1650)),
+        "c": (SHARED_X[::3], band(SHARED_X[::3], 1660)),
+    },
+    "mixed": {
+        "a": (SHARED_X, band(SHARED_X, 1640)),
+        "b": (OTHER_X, band(OTHER_X, 1650)),
+        "c": (SHARED_X, band(SHARED_X, 1660)),
+    },
+}
+
+
+@pytest.mark.parametrize("case", list(RESAMPLE_CASES))
+@pytest.mark.parametrize("x_data", [[], np.linspace(1610, 1690, 33)])
+def test_many_x_y_to_x_many_y_matches_per_trace(case, x_data):
+    df = many_x_y_df(RESAMPLE_CASES[case])
+    out = df_transforms.many_x_y_to_x_many_y(df, x_data=x_data)
+    expected = many_x_y_per_trace(df, x_data if len(x_data) else None)
+
+    assert (out.dtypes == np.float32).all()
+    assert list(out.columns) == ["x_data", "a", "b", "c"]
+    pd.testing.assert_frame_equal(out, expected)
+
+
+def test_many_x_y_to_x_many_y_descending_x():
+    # np.interp needs ascending x, so compare with the ascending frame
+    traces = RESAMPLE_CASES["mixed"]
+    descending = {name: (x[::-1], y[::-1]) for name, (x, y) in traces.items()}
+    out = df_transforms.many_x_y_to_x_many_y(many_x_y_df(descending))
+    expected = df_transforms.many_x_y_to_x_many_y(many_x_y_df(traces))
+
+    assert (out.dtypes == np.float32).all()
+    pd.testing.assert_frame_equal(out, expected)
+
+
+def test_many_x_y_shared_x_is_one_batch(monkeypatch):
+    calls = []
+
+    def counting_y_at_x_values(x, y, x_values):
+        calls.append(np.shape(y))
+        return y_at_x_values(x, y, x_values)
+
+    monkeypatch.setattr(df_transforms, "y_at_x_values", counting_y_at_x_values)
+    df_transforms.many_x_y_to_x_many_y(many_x_y_df(RESAMPLE_CASES["mixed"]))
+    assert sorted(calls) == [(150, 1), (201, 2)]
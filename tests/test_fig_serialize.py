@@ -0,0 +1,76 @@
+import numpy as np
+import plotly.graph_objects as go
+
+from fpbiolib import fig_serialize
+
+
+def make_fig():
+    rng = np.random.default_rng(0)
+    x = np.linspace(1600, 1700, 5000)
+    fig = go.Figure()
+    for _ in range(3):
+        fig.add_scatter(x=x, y=rng.random(x.size))
+    fig.add_heatmap(z=rng.random((20, 30)))
+    return fig
+
+
+def decode(spec):
+    import base64
+
+    a = np.frombuffer(base64.b64decode(spec["bdata"]), dtype=spec["dtype"])
+    if "shape" in spec:
+        a = a.reshape([int(n) for n in spec["shape"].split(",")])
+    return a
+
+
+def test_single_precision_is_smaller():
+    fig = make_fig()
+    for obj in (fig, fig.to_dict(), fig.to_plotly_json()):
+        full = fig_serialize.fig_to_json_bytes(obj, engine="json")
+        single = fig_serialize.fig_to_json_bytes(obj, single_precision=True, engine="json")
+        assert len(single) < 0.6 * len(full)
+
+
+def test_single_precision_values():
+    fig = make_fig()
+    decoded = fig_serialize.fig_from_json(
+        fig_serialize.fig_to_json_bytes(fig, single_precision=True, engine="json")
+    )
+    y = decoded["data"][0]["y"]
+    assert y["dtype"] == "f4"
+    np.testing.assert_array_equal(decode(y), fig.data[0].y.astype(np.float32))
+    z = decoded["data"][3]["z"]
+    assert z["dtype"] == "f4"
+    np.testing.assert_array_equal(decode(z), fig.data[3].z.astype(np.float32))
+
+
+def test_raw_arrays_in_dict_are_encoded():
+    y = np.arange(10.0)
+    encoded = fig_serialize.encode_arrays({"data": [{"y": y}]})
+    np.testing.assert_array_equal(decode(encoded["data"][0]["y"]), y)
+
+
+def test_iter_fig_html_matches_to_html():
+    import base64
+
+    import plotly.io as pio
+
+    fig = make_fig()
+    fig.update_layout(title_text="</script> & ü")
+    kwargs = dict(include_plotlyjs=False, div_id="fig-div")
+    expected = pio.to_html(
+        fig_serialize.encode_arrays(fig, single_precision=True), validate=False, **kwargs
+    ).encode("utf-8")
+
+    chunks = list(
+        fig_serialize.iter_fig_html(fig, chunk_size=4096, single_precision=True, **kwargs)
+    )
+    assert b"".join(chunks) == expected
+    assert all(len(chunk) == 4096 for chunk in chunks[:-1])
+    assert len(chunks) > 10
+
+    encoded = fig_serialize.iter_fig_html_base64(fig, chunk_size=1000, **kwargs)
+    html = base64.b64decode("".join(encoded))
+    assert html == pio.to_html(
+        fig_serialize.encode_arrays(fig), validate=False, **kwargs
+    ).encode("utf-8")
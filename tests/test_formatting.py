@@ -0,0 +1,47 @@
+import pytest
+
+from fpbiolib.formatting import (
+    fallback_char_widths,
+    font_widths,
+    str_px_width,
+    str_px_widths,
+    text_px_width,
+)
+
+FONT = "open_sans_12pt_px"
+
+
+def reference_width(text, font=FONT):
+    """Plain dictionary lookup, as str_px_width measured text before"""
+    return sum(font_widths[font].get(c, fallback_char_widths[font]) for c in text)
+
+
+@pytest.mark.parametrize("text", ["", "a", "Sample 1", "1650.25", "Amide I (cm-1)"])
+def test_text_px_width_matches_font_widths(text):
+    assert text_px_width(text) == reference_width(text)
+
+
+@pytest.mark.parametrize("text", ["+", "α-helix", "€ 12", "\U0001f600"])
+def test_unknown_characters_use_fallback_width(text):
+    fallback = fallback_char_widths[FONT]
+    missing = [c for c in text if c not in font_widths[FONT]]
+    assert missing
+    assert text_px_width(text) == reference_width(text)
+    known = "".join(c for c in text if c in font_widths[FONT])
+    assert text_px_width(text) - text_px_width(known) == fallback * len(missing)
+
+
+def test_str_px_width_minimum_and_format():
+    assert str_px_width("") == "11px"
+    assert str_px_width("i") == "11px"
+    assert str_px_width(1650) == f"{reference_width('1650')}px"
+
+
+def test_str_px_widths_matches_str_px_width():
+    texts = ["a", "Sample 1", "+", "Sample 1", 1650, "a"]
+    assert str_px_widths(texts) == [str_px_width(t) for t in texts]
+
+
+def test_unknown_font():
+    with pytest.raises(ValueError):
+        text_px_width("abc", font="no_such_font")
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpbiolib.ftir_band_assignments import yang_h20_2015
+from fpbiolib.gaussian import (
+    fit_secondary_structure_batch,
+    gaussian,
+    gaussian_jacobian,
+    gaussian_list,
+    gaussian_peaks,
+    gaussian_sum,
+    interpolate_dataframe,
+)
+
+X = np.linspace(1600, 1700, 401)
+PARAMS = [0.8, 1625.0, 6.0, 1.0, 1650.0, 9.0, 0.3, 1685.0, 4.0]
+
+
+def test_gaussian_peaks_match_scalar_gaussian():
+    peaks = gaussian_peaks(X, PARAMS)
+    expected = [gaussian(X, *PARAMS[k : k + 3]) for k in range(0, len(PARAMS), 3)]
+    np.testing.assert_allclose(peaks, expected, rtol=1e-14)
+    np.testing.assert_allclose(
+        gaussian_sum(X, *PARAMS), np.sum(expected, axis=0), rtol=1e-14
+    )
+    assert len(gaussian_list(X, *PARAMS)) == 3
+
+
+def test_gaussian_jacobian_matches_finite_differences():
+    params = np.array(PARAMS)
+    jac = gaussian_jacobian(X, params)
+    assert jac.shape == (X.size, params.size)
+
+    numeric = np.empty_like(jac)
+    for k in range(params.size):
+        step = 1e-6 * max(abs(params[k]), 1.0)
+        up, down = params.copy(), params.copy()
+        up[k] += step
+        down[k] -= step
+        numeric[:, k] = (gaussian_sum(X, *up) - gaussian_sum(X, *down)) / (2 * step)
+    np.testing.assert_allclose(jac, numeric, rtol=1e-6, atol=1e-9)
+
+
+def test_interpolate_dataframe_fills_integer_x():
+    df = pd.DataFrame({"x": [1600.0, 1602.0, 1605.0], "a": [0.0, 2.0, 5.0]})
+    out = interpolate_dataframe(df)
+    assert list(out.columns) == ["x", "a"]
+    np.testing.assert_array_equal(out["x"], np.arange(1600, 1606))
+    np.testing.assert_allclose(out["a"], np.arange(6.0))
+    assert len(df) == 3
+
+
+def test_params_must_be_triplets():
+    with pytest.raises(ValueError):
+        gaussian_jacobian(X, PARAMS[:-1])
+
+
+@pytest.fixture
+def amide_spectra():
+    """Synthetic amide I spectra built from the yang_h20_2015 bands, with
+    different band heights per sample"""
+    x = np.arange(1600.0, 1701.0)
+    rng = np.random.default_rng(0)
+    spectra = {"x": x}
+    for k in range(3):
+        params = []
+        for mean in yang_h20_2015["means"]:
+            params.extend([rng.uniform(0.05, 0.5), mean, 4.0])
+        spectra[f"s{k}"] = gaussian_sum(x, *params)
+    return pd.DataFrame(spectra)
+
+
+def test_fit_secondary_structure_batch_pool_matches_serial(amide_spectra):
+    serial = fit_secondary_structure_batch(amide_spectra, n_jobs=1)
+    pooled = fit_secondary_structure_batch(amide_spectra, n_jobs=2)
+    pd.testing.assert_frame_equal(serial, pooled)
+
+
+def test_fit_secondary_structure_batch_fractions(amide_spectra):
+    fits = fit_secondary_structure_batch(amide_spectra, n_jobs=1)
+    n_bands = len(yang_h20_2015["means"])
+    assert list(fits["sample"].unique()) == ["s0", "s1", "s2"]
+    assert (fits.groupby("sample").size() == n_bands).all()
+
+    np.testing.assert_allclose(fits.groupby("sample")["area_fraction"].sum(), 1)
+    structures = fits.drop_duplicates(["sample", "assignment"])
+    np.testing.assert_allclose(
+        structures.groupby("sample")["structure_fraction"].sum(), 1
+    )
@@ -0,0 +1,140 @@
+import numpy as np
+import pytest
+
+from fpbiolib import df_transforms, normalize
+
+
+@pytest.mark.parametrize("dtype", ["float32", "int64"])
+@pytest.mark.parametrize(
+    "norm", [normalize.df_area_norm, normalize.df_min_max_norm, df_transforms.df_area_norm]
+)
+def test_df_norms_upcast_float32_and_int(norm, dtype, make_xy_df):
+    df = make_xy_df(dtype=dtype)
+    expected = df.iloc[:, 1:].to_numpy(dtype=float)
+    x = df["x"].to_numpy()
+    if norm is normalize.df_min_max_norm:
+        expected = expected - expected.min(axis=0)
+        expected = expected / expected.max(axis=0)
+    else:
+        expected = expected / np.abs(np.trapezoid(np.abs(expected), x, axis=0))
+
+    out = norm(df)
+
+    assert (out.dtypes.iloc[1:] == np.float64).all()
+    np.testing.assert_allclose(out.iloc[:, 1:].to_numpy(), expected)
+
+
+@pytest.fixture
+def block(make_xy_df):
+    df = make_xy_df()
+    return df["x"].to_numpy(), df.iloc[:, 1:].to_numpy()
+
+
+def band_rows(x):
+    return (x >= 1620) & (x <= 1660)
+
+
+# Each normalization and the same calculation done column by column
+REFERENCES = {
+    "vector": (
+        lambda Y, x, **kw: normalize.vector_norm(Y, **kw),
+        lambda y, x: y / np.sqrt(np.sum(y**2)),
+    ),
+    "snv": (
+        lambda Y, x, **kw: normalize.snv(Y, **kw),
+        lambda y, x: (y - y.mean()) / np.std(y, ddof=1),
+    ),
+    "peak_height": (
+        lambda Y, x, **kw: normalize.peak_height_norm(Y, x, x_range=(1660, 1620), **kw),
+        lambda y, x: y / y[band_rows(x)].max(),
+    ),
+    "internal_standard_area": (
+        lambda Y, x, **kw: normalize.internal_standard_norm(Y, x, (1620, 1660), **kw),
+        lambda y, x: y / abs(np.trapezoid(y[band_rows(x)], x[band_rows(x)])),
+    ),
+    "internal_standard_height": (
+        lambda Y, x, **kw: normalize.internal_standard_norm(
+            Y, x, (1620, 1660), measure="height", **kw
+        ),
+        lambda y, x: y / y[band_rows(x)].max(),
+    ),
+}
+
+
+@pytest.mark.parametrize("name", list(REFERENCES))
+def test_norm_values(block, name):
+    x, Y = block
+    norm, reference = REFERENCES[name]
+    expected = np.column_stack([reference(Y[:, i], x) for i in range(Y.shape[1])])
+
+    out = norm(Y, x)
+
+    np.testing.assert_allclose(out, expected)
+    assert out is not Y
+
+
+@pytest.mark.parametrize("name", list(REFERENCES))
+def test_norm_inplace(block, name):
+    x, Y = block
+    norm, _ = REFERENCES[name]
+    expected = norm(Y, x)
+
+    out = norm(Y, x, inplace=True)
+
+    assert out is Y
+    np.testing.assert_allclose(Y, expected)
+
+
+@pytest.mark.parametrize("name", list(REFERENCES))
+def test_norm_inplace_int_raises(block, name):
+    # An int buffer can't hold the result, it must not be truncated into it
+    x, Y = block
+    norm, _ = REFERENCES[name]
+    with pytest.raises(TypeError):
+        norm(np.round(Y * 100).astype(int), x, inplace=True)
+
+
+def test_norm_leaves_zero_traces_unchanged(block):
+    x, Y = block
+    Y = np.column_stack([Y, np.zeros_like(x)])
+    np.testing.assert_array_equal(normalize.vector_norm(Y)[:, -1], 0)
+    np.testing.assert_array_equal(normalize.area_norm(Y, x)[:, -1], 0)
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32", "int64"])
+@pytest.mark.parametrize(
+    "method, kwargs, name",
+    [
+        ("vector", {}, "vector"),
+        ("snv", {}, "snv"),
+        ("peak_height", {"x_range": (1660, 1620)}, "peak_height"),
+        ("internal_standard", {"x_range": (1620, 1660)}, "internal_standard_area"),
+        (
+            "internal_standard",
+            {"x_range": (1620, 1660), "measure": "height"},
+            "internal_standard_height",
+        ),
+    ],
+)
+def test_df_normalize(make_xy_df, dtype, method, kwargs, name):
+    df = make_xy_df(dtype=dtype)
+    x = df["x"].to_numpy()
+    _, reference = REFERENCES[name]
+    expected = np.column_stack(
+        [reference(df[col].to_numpy(dtype=float), x) for col in df.columns[1:]]
+    )
+
+    out = normalize.df_normalize(df, method, **kwargs)
+
+    assert out is df
+    assert (out.dtypes.iloc[1:] == np.float64).all()
+    np.testing.assert_allclose(out.iloc[:, 1:].to_numpy(), expected)
+
+
+def test_df_normalize_unknown_method(make_xy_df):
+    with pytest.raises(ValueError):
+        normalize.df_normalize(make_xy_df(), "median")
+    with pytest.raises(ValueError):
+        normalize.df_normalize(
+            make_xy_df(), "internal_standard", x_range=(1620, 1660), measure="mean"
+        )
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from scipy.stats import cauchy, norm
+
+from fpbiolib.reduction import (
+    reduce_cauchylogpdf,
+    reduce_chisquare,
+    reduce_huber,
+    reduce_negentropy,
+)
+
+# Residuals on both sides of the Huber delta, but not on it
+R = np.random.default_rng(0).normal(scale=1.5, size=50)
+R = R[np.abs(np.abs(R) - 1.0) > 1e-3]
+
+# Each reducer and the scipy.stats form it replaces
+REDUCERS = [
+    (reduce_chisquare, lambda r: (r * r).sum()),
+    (reduce_negentropy, lambda r: (norm.pdf(r) * norm.logpdf(r)).sum()),
+    (reduce_cauchylogpdf, lambda r: -cauchy.logpdf(r).sum()),
+    (
+        reduce_huber,
+        lambda r: np.where(np.abs(r) <= 1, 0.5 * r * r, np.abs(r) - 0.5).sum(),
+    ),
+]
+
+
+@pytest.mark.parametrize("reducer, expected", REDUCERS)
+def test_reducer_values(reducer, expected):
+    np.testing.assert_allclose(reducer(R), expected(R), rtol=1e-12)
+    loss, _ = reducer(R, grad=True)
+    assert loss == reducer(R)
+
+
+@pytest.mark.parametrize("reducer", [reducer for reducer, _ in REDUCERS])
+def test_reducer_gradient_matches_finite_differences(reducer):
+    _, grad = reducer(R, grad=True)
+    assert grad.shape == R.shape
+
+    step = 1e-6
+    numeric = np.empty_like(R)
+    for k in range(R.size):
+        up, down = R.copy(), R.copy()
+        up[k] += step
+        down[k] -= step
+        numeric[k] = (reducer(up) - reducer(down)) / (2 * step)
+    np.testing.assert_allclose(grad, numeric, rtol=1e-6, atol=1e-8)
+
+
+def test_huber_delta():
+    r = np.array([-3.0, -0.5, 0.2, 2.5])
+    loss, grad = reduce_huber(r, delta=2.0, grad=True)
+    assert loss == pytest.approx(2 * (3 - 1) + 0.125 + 0.02 + 2 * (2.5 - 1))
+    np.testing.assert_array_equal(grad, [-2.0, -0.5, 0.2, 2.0])
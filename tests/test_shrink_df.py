@@ -0,0 +1,111 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpbiolib.shrink_df import df_downsample, lttb_indices, minmax_decimate
+
+
+@pytest.fixture
+def noisy():
+    """Noisy traces with one narrow spike each, the peaks decimation must keep"""
+    rng = np.random.default_rng(1)
+    x = np.linspace(1000, 2000, 10_001)
+    Y = rng.normal(size=(x.size, 4)).cumsum(axis=0)
+    for k, pos in enumerate([17, 5000, 7777, 10_000]):
+        Y[pos, k] += 500 * (-1) ** k
+    return x, Y
+
+
+@pytest.mark.parametrize("n_out", [100, 333, 2000])
+def test_minmax_keeps_every_bucket_extremes(noisy, n_out):
+    x, Y = noisy
+    x_out, Y_out = minmax_decimate(x, Y, n_out)
+
+    bucket_len = math.ceil(x.size / (n_out // 2))
+    starts = np.arange(0, x.size, bucket_len)
+    assert Y_out.shape == (2 * starts.size, Y.shape[1])
+    assert len(Y_out) <= n_out
+    for b, start in enumerate(starts):
+        bucket = Y[start : start + bucket_len]
+        pair = Y_out[2 * b : 2 * b + 2]
+        np.testing.assert_array_equal(pair.min(axis=0), bucket.min(axis=0))
+        np.testing.assert_array_equal(pair.max(axis=0), bucket.max(axis=0))
+        assert x_out[2 * b] == x[start]
+        assert x_out[2 * b + 1] == x[min(start + bucket_len, x.size) - 1]
+
+    np.testing.assert_array_equal(Y_out.max(axis=0), Y.max(axis=0))
+    np.testing.assert_array_equal(Y_out.min(axis=0), Y.min(axis=0))
+
+
+def test_minmax_order_within_bucket():
+    x = np.arange(8.0)
+    y = np.array([0, 9, 1, -5, 3, -2, 7, 4.0])
+    _, y_out = minmax_decimate(x, y, 4)
+    # Buckets [0, 9, 1, -5] and [3, -2, 7, 4], max before min in the first
+    np.testing.assert_array_equal(y_out, [9, -5, -2, 7])
+
+
+def test_minmax_ignores_nan_and_passes_short_input(noisy):
+    x, Y = noisy
+    Y = Y.copy()
+    Y[::7, 1] = np.nan
+    _, Y_out = minmax_decimate(x, Y, 500)
+    assert not np.isnan(Y_out).any()
+    assert Y_out[:, 1].max() == np.nanmax(Y[:, 1])
+
+    x_out, Y_out = minmax_decimate(x[:50], Y[:50], 100)
+    np.testing.assert_array_equal(x_out, x[:50])
+    np.testing.assert_array_equal(Y_out, Y[:50])
+
+
+def lttb_reference(x, y, n_out):
+    """Single trace LTTB, one point at a time"""
+    n = x.size
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = [0]
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < edges.size else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        a = selected[-1]
+        best, best_area = lo, -1.0
+        for p in range(lo, hi):
+            area = abs((x[a] - avg_x) * (y[p] - y[a]) - (x[a] - x[p]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = p, area
+        selected.append(best)
+    selected.append(n - 1)
+    return np.array(selected)
+
+
+def test_lttb_indices(noisy):
+    x, Y = noisy
+    x, Y = x[:1201], Y[:1201]
+    n_out = 150
+    selected = lttb_indices(x, Y, n_out)
+
+    assert selected.shape == (n_out, Y.shape[1])
+    np.testing.assert_array_equal(selected[0], 0)
+    np.testing.assert_array_equal(selected[-1], x.size - 1)
+    assert np.all(np.diff(selected, axis=0) > 0)
+    # The spike in the first trace is picked
+    assert 17 in selected[:, 0]
+    for k in range(Y.shape[1]):
+        np.testing.assert_array_equal(selected[:, k], lttb_reference(x, Y[:, k], n_out))
+
+
+def test_df_downsample_layouts(noisy):
+    x, Y = noisy
+    df = pd.DataFrame(Y, columns=list("abcd"))
+    df.insert(0, "x", x)
+
+    out = df_downsample(df, 200, method="minmax")
+    assert list(out.columns) == ["x", "a", "b", "c", "d"]
+    assert out["d"].max() == df["d"].max()
+
+    out = df_downsample(df, 200, method="lttb")
+    assert list(out.columns[:4]) == ["a x", "a", "b x", "b"]
+    assert len(out) == 200
+    assert out["a"].iloc[0] == df["a"].iloc[0]
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from fpbiolib.similarity import R2, dca, overlap, similarity_matrix, wsd
+
+PAIRWISE = {
+    "wsd": lambda x, y, y_fit: wsd(y, y_fit),
+    "dca": lambda x, y, y_fit: dca(x, y, y_fit),
+    "r2": lambda x, y, y_fit: R2(y, y_fit),
+    "overlap": overlap,
+}
+
+
+@pytest.fixture
+def traces(make_xy_df):
+    """Shifted and rescaled bands, with one negative trace for overlap"""
+    rng = np.random.default_rng(0)
+    bands = {
+        f"s{k}": (rng.uniform(0.5, 2), rng.uniform(1620, 1680), rng.uniform(4, 10), 0)
+        for k in range(23)
+    }
+    df = make_xy_df(np.linspace(1600, 1700, 121), bands)
+    df["s0"] = -df["s0"]
+    return df.iloc[:, 0].to_numpy(), df.iloc[:, 1:].to_numpy()
+
+
+@pytest.mark.parametrize("metric", list(PAIRWISE))
+@pytest.mark.parametrize("block_size", [5, 256])
+def test_similarity_matrix_matches_pairwise(traces, metric, block_size):
+    x, Y = traces
+    n = Y.shape[1]
+    expected = np.array(
+        [[PAIRWISE[metric](x, Y[:, i], Y[:, j]) for j in range(n)] for i in range(n)]
+    )
+
+    matrix = similarity_matrix(Y, metric=metric, x=x, block_size=block_size, n_jobs=2)
+
+    np.testing.assert_allclose(matrix, expected, rtol=1e-7, atol=1e-9)
+
+
+def test_similarity_matrix_memmap(traces, tmp_path):
+    x, Y = traces
+    path = str(tmp_path / "dca.npy")
+    similarity_matrix(Y, metric="dca", block_size=8, out=path)
+    np.testing.assert_allclose(np.load(path), similarity_matrix(Y, metric="dca"))
+
+
+def test_unknown_metric(traces):
+    with pytest.raises(ValueError):
+        similarity_matrix(traces[1], metric="cosine")
+
+
+@pytest.mark.parametrize("metric", ["wsd", "r2"])
+def test_similarity_matrix_near_duplicates(traces, metric):
+    # Traces differing by ~1e-5, where expanded-norm forms lose all precision
+    x, Y = traces
+    rng = np.random.default_rng(1)
+    Y = Y[:, :1] + rng.normal(scale=1e-5, size=(Y.shape[0], 6))
+    expected = np.array(
+        [[PAIRWISE[metric](x, Y[:, i], Y[:, j]) for j in range(6)] for i in range(6)]
+    )
+
+    matrix = similarity_matrix(Y, metric=metric, block_size=4)
+
+    np.testing.assert_allclose(matrix, expected, rtol=1e-10, atol=1e-15)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpbiolib.similarity import dca, overlap
+from fpbiolib.spectral_index import SpectralIndex
+
+X = np.linspace(1600, 1700, 301)
+
+
+def library_df(n=300, seed=0):
+    """Library of spectra made of three gaussian bands each"""
+    rng = np.random.default_rng(seed)
+    centers, widths, heights = (
+        rng.uniform(1610, 1690, (3, n)),
+        rng.uniform(3, 12, (3, n)),
+        rng.uniform(0.2, 1.0, (3, n)),
+    )
+    bands = heights * np.exp(-((X[:, None, None] - centers) ** 2) / (2 * widths**2))
+    df = pd.DataFrame(bands.sum(axis=1), columns=[f"ref{i}" for i in range(n)])
+    df.insert(0, "x", X)
+    return df
+
+
+def brute_force(df, x, y, metric, k):
+    """Score the query against every library spectrum on the library x"""
+    x_lib = df.iloc[:, 0].to_numpy()
+    Y = df.iloc[:, 1:].to_numpy()
+    order = np.argsort(x)
+    y = np.interp(x_lib, x[order], y[order])
+    if metric == "dca":
+        scores = dca(x_lib, y, Y)
+    else:
+        scores = overlap(x_lib, y, Y)
+    best = np.argsort(-scores)[:k]
+    return df.columns[1:][best].tolist(), scores[best]
+
+
+@pytest.mark.parametrize("metric", ["dca", "overlap"])
+def test_query_matches_brute_force(metric):
+    df = library_df()
+    index = SpectralIndex(df)
+    rng = np.random.default_rng(1)
+    for ref in rng.choice(df.columns[1:], 5, replace=False):
+        # A rescaled copy of a library spectrum, on its own x values
+        x = np.linspace(1700, 1600, 250)
+        y = 3 * np.interp(x, X, df[ref])
+
+        hits = index.query(x, y, k=5, metric=metric, n_candidates=len(index))
+        names, scores = brute_force(df, x, y, metric, 5)
+        assert hits["name"].tolist() == names
+        np.testing.assert_allclose(hits["score"], scores, rtol=1e-4)
+
+        prefiltered = index.query(x, y, k=5, metric=metric)
+        assert prefiltered["name"].iloc[0] == names[0]
+
+
+def test_num_rows_resamples_library():
+    df = library_df(n=20)
+    index = SpectralIndex(df, num_rows=101)
+    np.testing.assert_allclose(index.x, np.linspace(1600, 1700, 101))
+    assert index.library.shape == (20, 101)
+    hits = index.query(X, df["ref7"].to_numpy(), k=1, metric="dca")
+    assert hits["name"].iloc[0] == "ref7"
+
+
+def test_save_load(tmp_path):
+    index = SpectralIndex(library_df(n=20))
+    index.save(tmp_path / "library.npz")
+    loaded = SpectralIndex.load(tmp_path / "library.npz")
+    y = library_df(n=20)["ref3"].to_numpy()
+    pd.testing.assert_frame_equal(loaded.query(X, y), index.query(X, y))
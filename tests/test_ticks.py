@@ -0,0 +1,114 @@
+import math
+
+import numpy as np
+import pytest
+
+from fpbiolib.custom_plots import axis_ticks, magnitude, rounddown, roundup
+from fpbiolib.ticks import axis_ticks_many
+
+
+def scalar_axis_ticks(a_min, zoom, dfmax, y_ax):
+    """axis_ticks as it was before the ticks module, one axis at a time
+    with Python float math"""
+    if not y_ax:
+        zoom = 1
+    a_min = a_min / zoom
+    a_max = dfmax / zoom
+    delta_mag = magnitude(abs(a_max - a_min))
+    tick_low = rounddown(a_min, 10 ** (int(delta_mag)))
+    tick_hi = roundup(a_max, 10 ** (int(delta_mag)))
+    dif_norm = a_max / 10**delta_mag - a_min / 10**delta_mag
+    if dif_norm >= 5:
+        tick_spc_maj = 10 ** (int(delta_mag))
+        tick_vals = list(np.arange(tick_low, tick_hi * zoom, tick_spc_maj / 5))
+    else:
+        tick_spc_maj = (10 ** (int(delta_mag))) / 2
+        tick_vals = list(np.arange(tick_low, tick_hi * zoom, tick_spc_maj / 5 * zoom))
+    tick_vals_major = list(np.arange(tick_low, tick_hi * zoom, tick_spc_maj))
+
+    mag_a_max = magnitude(a_max)
+    s = -mag_a_max + 2 if mag_a_max <= 1 else 0
+    if abs(tick_vals[0]) >= 10000 or abs(tick_vals[-1]) >= 10000:
+        tick_txt_major = ["{:.2e}".format(x) for x in tick_vals_major]
+    else:
+        tick_txt_major = ["{:.{}f}".format(x, s) for x in tick_vals_major]
+    return (
+        a_min,
+        a_max,
+        tick_vals,
+        ["" for x in tick_vals],
+        tick_vals_major,
+        tick_txt_major,
+    )
+
+
+# (a_min, a_max, zoom, y_ax), number of minor ticks, major tick labels.
+# The log axes are the log10 of the data range, as plotted after log_df.
+KNOWN_TICKS = [
+    ((0, 100, 1, True), 10, ["0", "50"]),
+    (
+        (11, 87, 1, True),
+        40,
+        ["10.0", "20.0", "30.0", "40.0", "50.0", "60.0", "70.0", "80.0"],
+    ),
+    ((0, 1.2, 1, True), 20, ["0.00", "0.50", "1.00", "1.50"]),
+    ((-50, 50, 1, True), 20, ["-100.0", "-50.0", "0.0", "50.0"]),
+    ((-0.003, 0.0075, 1, True), 20, ["-0.01000", "-0.00500", "0.00000", "0.00500"]),
+    ((1600, 1700, 3, False), 10, ["1600", "1650"]),
+    (
+        (0, 25000, 1, True),
+        30,
+        ["0.00e+00", "5.00e+03", "1.00e+04", "1.50e+04", "2.00e+04", "2.50e+04"],
+    ),
+    (
+        (0.02, 0.3, 2, True),
+        20,
+        ["0.000", "0.050", "0.100", "0.150", "0.200", "0.250", "0.300", "0.350"],
+    ),
+    ((-3, 2, 1, True), 25, ["-3.00", "-2.00", "-1.00", "0.00", "1.00"]),
+    (
+        (math.log10(0.05), math.log10(5), 1, False),
+        30,
+        ["-2.000", "-1.500", "-1.000", "-0.500", "0.000", "0.500"],
+    ),
+    ((-6.5, -5.2, 1, True), 20, ["-7.00", "-6.50", "-6.00", "-5.50"]),
+]
+
+
+@pytest.mark.parametrize("axis, n_minor, labels", KNOWN_TICKS)
+def test_axis_ticks_known_labels(axis, n_minor, labels):
+    a_min, a_max, zoom, y_ax = axis
+    ticks = axis_ticks(np.array([a_min, a_max]), zoom, a_max, y_ax)
+    _, _, tick_vals, tick_txt, tick_vals_major, tick_txt_major = ticks
+
+    assert tick_txt_major == labels
+    assert len(tick_vals) == n_minor
+    assert tick_txt == [""] * n_minor
+    np.testing.assert_allclose(tick_vals_major, [float(t) for t in labels])
+    assert ticks == scalar_axis_ticks(a_min, zoom, a_max, y_ax)
+
+
+def test_axis_ticks_many_matches_scalar():
+    rng = np.random.default_rng(0)
+    spans = 10.0 ** rng.uniform(-4, 6, 500)
+    a_mins = rng.uniform(-1, 1, 500) * spans
+    a_maxes = a_mins + spans * rng.uniform(0.05, 1, 500)
+    zooms = rng.choice([1, 1.5, 2, 5], 500)
+    y_axes = rng.random(500) < 0.5
+
+    for a_min, a_max, zoom, y_ax in zip(a_mins, a_maxes, zooms, y_axes):
+        try:
+            expected = scalar_axis_ticks(a_min, zoom, a_max, y_ax)
+        except IndexError:
+            # Zoomed past the data there are no ticks, which both raise on
+            with pytest.raises(IndexError):
+                axis_ticks_many([a_min], [a_max], [zoom], [y_ax])
+            continue
+        assert axis_ticks_many([a_min], [a_max], [zoom], [y_ax])[0] == expected
+
+    # Many axes in one call give the same ticks as one at a time (unzoomed
+    # axes, which always have ticks)
+    k = np.flatnonzero((zooms == 1) | ~y_axes)
+    axes = axis_ticks_many(a_mins[k], a_maxes[k], zooms[k], y_axes[k])
+    for axis, args in zip(axes, zip(a_mins[k], zooms[k], a_maxes[k], y_axes[k])):
+        assert axis == scalar_axis_ticks(*args)